@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+bench_daemon - Daemon detection-to-recovery latency
+
+Runs hyprmode-daemon against benchmarks/fake_hyprland.py, switches to
+External Only, unplugs the external and times how long it takes until
+an output is lit again. The fake keeps a sysfs-style connector tree
+(HYPRMODE_DRM_SYSFS), so the daemon sees the kernel confirm the unplug
+and skips its debounce; with --no-drm it falls back to the deliberate
+debounce (3 consecutive zero-monitor readings, 1s apart). --uevents
+hands the daemon one end of a socketpair in place of the netlink socket
+and sends a drm uevent after each unplug. --omarchy-toggle leaves an
+Omarchy internal-display toggle in place, so a plain reload would keep
+the laptop off and the daemon has to clear the toggle. --dpms-off
+starts from Extend with the laptop powered down by DPMS instead, so the
+unplug leaves a panel that is enabled but dark; it first checks that
+the daemon leaves idle blanking (DPMS off on every lit output) alone.
+--unknown-status makes the laptop's connector report "unknown", as
+some DSI panels do, and first checks that Laptop Only on it is not
+mistaken for a black screen. --busy first reloads the config while
+every monitor query hangs, and checks that a compositor too busy to
+answer is not mistaken for a black screen either.
+Iterations are spaced by the daemon's recovery cooldown, so each run
+takes a while.
+
+The daemon's own hyprmode_detection_to_recovery_seconds histogram is
+read from its metrics socket and reported alongside.
+
+--fail injects failures while an iteration is being timed. The daemon
+queries "j/monitors all" and this script polls "j/monitors", so e.g.
+--fail "j/monitors all:0.3:drop" only affects the daemon. Error
+failures also hit single commands in a batch: with --dpms-off,
+--fail "dispatch dpms on:1:error" has the DPMS tier rejected, so the
+daemon has to escalate to a reload.
+
+    python3 benchmarks/bench_daemon.py [--settle-ms N] [--iterations N]
+        [--fail PREFIX:RATE:KIND ...] [--no-drm | --uevents] [--omarchy-toggle | --dpms-off]
+        [--unknown-status] [--busy]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_core  # noqa: E402
+import hyprmode_ipc  # noqa: E402
+
+
+DAEMON_COOLDOWN = 10  # seconds - hyprmode-daemon's cooldown between recoveries
+DAEMON_SAFETY_POLL = 10  # seconds - hyprmode-daemon's check interval without events
+DAEMON_DEBOUNCE = 3  # seconds - hyprmode-daemon's zero-monitor debounce (3 readings, 1s apart)
+RECOVERY_TIMEOUT = 15  # seconds - give up on an iteration after this
+DRM_UEVENT = b"change@/devices/pci0000:00/0000:00:02.0/drm/card0\0ACTION=change\0SUBSYSTEM=drm\0HOTPLUG=1\0"
+
+
+def read_metrics(path: str) -> dict:
+    """Samples from the daemon's metrics socket, keyed by name including labels"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    samples = {}
+    for line in data.decode("utf-8").splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def wait_until_lit(timeout: float) -> bool:
+    """Poll the active monitor list until some output is enabled with DPMS on"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if any(
+                m.get("width", 0) > 0 and m.get("dpmsStatus", True)
+                for m in hyprmode_ipc.request_json("monitors", timeout=1)
+            ):
+                return True
+        except hyprmode_ipc.HyprlandIPCError:
+            pass
+        time.sleep(0.005)
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--settle-ms", type=float, default=20)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--fail", action="append", default=[], metavar="PREFIX:RATE:KIND",
+                        help="failures injected into the fake while timing")
+    drm = parser.add_mutually_exclusive_group()
+    drm.add_argument("--no-drm", action="store_true", help="disable the daemon's kernel hotplug source")
+    drm.add_argument("--uevents", action="store_true", help="send a drm uevent after each unplug")
+    start_state = parser.add_mutually_exclusive_group()
+    start_state.add_argument("--omarchy-toggle", action="store_true",
+                             help="keep the laptop off on plain reloads until the daemon clears the toggle")
+    start_state.add_argument("--dpms-off", action="store_true",
+                             help="start from Extend with the laptop powered down by DPMS")
+    parser.add_argument("--unknown-status", action="store_true",
+                        help="the laptop's connector reports \"unknown\" instead of \"connected\"")
+    parser.add_argument("--busy", action="store_true",
+                        help="first check that unanswered monitor queries do not start a recovery")
+    args = parser.parse_args()
+
+    hyprmode_core.set_notifier(lambda message, urgent: None)
+
+    server, runtime_dir = fake_hyprland.spawn(args.settle_ms)
+    scratch = tempfile.mkdtemp(prefix="hyprmode-bench-home-")
+    env = dict(
+        os.environ,
+        HOME=scratch,  # the daemon clears the Omarchy toggle under $HOME
+        PATH=fake_hyprland.write_stub_bin(scratch) + os.pathsep + os.environ.get("PATH", ""),
+    )
+    toggle = os.path.join(scratch, ".local/state/omarchy/toggles/hypr/internal-monitor-disable.conf")
+    if args.omarchy_toggle:
+        fake_hyprland.control(f"toggle {toggle}")
+    if args.unknown_status:
+        fake_hyprland.control(f"unknown {hyprmode_core.get_monitors()['laptop']['name']}")
+    uevents, daemon_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    if args.no_drm:
+        env["HYPRMODE_DRM"] = "0"
+    elif args.uevents:
+        env["HYPRMODE_UEVENT_FD"] = str(daemon_end.fileno())
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, "hyprmode-daemon.py")],
+        env=env, stdout=subprocess.DEVNULL, cwd=REPO,
+        pass_fds=[daemon_end.fileno()] if args.uevents else [],
+    )
+    daemon_end.close()
+    metrics_path = os.path.join(runtime_dir, "hyprmode", "metrics.sock")
+    try:
+        while not os.path.exists(metrics_path):
+            if daemon.poll() is not None:
+                raise RuntimeError("hyprmode-daemon exited during startup")
+            time.sleep(0.01)
+
+        unknown_counted_lit = None
+        if args.unknown_status:
+            # Only the "unknown" connector lit: a real display, not a black screen
+            monitors = hyprmode_core.get_monitors()
+            hyprmode_core.apply_laptop_only(monitors['laptop'], monitors['external'], monitors['externals'])
+            time.sleep(DAEMON_DEBOUNCE + 1)
+            unknown_counted_lit = read_metrics(metrics_path).get("hyprmode_recoveries_total", 0) == 0
+            if not unknown_counted_lit:
+                raise RuntimeError("the daemon took a connector reporting \"unknown\" for unplugged")
+
+        busy_left_alone = None
+        if args.busy:
+            # The reload's configreloaded event wakes the daemon into
+            # queries that time out, for longer than its debounce
+            fake_hyprland.control("fail j/monitors:1:hang")
+            hyprmode_ipc.request("reload")
+            time.sleep(DAEMON_DEBOUNCE * 2 + 2)  # an unanswered check: 1s query deadline + 1s poll
+            fake_hyprland.control("clear-failures")
+            busy_left_alone = read_metrics(metrics_path).get("hyprmode_recoveries_total", 0) == 0
+            if not busy_left_alone:
+                raise RuntimeError("the daemon took unanswered monitor queries for a black screen")
+
+        idle_left_alone = None
+        if args.dpms_off:
+            # Idle blanking: every lit output off, nothing unplugged. One
+            # safety check (no event announces DPMS) must not undo it.
+            hyprmode_ipc.request("dispatch dpms off")
+            time.sleep(DAEMON_SAFETY_POLL + 1)
+            idle_left_alone = (
+                not any(m["dpmsStatus"] for m in hyprmode_ipc.request_json("monitors"))
+                and read_metrics(metrics_path).get("hyprmode_recoveries_total", 0) == 0
+            )
+            if not idle_left_alone:
+                raise RuntimeError("the daemon woke displays that were blanked for idle")
+            hyprmode_ipc.request("dispatch dpms on")
+
+        samples = []
+        for i in range(args.iterations):
+            if i:
+                time.sleep(DAEMON_COOLDOWN + 0.5)
+
+            # Untimed: External Only (or Extend with the laptop powered
+            # down), so unplugging leaves nothing showing pixels
+            monitors = hyprmode_core.get_monitors()
+            laptop, external = monitors['laptop']['name'], monitors['external']['name']
+            if args.dpms_off:
+                hyprmode_core.apply_extend(monitors['laptop'], monitors['external'], monitors['externals'])
+                hyprmode_ipc.wait_for_monitors(
+                    lambda ms: not any(m.get("disabled") for m in ms), timeout=RECOVERY_TIMEOUT,
+                )
+                hyprmode_ipc.request(f"dispatch dpms off {laptop}")
+            else:
+                hyprmode_core.apply_external_only(monitors['laptop'], monitors['external'], monitors['externals'])
+                hyprmode_ipc.wait_for_monitors(
+                    lambda ms: all(m.get("disabled") == (m["name"] == laptop) for m in ms),
+                    timeout=RECOVERY_TIMEOUT,
+                )
+
+            for spec in args.fail:
+                fake_hyprland.control(f"fail {spec}")
+            if args.omarchy_toggle:
+                os.makedirs(os.path.dirname(toggle), exist_ok=True)
+                open(toggle, "w").close()
+
+            start = time.perf_counter()
+            fake_hyprland.control(f"unplug {external}")
+            if args.uevents:
+                uevents.send(DRM_UEVENT)
+            if not wait_until_lit(RECOVERY_TIMEOUT):
+                raise RuntimeError(f"no output came back within {RECOVERY_TIMEOUT}s")
+            samples.append((time.perf_counter() - start) * 1000)
+
+            fake_hyprland.control("clear-failures")
+            fake_hyprland.control(f"plug {external}")
+
+        # The daemon's own verification can finish a moment after ours
+        deadline = time.monotonic() + 1
+        while True:
+            metrics = read_metrics(metrics_path)
+            recovered = sum(value for name, value in metrics.items()
+                            if name.startswith('hyprmode_recovery_tiers_total{ok="true"'))
+            if recovered >= metrics.get("hyprmode_recoveries_total", 0) or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        daemon_count = metrics.get("hyprmode_detection_to_recovery_seconds_count", 0)
+        results = {
+            "backend": "fake",
+            "settle_ms": args.settle_ms,
+            "iterations": args.iterations,
+            "failures": args.fail,
+            "omarchy_toggle": args.omarchy_toggle,
+            "dpms_off": args.dpms_off,
+            "idle_blank_left_alone": idle_left_alone,
+            "unknown_status_counted_lit": unknown_counted_lit,
+            "busy_left_alone": busy_left_alone,
+            "drm": "off" if args.no_drm else "uevents" if args.uevents else "sysfs",
+            "unplug_to_lit": {
+                "median_ms": round(statistics.median(samples), 1),
+                "max_ms": round(max(samples), 1),
+            },
+            "daemon_reported": {
+                "recoveries": metrics.get("hyprmode_recoveries_total", 0),
+                "mean_detection_to_recovery_ms": round(
+                    metrics["hyprmode_detection_to_recovery_seconds_sum"] / daemon_count * 1000, 1
+                ) if daemon_count else None,
+                "recovered_by_tier": {
+                    tier: metrics.get(f'hyprmode_recovery_tiers_total{{ok="true",tier="{tier}"}}', 0)
+                    for tier in ("dpms", "enable", "reload", "reload_clear_toggle")
+                },
+            },
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        daemon.kill()
+        server.kill()
+        uevents.close()
+
+
+if __name__ == "__main__":
+    main()
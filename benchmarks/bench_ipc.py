@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_ipc - Per-call latency: `hyprctl` subprocess vs hyprmode_ipc
+
+Times the calls hyprmode makes (monitor query, keyword, reload) through
+both paths. By default both run against benchmarks/fake_hyprland.py;
+pass --live inside a Hyprland session to measure the real compositor
+and the real hyprctl binary.
+
+Against the fake it also checks that hyprmode_ipc.batch() accepts
+replies with a trailing separator and still names a failed command.
+
+    python3 benchmarks/bench_ipc.py [--live] [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_ipc  # noqa: E402
+
+
+CALLS = [
+    # (label, hyprctl argv, IPC command)
+    ("monitors all -j", ["monitors", "all", "-j"], "j/monitors all"),
+    ("keyword monitor", ["keyword", "monitor", "HDMI-A-1,preferred,auto,1"], "keyword monitor HDMI-A-1,preferred,auto,1"),
+]
+
+
+def time_calls(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "min_ms": round(samples[0], 3),
+    }
+
+
+def check_batch() -> dict:
+    """batch() against replies ending in a separator, as some Hyprland versions send"""
+    fake_hyprland.control("trailing on")
+    try:
+        replies = hyprmode_ipc.batch(["keyword general:gaps_in 5", "keyword general:gaps_out 10"])
+        if replies != ["ok", "ok"]:
+            raise RuntimeError(f"batch with a trailing separator returned {replies}")
+        try:
+            hyprmode_ipc.batch(["keyword general:gaps_in 5", "dispatch bogus"])
+        except hyprmode_ipc.HyprlandCommandError as e:
+            if not str(e).startswith("dispatch bogus:"):
+                raise RuntimeError(f"batch failure did not name the command: {e}")
+        else:
+            raise RuntimeError("batch accepted a failed command")
+    finally:
+        fake_hyprland.control("trailing off")
+    return {"trailing_separator_ok": True, "failure_named": True}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--live", action="store_true", help="use the running Hyprland and real hyprctl")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    server = None
+    hyprctl = "hyprctl"
+    if not args.live:
+        server, runtime_dir = fake_hyprland.spawn()
+        hyprctl = fake_hyprland.write_fake_hyprctl(runtime_dir)
+
+    try:
+        results = {"backend": "live" if args.live else "fake", "iterations": args.iterations, "calls": {}}
+        for label, argv, command in CALLS:
+            results["calls"][label] = {
+                "subprocess": time_calls(
+                    lambda: subprocess.run([hyprctl, *argv], capture_output=True, text=True, timeout=5),
+                    args.iterations,
+                ),
+                "ipc": time_calls(lambda: hyprmode_ipc.request(command), args.iterations),
+            }
+        if not args.live:
+            results["batch"] = check_batch()
+        print(json.dumps(results, indent=2))
+    finally:
+        if server is not None:
+            server.kill()
+
+
+if __name__ == "__main__":
+    main()
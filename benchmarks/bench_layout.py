@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+bench_layout - Layout cost as the number of outputs grows
+
+Builds monitor sets of a laptop plus N externals for benchmarks/fake_hyprland.py
+and times, for each N:
+
+- layout: hyprmode_layout.compute() + commands() for Extend, in-process
+- mirror_solve: hyprmode_layout.solve_mirror() searching availableModes
+  for the mode every output shares
+- rearrange: Extend (left) -> Extend (right), one batch moving every output
+- from_mirror: Mirror -> Extend, which takes the disable + reload path
+
+Both switches are a single batch however many outputs there are, so the
+timings should stay nearly flat as N grows.
+
+    python3 benchmarks/bench_layout.py [--externals 1 2 4 8] [--iterations N]
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_core  # noqa: E402
+import hyprmode_layout  # noqa: E402
+
+
+def monitor_set(externals: int) -> list:
+    monitors = [copy.deepcopy(fake_hyprland.LAPTOP)]
+    for i in range(externals):
+        external = copy.deepcopy(fake_hyprland.EXTERNAL)
+        external.update(id=i + 1, name=f"DP-{i + 1}", serial=f"{i + 2:04d}", x=1920 + i * 2560)
+        monitors.append(external)
+    return monitors
+
+
+def summarize(samples: list, unit: str) -> dict:
+    return {
+        f"median_{unit}": round(statistics.median(samples), 2),
+        f"max_{unit}": round(max(samples), 2),
+    }
+
+
+def time_switch(origin: tuple, target: tuple, iterations: int) -> list:
+    """(mode, direction) -> (mode, direction), timed from the apply call"""
+    samples = []
+    for _ in range(iterations):
+        monitors = hyprmode_core.get_monitors()
+        args = (monitors['laptop'], monitors['external'], monitors['externals'])
+        if origin[0] == "extend":
+            hyprmode_core.apply_extend(*args, direction=origin[1])
+        else:
+            hyprmode_core.APPLY_MODE[origin[0]](*args)
+
+        monitors = hyprmode_core.get_monitors()
+        start = time.perf_counter()
+        hyprmode_core.apply_extend(
+            monitors['laptop'], monitors['external'], monitors['externals'], direction=target[1]
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--externals", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    hyprmode_core.set_notifier(lambda message, urgent: None)
+
+    results = {"backend": "fake", "iterations": args.iterations, "externals": {}}
+    scratch = tempfile.mkdtemp(prefix="hyprmode-bench-layout-")
+    for count in args.externals:
+        monitors = monitor_set(count)
+        parsed = hyprmode_core.parse_monitors([fake_hyprland.as_reported(m) for m in monitors])
+        layout_samples = []
+        for _ in range(args.iterations * 100):
+            start = time.perf_counter()
+            hyprmode_layout.commands(
+                hyprmode_layout.compute("extend", parsed['laptop'], parsed['externals'], "right")
+            )
+            layout_samples.append((time.perf_counter() - start) * 1_000_000)
+
+        outputs = [parsed['laptop']] + parsed['externals']
+        mirror_samples = []
+        for _ in range(args.iterations * 100):
+            start = time.perf_counter()
+            hyprmode_layout.solve_mirror(outputs)
+            mirror_samples.append((time.perf_counter() - start) * 1_000_000)
+
+        path = os.path.join(scratch, f"{count}.json")
+        with open(path, "w") as f:
+            json.dump(monitors, f)
+        server, _ = fake_hyprland.spawn(monitors=path)
+        try:
+            results["externals"][str(count)] = {
+                "layout": summarize(layout_samples, "us"),
+                "mirror_solve": summarize(mirror_samples, "us"),
+                "rearrange": summarize(time_switch(("extend", "left"), ("extend", "right"), args.iterations), "ms"),
+                "from_mirror": summarize(time_switch(("mirror", None), ("extend", "right"), args.iterations), "ms"),
+            }
+        finally:
+            server.kill()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
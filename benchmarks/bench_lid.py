@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+bench_lid - Daemon lid-switch reaction time
+
+Runs hyprmode-daemon with HYPRMODE_LID=1 against
+benchmarks/fake_hyprland.py, with a FIFO standing in for the lid's evdev
+device (HYPRMODE_LID_DEVICE). Starting from Extend, it writes SW_LID
+input_event records into the FIFO and times:
+
+- close: lid closed until the laptop panel is disabled (External Only)
+- open:  lid opened until the laptop is lit again at its Extend position
+
+The open path includes a config reload, so it scales with --settle-ms.
+
+    python3 benchmarks/bench_lid.py [--settle-ms N] [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_core  # noqa: E402
+import hyprmode_ipc  # noqa: E402
+
+
+INPUT_EVENT = struct.Struct("llHHi")
+EV_SYN, EV_SW, SW_LID = 0x00, 0x05, 0x00
+TIMEOUT = 5  # seconds - give up on a transition after this
+
+
+def lid_event(closed: bool) -> bytes:
+    now = time.time()
+    sec, usec = int(now), int(now % 1 * 1_000_000)
+    return INPUT_EVENT.pack(sec, usec, EV_SW, SW_LID, int(closed)) + INPUT_EVENT.pack(sec, usec, EV_SYN, 0, 0)
+
+
+def poll_until(predicate) -> float:
+    """Milliseconds until predicate(monitors all) holds, polling every 1ms"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < TIMEOUT:
+        if predicate(hyprmode_ipc.request_json("monitors all")):
+            return (time.perf_counter() - start) * 1000
+        time.sleep(0.001)
+    raise RuntimeError(f"no transition within {TIMEOUT}s")
+
+
+def summary(samples: list) -> dict:
+    return {"median_ms": round(statistics.median(samples), 1), "max_ms": round(max(samples), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--settle-ms", type=float, default=20)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    hyprmode_core.set_notifier(lambda message, urgent: None)
+
+    server, runtime_dir = fake_hyprland.spawn(args.settle_ms)
+    scratch = tempfile.mkdtemp(prefix="hyprmode-bench-home-")
+    device = os.path.join(scratch, "lid-event")
+    os.mkfifo(device)
+    # Held open for writing for the whole run, so the daemon never reads EOF
+    writer = os.open(device, os.O_RDWR)
+    env = dict(
+        os.environ,
+        HOME=scratch,
+        PATH=fake_hyprland.write_stub_bin(scratch) + os.pathsep + os.environ.get("PATH", ""),
+        HYPRMODE_LID="1",
+        HYPRMODE_LID_DEVICE=device,
+    )
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, "hyprmode-daemon.py")],
+        env=env, stdout=subprocess.DEVNULL, cwd=REPO,
+    )
+    metrics_path = os.path.join(runtime_dir, "hyprmode", "metrics.sock")
+    try:
+        while not os.path.exists(metrics_path):
+            if daemon.poll() is not None:
+                raise RuntimeError("hyprmode-daemon exited during startup")
+            time.sleep(0.01)
+
+        monitors = hyprmode_core.get_monitors()
+        laptop = monitors['laptop']['name']
+        hyprmode_core.apply_extend(monitors['laptop'], monitors['external'], monitors['externals'])
+        poll_until(lambda ms: all(not m.get("disabled") for m in ms))
+        extended = {m["name"]: (m["x"], m["y"]) for m in hyprmode_ipc.request_json("monitors all")}
+
+        def laptop_off(ms):
+            return all(m.get("disabled") == (m["name"] == laptop) for m in ms)
+
+        def restored(ms):
+            return all(not m.get("disabled") and (m["x"], m["y"]) == extended[m["name"]] for m in ms)
+
+        close_samples, open_samples = [], []
+        for _ in range(args.iterations):
+            os.write(writer, lid_event(closed=True))
+            close_samples.append(poll_until(laptop_off))
+            os.write(writer, lid_event(closed=False))
+            open_samples.append(poll_until(restored))
+
+        results = {
+            "backend": "fake",
+            "settle_ms": args.settle_ms,
+            "iterations": args.iterations,
+            "close": summary(close_samples),
+            "open": summary(open_samples),
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        daemon.kill()
+        server.kill()
+        os.close(writer)
+
+
+if __name__ == "__main__":
+    main()
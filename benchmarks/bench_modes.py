@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+bench_modes - End-to-end time of each hyprmode mode switch
+
+Runs every apply_* function against benchmarks/fake_hyprland.py at a
+range of compositor settle delays, so the cost of waiting for the
+compositor can be told apart from hyprmode's own overhead. A switch
+ends once the outputs are verified to be in the new layout.
+
+--rollback also times switches that do not take effect, until Extend
+is restored: one where the first external refuses the mode Mirror asks
+of it, so verification gives up after its deadline (verification), and
+one where Hyprland rejects the laptop's rule at the end of the External
+Only batch, after the rules ahead of it were applied (batch_error).
+
+--workspaces times Extend -> Laptop Only -> Extend and checks that every
+workspace is back on the output it started on, counting the dispatches
+that moved them. The mode switches before it leave every workspace on
+the laptop, so it first spreads them over all outputs; a run in which
+no workspace had to move fails instead of reporting success.
+
+    python3 benchmarks/bench_modes.py [--settle-ms 0 20 100] [--monitors dual triple]
+        [--iterations N] [--rollback] [--workspaces]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_core  # noqa: E402
+import hyprmode_ipc  # noqa: E402
+
+
+# Starting states: from Extend the planner sends a minimal batch, from
+# Mirror it has to take the disable + reload path.
+ORIGINS = ["extend", "mirror"]
+
+
+def rollback(iterations: int) -> dict:
+    """
+    Time Extend -> Mirror with the external refusing the mirror's mode,
+    and Extend -> External Only with the laptop's rule rejected inside
+    the batch, each until Extend is back
+    """
+    samples = {"verification": [], "batch_error": []}
+    for _ in range(iterations):
+        for case, samples_for in samples.items():
+            monitors = hyprmode_core.get_monitors()
+            hyprmode_core.apply_extend(monitors['laptop'], monitors['external'], monitors['externals'])
+            monitors = hyprmode_core.get_monitors()
+            extend = hyprmode_core.layout_snapshot(monitors)
+
+            if case == "verification":
+                fake_hyprland.control(f"reject {monitors['external']['name']}")
+                apply, expected = hyprmode_core.apply_mirror, "restored the previous layout"
+            else:
+                fake_hyprland.control(f"fail keyword monitor {monitors['laptop']['name']},disable:1:error")
+                apply, expected = hyprmode_core.apply_external_only, "injected failure"
+            start = time.perf_counter()
+            try:
+                apply(monitors['laptop'], monitors['external'], monitors['externals'])
+                raise RuntimeError(f"{case}: the switch was not rolled back")
+            except RuntimeError as e:
+                if expected not in str(e):
+                    raise
+            restored = hyprmode_ipc.wait_for_monitors(
+                lambda data: not hyprmode_core.verify_layout(extend, data)
+            )
+            samples_for.append((time.perf_counter() - start) * 1000)
+            fake_hyprland.control(f"accept {monitors['external']['name']}")
+            fake_hyprland.control("clear-failures")
+            if restored is None:
+                raise RuntimeError(f"{case}: Extend was not restored")
+    return {
+        case: {"median_ms": round(statistics.median(s), 2), "max_ms": round(max(s), 2)}
+        for case, s in samples.items()
+    }
+
+
+def workspaces(iterations: int) -> dict:
+    """Time Extend -> Laptop Only -> Extend and check the workspaces went home"""
+    moves = []
+    original_move = hyprmode_core.move_workspaces
+
+    def counting_move(placements, assignment):
+        sent = original_move(placements, assignment)
+        moves.append(len(sent))
+        return sent
+
+    hyprmode_core.move_workspaces = counting_move
+    try:
+        monitors = hyprmode_core.get_monitors()
+        hyprmode_core.apply_extend(monitors['laptop'], monitors['external'], monitors['externals'])
+        # Untimed: spread the workspaces with windows over every output
+        outputs = [monitors['laptop']['name']] + [m['name'] for m in monitors['externals']]
+        held = sorted((w for w in hyprmode_ipc.request_json("workspaces") if w["windows"]), key=lambda w: w["id"])
+        hyprmode_ipc.batch([
+            f"dispatch moveworkspacetomonitor {w['id']} {outputs[i % len(outputs)]}"
+            for i, w in enumerate(held)
+        ])
+        moves.clear()
+        before = {w["name"]: w["monitor"] for w in hyprmode_ipc.request_json("workspaces")}
+        leave, back = [], []
+        for _ in range(iterations):
+            monitors = hyprmode_core.get_monitors()
+            start = time.perf_counter()
+            hyprmode_core.apply_laptop_only(monitors['laptop'], monitors['external'], monitors['externals'])
+            leave.append((time.perf_counter() - start) * 1000)
+            monitors = hyprmode_core.get_monitors()
+            start = time.perf_counter()
+            hyprmode_core.apply_extend(monitors['laptop'], monitors['external'], monitors['externals'])
+            back.append((time.perf_counter() - start) * 1000)
+        after = {w["name"]: w["monitor"] for w in hyprmode_ipc.request_json("workspaces")}
+    finally:
+        hyprmode_core.move_workspaces = original_move
+    if not moves or min(moves) == 0:
+        raise RuntimeError(f"a switch moved no workspaces (dispatches per switch: {moves}); nothing was tested")
+    return {
+        "to_laptop": {"median_ms": round(statistics.median(leave), 2), "max_ms": round(max(leave), 2)},
+        "to_extend": {"median_ms": round(statistics.median(back), 2), "max_ms": round(max(back), 2)},
+        "dispatches_per_switch": max(moves, default=0),
+        "restored": all(after.get(name) == monitor for name, monitor in before.items()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--settle-ms", type=float, nargs="+", default=[0, 20, 100])
+    parser.add_argument("--monitors", nargs="+", default=["dual"], choices=list(fake_hyprland.MONITOR_SETS))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--rollback", action="store_true", help="also time a switch that is rolled back")
+    parser.add_argument("--workspaces", action="store_true",
+                        help="also check that workspaces return after Laptop Only")
+    args = parser.parse_args()
+
+    # Keep notify-send out of the measurement
+    hyprmode_core.set_notifier(lambda message, urgent: None)
+
+    results = {"backend": "fake", "iterations": args.iterations, "settle_ms": {}}
+    for settle_ms in args.settle_ms:
+        per_set = {}
+        for monitor_set in args.monitors:
+            server, _ = fake_hyprland.spawn(settle_ms, monitors=monitor_set)
+            try:
+                per_origin = {}
+                for origin in ORIGINS:
+                    per_mode = {}
+                    for mode, apply in hyprmode_core.APPLY_MODE.items():
+                        if mode == origin:
+                            continue
+                        samples = []
+                        for _ in range(args.iterations):
+                            # Untimed: put the fake into the starting state
+                            monitors = hyprmode_core.get_monitors()
+                            hyprmode_core.APPLY_MODE[origin](
+                                monitors['laptop'], monitors['external'], monitors['externals']
+                            )
+                            time.sleep(settle_ms / 1000.0)
+
+                            monitors = hyprmode_core.get_monitors()
+                            start = time.perf_counter()
+                            apply(monitors['laptop'], monitors['external'], monitors['externals'])
+                            samples.append((time.perf_counter() - start) * 1000)
+                        per_mode[mode] = {
+                            "median_ms": round(statistics.median(samples), 2),
+                            "max_ms": round(max(samples), 2),
+                        }
+                    per_origin[f"from_{origin}"] = per_mode
+                if args.rollback:
+                    per_origin["rollback"] = rollback(args.iterations)
+                if args.workspaces:
+                    per_origin["workspaces"] = workspaces(args.iterations)
+                per_set[monitor_set] = per_origin
+            finally:
+                server.kill()
+        results["settle_ms"][str(settle_ms)] = per_set
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
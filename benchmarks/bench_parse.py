@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+bench_parse - Cost of reading the monitor state
+
+Times JSON decoding and hyprmode_core.parse_monitors() on each fake
+monitor set in-process, and get_monitors() end to end (IPC query, JSON
+decode, parse) against benchmarks/fake_hyprland.py, optionally with a
+per-request latency.
+
+    python3 benchmarks/bench_parse.py [--latency-ms 0 1] [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+import hyprmode_core  # noqa: E402
+
+
+def time_calls(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return {
+        "median_us": round(statistics.median(samples), 1),
+        "min_us": round(min(samples), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    results = {
+        "backend": "fake",
+        "iterations": args.iterations,
+        "json_decode": {},
+        "parse_monitors": {},
+        "get_monitors": {},
+    }
+    for name, monitors in fake_hyprland.MONITOR_SETS.items():
+        reply = json.dumps(monitors)
+        results["json_decode"][name] = time_calls(lambda: json.loads(reply), args.iterations)
+        results["parse_monitors"][name] = time_calls(
+            lambda: hyprmode_core.parse_monitors(monitors), args.iterations
+        )
+
+    for latency_ms in args.latency_ms:
+        per_set = {}
+        for name in fake_hyprland.MONITOR_SETS:
+            server, _ = fake_hyprland.spawn(latency_ms=latency_ms, monitors=name)
+            try:
+                per_set[name] = time_calls(hyprmode_core.get_monitors, args.iterations)
+            finally:
+                server.kill()
+        results["get_monitors"][f"latency_{latency_ms:g}ms"] = per_set
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
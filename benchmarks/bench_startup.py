@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+bench_startup - Cold-start time of the hyprmode CLI
+
+Times fresh `python3 hyprmode.py ...` processes against
+benchmarks/fake_hyprland.py, and checks that the headless commands never
+import Textual. Then starts hyprmode-daemon and times the same commands
+again, now answered over its control socket ("via_daemon"). When Textual
+is installed, the import cost of the TUI module is reported alongside
+for comparison.
+
+"daemon_startup" installs the daemon and its modules into a scratch
+directory the way install.sh does and times hyprmode-daemon-wrapper
+until the control socket is up, reporting the daemon's resident memory
+at that point. "source" starts without bytecode, as every start did
+when the wrapper deleted the pycs and compiled the daemon itself;
+"checked_hash" starts from the checked-hash pycs install.sh writes.
+
+    python3 benchmarks/bench_startup.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+
+
+MODULES = ["hyprmode_ipc.py", "hyprmode_core.py", "hyprmode_profiles.py", "hyprmode_layout.py"]
+
+COMMANDS = [
+    ["status"],
+    ["status", "--json"],
+    ["extend", "--dry-run"],
+    ["extend"],
+]
+
+
+def time_process(argv: list, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(argv, capture_output=True, check=True, cwd=REPO)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+    }
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+
+
+def install_daemon(target: str) -> None:
+    """Lay out the daemon like install.sh does in /usr/local/bin"""
+    os.makedirs(target, exist_ok=True)
+    shutil.copy(os.path.join(REPO, "hyprmode-daemon.py"), os.path.join(target, "hyprmode-daemon"))
+    shutil.copy(os.path.join(REPO, "hyprmode-daemon-wrapper"), target)
+    for module in MODULES:
+        shutil.copy(os.path.join(REPO, module), target)
+
+
+def compile_daemon(target: str) -> None:
+    """The checked-hash pycs install.sh writes"""
+    for name in ["hyprmode-daemon", *MODULES]:
+        py_compile.compile(
+            os.path.join(target, name), doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+        )
+
+
+def time_daemon_start(target: str, control_path: str, iterations: int) -> dict:
+    """Wrapper start until the control socket is up, and RSS at that point"""
+    env = dict(os.environ, HYPRMODE_DAEMON=os.path.join(target, "hyprmode-daemon"))
+    # The flags from the wrapper's #! line, which running it through sys.executable skips
+    argv = [sys.executable, "-Bu", os.path.join(target, "hyprmode-daemon-wrapper")]
+    samples, rss = [], []
+    for _ in range(iterations):
+        if os.path.exists(control_path):
+            os.unlink(control_path)
+        start = time.perf_counter()
+        daemon = subprocess.Popen(argv, env=env, stdout=subprocess.DEVNULL, cwd=target)
+        try:
+            while not os.path.exists(control_path):
+                if daemon.poll() is not None:
+                    raise RuntimeError("hyprmode-daemon-wrapper exited during startup")
+                time.sleep(0.001)
+            samples.append((time.perf_counter() - start) * 1000)
+            rss.append(rss_kib(daemon.pid))
+        finally:
+            daemon.kill()
+            daemon.wait()
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "rss_kib": int(statistics.median(rss)),
+    }
+
+
+def imported_modules(argv: list) -> set:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], capture_output=True, text=True, cwd=REPO
+    )
+    return {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    server, runtime_dir = fake_hyprland.spawn()
+    scratch = tempfile.mkdtemp(prefix="hyprmode-bench-home-")
+    os.environ.update(
+        HOME=scratch,
+        PATH=fake_hyprland.write_stub_bin(scratch) + os.pathsep + os.environ.get("PATH", ""),
+    )
+    daemon = None
+    try:
+        results = {"backend": "fake", "iterations": args.iterations, "commands": {}, "via_daemon": {}}
+        results["python_baseline"] = time_process([sys.executable, "-c", "pass"], args.iterations)
+        for command in COMMANDS:
+            argv = [sys.executable, "hyprmode.py", *command]
+            entry = time_process(argv, args.iterations)
+            modules = imported_modules(["hyprmode.py", *command])
+            entry["imports_textual"] = any(m.split(".")[0] == "textual" for m in modules)
+            entry["imports_tomllib"] = "tomllib" in modules
+            results["commands"][" ".join(command)] = entry
+
+        daemon = subprocess.Popen(
+            [sys.executable, os.path.join(REPO, "hyprmode-daemon.py")],
+            stdout=subprocess.DEVNULL, cwd=REPO,
+        )
+        control_path = os.path.join(runtime_dir, "hyprmode", "control.sock")
+        while not os.path.exists(control_path):
+            if daemon.poll() is not None:
+                raise RuntimeError("hyprmode-daemon exited during startup")
+            time.sleep(0.01)
+        for command in COMMANDS:
+            argv = [sys.executable, "hyprmode.py", *command]
+            entry = time_process(argv, args.iterations)
+            modules = imported_modules(["hyprmode.py", *command])
+            entry["imports_hyprmode_core"] = "hyprmode_core" in modules
+            results["via_daemon"][" ".join(command)] = entry
+
+        daemon.kill()
+        daemon.wait()
+        daemon = None
+        target = os.path.join(scratch, "bin")
+        install_daemon(target)
+        results["daemon_startup"] = {"source": time_daemon_start(target, control_path, args.iterations)}
+        compile_daemon(target)
+        results["daemon_startup"]["checked_hash"] = time_daemon_start(target, control_path, args.iterations)
+
+        probe = subprocess.run([sys.executable, "-c", "import textual"], capture_output=True)
+        if probe.returncode == 0:
+            results["tui_import"] = time_process(
+                [sys.executable, "-c", "import hyprmode_tui"], args.iterations
+            )
+
+        print(json.dumps(results, indent=2))
+    finally:
+        if daemon is not None:
+            daemon.kill()
+        server.kill()
+
+
+if __name__ == "__main__":
+    main()
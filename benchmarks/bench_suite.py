@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+bench_suite - Run every benchmark and collect one JSON report
+
+Runs the bench_*.py scripts against benchmarks/fake_hyprland.py and
+writes their results, together with the hyprmode version and git
+revision, to a single JSON document. Two reports can be compared to spot
+regressions between versions:
+
+    python3 benchmarks/bench_suite.py [--quick] [--skip daemon] [-o report.json]
+    python3 benchmarks/bench_suite.py --compare old.json new.json [--threshold 10]
+
+--compare prints every timing that changed by more than the threshold
+(in percent) and exits with status 1 if any of them got slower.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(BENCH_DIR)
+
+# name -> (script, full arguments, --quick arguments)
+BENCHMARKS = {
+    "startup": ("bench_startup.py", [], ["--iterations", "5"]),
+    "ipc": ("bench_ipc.py", [], ["--iterations", "50"]),
+    "parse": ("bench_parse.py", ["--latency-ms", "0", "1"], ["--iterations", "100"]),
+    "modes": ("bench_modes.py", ["--monitors", "dual", "triple"], ["--settle-ms", "0", "--iterations", "3"]),
+    "layout": ("bench_layout.py", [], ["--iterations", "3"]),
+    "lid": ("bench_lid.py", [], ["--iterations", "2"]),
+    "daemon": ("bench_daemon.py", [], ["--iterations", "1"]),
+    "tui": ("bench_tui.py", [], ["--iterations", "3"]),
+}
+
+# Result keys holding timings (lower is better)
+TIMING_KEY = re.compile(r"^(median|min|max|p95|mean)\w*_(ms|us)$")
+
+
+def hyprmode_version() -> str:
+    with open(os.path.join(REPO, "hyprmode.py")) as f:
+        match = re.search(r"VERSION:\s*(\S+)", f.read())
+    return match.group(1) if match else "unknown"
+
+
+def git_revision() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, cwd=REPO, timeout=5,
+        )
+        return result.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run(names: list, quick: bool) -> dict:
+    report = {
+        "version": hyprmode_version(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "quick": quick,
+        "benchmarks": {},
+    }
+    for name in names:
+        script, full_args, quick_args = BENCHMARKS[name]
+        print(f"running {name}...", file=sys.stderr)
+        result = subprocess.run(
+            [sys.executable, os.path.join(BENCH_DIR, script), *(quick_args if quick else full_args)],
+            capture_output=True, text=True, cwd=REPO,
+        )
+        if result.returncode != 0:
+            report["benchmarks"][name] = {"error": result.stderr.strip().splitlines()[-1:]}
+            continue
+        report["benchmarks"][name] = json.loads(result.stdout)
+    return report
+
+
+def timings(node, path: str = "") -> dict:
+    """Flatten a report into {"bench/.../median_ms": value} for timing keys"""
+    found = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            child = f"{path}/{key}" if path else key
+            if isinstance(value, (int, float)) and TIMING_KEY.search(key):
+                found[child] = value
+            else:
+                found.update(timings(value, child))
+    return found
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old.get('version')} ({old.get('revision')}) -> {new.get('version')} ({new.get('revision')})")
+
+    old_timings = timings(old.get("benchmarks", {}))
+    new_timings = timings(new.get("benchmarks", {}))
+    regressions = 0
+    for key in sorted(old_timings.keys() & new_timings.keys()):
+        before, after = old_timings[key], new_timings[key]
+        if not before:
+            continue
+        change = (after - before) / before * 100
+        if abs(change) < threshold:
+            continue
+        marker = "SLOWER" if change > 0 else "faster"
+        regressions += change > 0
+        print(f"  {marker:6} {change:+7.1f}%  {key}: {before} -> {after}")
+    for key in sorted(old_timings.keys() ^ new_timings.keys()):
+        print(f"  {'only in ' + ('old' if key in old_timings else 'new'):6}  {key}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--skip", nargs="+", default=[], choices=list(BENCHMARKS))
+    parser.add_argument("-o", "--output", help="write the report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change reported by --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    report = run([name for name in BENCHMARKS if name not in args.skip], args.quick)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+bench_tui - Menu first-paint latency
+
+Starts the hyprmode TUI in a pseudo-terminal against
+benchmarks/fake_hyprland.py and times, per start:
+
+- app_to_paint:     HyprModeApp() created until the menu is on screen
+- process_to_paint: process started until the menu is on screen
+                    (includes importing Textual)
+- app_to_monitors:  HyprModeApp() created until the monitor panel shows
+                    the external display
+
+--hang-all makes the fake never answer "monitors all", so the monitors
+only arrive through the plain "monitors" fallback after the 5s IPC
+timeout; the menu should paint just as fast either way.
+
+    python3 benchmarks/bench_tui.py [--iterations N] [--hang-all]
+"""
+
+import argparse
+import json
+import os
+import pty
+import select
+import statistics
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hyprland  # noqa: E402
+
+
+TIMEOUT = 10  # seconds - give up on a start after this
+PAINTED = b"Display Mode Switcher"
+MONITORS = b"HDMI-A-1"
+
+# Run in the pty: note when the app is created, after every import
+# and before HyprModeApp() does any work of its own
+DRIVER = """
+import sys, time
+sys.path.insert(0, {repo!r})
+import hyprmode_tui
+with open({marker!r}, "w") as f:
+    f.write(repr(time.monotonic()))
+hyprmode_tui.HyprModeApp().run()
+"""
+
+
+def start_tui(marker: str, env: dict) -> dict:
+    """Milliseconds from process and app start until paint and monitors"""
+    if os.path.exists(marker):
+        os.unlink(marker)
+    started = time.monotonic()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.execve(sys.executable, [sys.executable, "-c", DRIVER.format(repo=REPO, marker=marker)], env)
+    output, seen = b"", {}
+    try:
+        while len(seen) < 2 and time.monotonic() - started < TIMEOUT:
+            if select.select([fd], [], [], 0.005)[0]:
+                try:
+                    output += os.read(fd, 65536)
+                except OSError:
+                    break
+            now = time.monotonic()
+            for label, needle in (("paint", PAINTED), ("monitors", MONITORS)):
+                if label not in seen and needle in output:
+                    seen[label] = now
+    finally:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+        os.close(fd)
+    if len(seen) < 2:
+        raise RuntimeError(f"the TUI did not show {' and '.join(k for k in ('paint', 'monitors') if k not in seen)}"
+                           f" within {TIMEOUT}s")
+    # CLOCK_MONOTONIC is system-wide, so the child's reading compares with ours
+    with open(marker) as f:
+        app_started = float(f.read())
+    return {
+        "app_to_paint": (seen["paint"] - app_started) * 1000,
+        "process_to_paint": (seen["paint"] - started) * 1000,
+        "app_to_monitors": (seen["monitors"] - app_started) * 1000,
+    }
+
+
+def summary(samples: list) -> dict:
+    return {"median_ms": round(statistics.median(samples), 1), "max_ms": round(max(samples), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--hang-all", action="store_true", help="never answer \"monitors all\"")
+    args = parser.parse_args()
+
+    try:
+        import textual  # noqa: F401
+    except ImportError:
+        print(json.dumps({"skipped": "textual is not installed"}, indent=2))
+        return
+
+    server, runtime_dir = fake_hyprland.spawn()
+    scratch = tempfile.mkdtemp(prefix="hyprmode-bench-home-")
+    env = dict(
+        os.environ,
+        HOME=scratch,
+        TERM="xterm-256color",
+        PATH=fake_hyprland.write_stub_bin(scratch) + os.pathsep + os.environ.get("PATH", ""),
+    )
+    marker = os.path.join(scratch, "app-started")
+    try:
+        if args.hang_all:
+            fake_hyprland.control("fail j/monitors all:1:hang")
+        samples = [start_tui(marker, env) for _ in range(args.iterations)]
+        results = {
+            "backend": "fake",
+            "iterations": args.iterations,
+            "hang_all": args.hang_all,
+            **{key: summary([s[key] for s in samples]) for key in samples[0]},
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        server.kill()
+
+
+if __name__ == "__main__":
+    main()
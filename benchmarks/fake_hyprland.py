@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+fake_hyprland - Stand-in for a Hyprland instance's IPC sockets
+
+Serves `.socket.sock` and `.socket2.sock` under <runtime-dir>/hypr/<signature>/
+with a scriptable monitor set, so hyprmode's IPC paths and the daemon can
+be timed without a compositor:
+
+- `keyword monitor` and `reload` change the served state after a
+  configurable settle delay, like a compositor finishing a modeset
+- mirrors report their source's monitor id in mirrorOf, as Hyprland does
+- modes carry their exact rate internally (143.998Hz) but are listed in
+  availableModes to 2 decimals (144.00Hz), as Hyprland prints them
+- a rule asking for a mode the output does not advertise gets its
+  preferred (first) mode instead, as in Hyprland, and a rule without
+  `vrr` turns adaptive sync off; outputs can also be
+  set to refuse every new mode (they keep the one they run)
+- every request can be delayed by a fixed latency
+- batch replies can be made to end with a trailing separator and an
+  empty reply, as some Hyprland versions send them
+- failures can be injected per command prefix: an error reply, a
+  dropped connection, or a hang until the client gives up; error
+  failures also hit single commands inside a batch, after the commands
+  ahead of them were applied
+- `dispatch dpms` powers outputs up and down; a reload can be made to
+  leave the laptop off while an Omarchy-style toggle file exists
+- every output starts with two workspaces; when an output goes dark or
+  mirrors, its workspaces move one at a time to the first output still
+  showing content (empty ones are destroyed), an output that lights up
+  without one gets a fresh workspace, and `dispatch
+  moveworkspacetomonitor` moves them around
+- outputs enabled or disabled by a change, a reload, or an unplug are
+  announced on socket2 (monitoradded/monitorremoved, v1 and v2, and
+  configreloaded)
+- the kernel's side is mirrored in a fake sysfs tree,
+  <runtime-dir>/drm/card0-<output>/status, which unplug/plug flip
+  between "connected" and "disconnected" (a connector can also be made
+  to report "unknown", like some DSI panels and DisplayLink outputs);
+  spawn() points the daemon's DRM hotplug source at it (HYPRMODE_DRM_SYSFS)
+
+Benchmarks script it through extra `fakectl ...` requests on the request
+socket (see FakeHyprland.control). Point clients at it with:
+
+    XDG_RUNTIME_DIR=<runtime-dir> HYPRLAND_INSTANCE_SIGNATURE=<signature>
+
+Run directly to serve until killed:
+
+    python3 benchmarks/fake_hyprland.py <runtime-dir> [--signature S] [--settle-ms N]
+        [--latency-ms N] [--monitors laptop|dual|triple|FILE.json]
+        [--fail PREFIX:RATE:KIND ...]
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import select
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+
+SIGNATURE = "fake"
+
+HANG_SECONDS = 30  # a "hang" failure holds the connection open this long
+FAILURE_KINDS = ("error", "drop", "hang")
+
+LAPTOP = {
+    "id": 0, "name": "eDP-1", "description": "Fake laptop panel",
+    "make": "Fake", "model": "Panel", "serial": "0001",
+    "width": 1920, "height": 1080, "refreshRate": 60.0,
+    "x": 0, "y": 0, "scale": 1.0, "transform": 0,
+    "dpmsStatus": True, "vrr": False, "disabled": False,
+    "mirrorOf": "none",
+    "availableModes": ["1920x1080@60.00Hz"],
+}
+
+EXTERNAL = {
+    "id": 1, "name": "HDMI-A-1", "description": "Fake external",
+    "make": "Fake", "model": "External", "serial": "0002",
+    "width": 2560, "height": 1440, "refreshRate": 143.998,
+    "x": 1920, "y": 0, "scale": 1.0, "transform": 0,
+    "dpmsStatus": True, "vrr": True, "disabled": False,
+    "mirrorOf": "none",
+    # A high-refresh display whose EDID prefers 60Hz
+    "availableModes": ["2560x1440@59.95Hz", "2560x1440@143.998Hz", "1920x1080@60.00Hz"],
+}
+
+EXTERNAL_4K = {
+    "id": 2, "name": "DP-1", "description": "Fake 4K external",
+    "make": "Fake", "model": "UHD", "serial": "0003",
+    "width": 3840, "height": 2160, "refreshRate": 59.997,
+    "x": 4480, "y": 0, "scale": 1.5, "transform": 0,
+    "dpmsStatus": True, "vrr": False, "disabled": False,
+    "mirrorOf": "none",
+    "availableModes": ["3840x2160@59.997Hz", "3840x2160@30.00Hz", "2560x1440@59.95Hz", "1920x1080@60.00Hz"],
+}
+
+MONITOR_SETS = {
+    "laptop": [LAPTOP],
+    "dual": [LAPTOP, EXTERNAL],
+    "triple": [LAPTOP, EXTERNAL, EXTERNAL_4K],
+}
+
+MONITORS = MONITOR_SETS["dual"]
+
+
+def load_monitor_set(name: str) -> list:
+    """A MONITOR_SETS name, or a JSON file in `hyprctl monitors all -j` format"""
+    if name in MONITOR_SETS:
+        return MONITOR_SETS[name]
+    with open(name) as f:
+        return json.load(f)
+
+
+def parse_failure(spec: str) -> tuple:
+    """PREFIX:RATE:KIND (e.g. "j/monitors:0.1:drop") -> (prefix, rate, kind)"""
+    prefix, rate, kind = spec.rsplit(":", 2)
+    if kind not in FAILURE_KINDS:
+        raise ValueError(f"unknown failure kind {kind!r} (expected one of {', '.join(FAILURE_KINDS)})")
+    return prefix, float(rate), kind
+
+
+def as_reported(monitor: dict) -> dict:
+    """A monitor as `monitors -j` shows it: availableModes rounded to 2 decimals"""
+    modes = []
+    for entry in monitor.get("availableModes", []):
+        size, _, rate = entry.partition("@")
+        modes.append(f"{size}@{float(rate.rstrip('Hz')):.2f}Hz")
+    return dict(monitor, availableModes=modes)
+
+
+def advertised_mode(monitor: dict, width: int, height: int, refresh: Optional[float]) -> tuple:
+    """
+    The (width, height, refresh) a rule gets: the advertised mode of that
+    size and refresh rate (to the mHz; the fastest if no rate was
+    given), else the preferred mode - so "@144" for a 143.998Hz mode
+    lands on the preferred one. Outputs without a mode list take the
+    rule as given.
+    """
+    modes = []
+    for entry in monitor.get("availableModes", []):
+        size, _, rate = entry.partition("@")
+        w, h = size.split("x")
+        modes.append((int(w), int(h), float(rate.rstrip("Hz"))))
+    if not modes:
+        return width, height, monitor["refreshRate"] if refresh is None else refresh
+    sized = [m for m in modes if m[:2] == (width, height)]
+    if refresh is None and sized:
+        return max(sized, key=lambda m: m[2])
+    close = [m for m in sized if refresh is not None and abs(m[2] - refresh) < 0.0005]
+    if close:
+        return min(close, key=lambda m: abs(m[2] - refresh))
+    return modes[0]
+
+
+class FakeHyprland:
+    """Monitor state plus the request-socket command handling"""
+
+    def __init__(
+        self,
+        monitors: list = MONITORS,
+        settle_ms: float = 0.0,
+        latency_ms: float = 0.0,
+        failures: tuple = (),
+        seed: int = 0,
+        sysfs: Optional[str] = None,
+    ):
+        self.configured = copy.deepcopy(monitors)  # what a reload restores
+        self.monitors = copy.deepcopy(monitors)
+        self.settle = settle_ms / 1000.0
+        self.latency = latency_ms / 1000.0
+        self.failures = list(failures)  # (command prefix, rate, kind)
+        self.random = random.Random(seed)
+        self.pending = []  # (apply_at, change) not yet visible to queries
+        self.unplugged = set()  # configured outputs currently disconnected
+        self.unknown = set()  # connected outputs whose sysfs status reads "unknown"
+        self.rejecting = set()  # outputs that ignore the mode in monitor rules
+        self.toggle = None  # Omarchy-style toggle file: while it exists, reloads leave the laptop off
+        self.trailing = False  # end batch replies with a separator and an empty reply
+        self.events = []  # socket2 lines not yet sent to subscribers
+        self.sysfs = sysfs  # fake /sys/class/drm, or None
+        self.workspaces = [
+            {"id": index * 2 + n, "name": str(index * 2 + n), "monitor": monitor["name"], "windows": 1}
+            for index, monitor in enumerate(self.monitors)
+            for n in (1, 2)
+        ]
+        self.write_sysfs()
+
+    def write_sysfs(self) -> None:
+        """Connector status of every configured output, like /sys/class/drm/card*-*/status"""
+        if self.sysfs is None:
+            return
+        for monitor in self.configured:
+            connector = os.path.join(self.sysfs, f"card0-{monitor['name']}")
+            os.makedirs(connector, exist_ok=True)
+            with open(os.path.join(connector, "status"), "w") as f:
+                if monitor["name"] in self.unplugged:
+                    f.write("disconnected\n")
+                else:
+                    f.write("unknown\n" if monitor["name"] in self.unknown else "connected\n")
+
+    def _schedule(self, change) -> None:
+        self.pending.append((time.monotonic() + self.settle, change))
+
+    def next_due(self) -> Optional[float]:
+        """Seconds until the next pending change lands, or None"""
+        if not self.pending:
+            return None
+        return max(0.0, min(at for at, _ in self.pending) - time.monotonic())
+
+    def _enabled(self) -> dict:
+        return {m["name"]: m for m in self.monitors if not m["disabled"]}
+
+    def _emit(self, event: str, data: str = "") -> None:
+        self.events.append(f"{event}>>{data}\n")
+
+    def _change(self, change) -> None:
+        """Run a state change and announce outputs it enabled or disabled"""
+        before = self._enabled()
+        change()
+        after = self._enabled()
+        for name, monitor in before.items():
+            if name not in after:
+                self._emit("monitorremoved", name)
+                self._emit("monitorremovedv2", f"{monitor['id']},{name},{monitor['description']}")
+        for name, monitor in after.items():
+            if name not in before:
+                self._emit("monitoradded", name)
+                self._emit("monitoraddedv2", f"{monitor['id']},{name},{monitor['description']}")
+        self._rehome_workspaces()
+
+    def _showing(self) -> list:
+        """Outputs that can hold workspaces: enabled and not mirroring"""
+        return [m["name"] for m in self.monitors if not m["disabled"] and m["mirrorOf"] == "none"]
+
+    def _rehome_workspaces(self) -> None:
+        """What Hyprland does on its own after outputs come and go"""
+        showing = self._showing()
+        if not showing:
+            return
+        for workspace in list(self.workspaces):
+            if workspace["monitor"] in showing:
+                continue
+            if not workspace["windows"]:
+                # Empty workspaces are destroyed rather than moved
+                self.workspaces.remove(workspace)
+                self._emit("destroyworkspace", workspace["name"])
+                continue
+            workspace["monitor"] = showing[0]
+            self._emit("moveworkspace", f"{workspace['name']},{showing[0]}")
+        for name in showing:
+            if not any(w["monitor"] == name for w in self.workspaces):
+                new_id = max((w["id"] for w in self.workspaces), default=0) + 1
+                self.workspaces.append({"id": new_id, "name": str(new_id), "monitor": name, "windows": 0})
+                self._emit("createworkspace", str(new_id))
+
+    def apply_due(self) -> None:
+        now = time.monotonic()
+        due = [change for at, change in self.pending if at <= now]
+        self.pending = [(at, change) for at, change in self.pending if at > now]
+        for change in due:
+            self._change(change)
+
+    def _monitor(self, name: str) -> dict:
+        return next((m for m in self.monitors if m["name"] == name), None)
+
+    def _keyword_monitor(self, rule: str) -> str:
+        fields = [f.strip() for f in rule.split(",")]
+        monitor = self._monitor(fields[0])
+        if monitor is None:
+            return "ok"  # Hyprland stores rules for absent outputs
+
+        if len(fields) >= 2 and fields[1] == "disable":
+            def change():
+                monitor["disabled"] = True
+                monitor["mirrorOf"] = "none"
+        elif len(fields) >= 4:
+            def change():
+                mode = fields[1]
+                if "x" in mode and monitor["name"] not in self.rejecting:
+                    size, _, refresh = mode.partition("@")
+                    width, height = size.split("x")
+                    monitor["width"], monitor["height"], monitor["refreshRate"] = advertised_mode(
+                        monitor, int(width), int(height), float(refresh.rstrip("Hz")) if refresh else None
+                    )
+                if "x" in fields[2]:
+                    x, y = fields[2].split("x")
+                    monitor["x"], monitor["y"] = int(x), int(y)
+                monitor["scale"] = float(fields[3])
+                monitor["disabled"] = False
+                extra = dict(zip(fields[4::2], fields[5::2]))
+                # Like Hyprland, report the mirror source by its monitor id
+                source = self._monitor(extra["mirror"]) if "mirror" in extra else None
+                monitor["mirrorOf"] = str(source["id"]) if source else "none"
+                # Without a vrr argument the rule falls back to misc:vrr (off here)
+                monitor["vrr"] = extra.get("vrr", "0") != "0"
+        else:
+            return f"invalid monitor rule: {rule}"
+
+        self._schedule(change)
+        return "ok"
+
+    def _reload(self) -> str:
+        def change():
+            self.monitors = [
+                m for m in copy.deepcopy(self.configured) if m["name"] not in self.unplugged
+            ]
+            if self.toggle and os.path.exists(self.toggle):
+                for monitor in self.monitors:
+                    if monitor["name"].startswith("eDP"):
+                        monitor["disabled"] = True
+            self._emit("configreloaded")
+        self._schedule(change)
+        return "ok"
+
+    def _dpms(self, args: list) -> str:
+        """dispatch dpms on|off|toggle [NAME]"""
+        if not args or args[0] not in ("on", "off", "toggle"):
+            return "invalid dpms argument"
+        for monitor in self.monitors:
+            if len(args) == 1 or monitor["name"] == args[1]:
+                on = not monitor["dpmsStatus"] if args[0] == "toggle" else args[0] == "on"
+                monitor["dpmsStatus"] = on
+        return "ok"
+
+    def _move_workspace(self, args: list) -> str:
+        """dispatch moveworkspacetomonitor WORKSPACE MONITOR"""
+        if len(args) != 2:
+            return "invalid moveworkspacetomonitor arguments"
+        ref, name = args
+        workspace = next(
+            (w for w in self.workspaces if ref in (str(w["id"]), f"name:{w['name']}")), None
+        )
+        if workspace is None:
+            return "Invalid workspace"
+        if name not in self._showing():
+            return "Invalid monitor"
+        workspace["monitor"] = name
+        self._emit("moveworkspace", f"{workspace['name']},{name}")
+        return "ok"
+
+    def control(self, command: str) -> str:
+        """
+        Benchmark-only `fakectl` requests:
+
+            unplug NAME | plug NAME          disconnect / reconnect an output
+            unknown NAME                     NAME's connector status reads "unknown" while connected
+            reject NAME | accept NAME        ignore / honour modes in NAME's rules
+            toggle PATH                      reloads keep the laptop off while PATH exists
+            trailing on|off                  end batch replies with a trailing separator
+            latency MS                       per-request delay
+            settle MS                        delay before changes are visible
+            fail PREFIX:RATE:KIND            inject failures (KIND: error|drop|hang)
+            clear-failures
+        """
+        args = command.split()
+        if len(args) == 2 and args[0] == "unplug":
+            name = args[1]
+            self.unplugged.add(name)
+            self.write_sysfs()
+
+            def change():
+                self.monitors = [m for m in self.monitors if m["name"] != name]
+            self._change(change)
+            return "ok"
+        if len(args) == 2 and args[0] == "plug":
+            name = args[1]
+            self.unplugged.discard(name)
+            self.write_sysfs()
+            if self._monitor(name) is None:
+                monitor = next((m for m in self.configured if m["name"] == name), None)
+                if monitor is None:
+                    return f"unknown output: {name}"
+                self._change(lambda: self.monitors.append(copy.deepcopy(monitor)))
+            return "ok"
+        if len(args) == 2 and args[0] == "unknown":
+            self.unknown.add(args[1])
+            self.write_sysfs()
+            return "ok"
+        if len(args) == 2 and args[0] == "reject":
+            self.rejecting.add(args[1])
+            return "ok"
+        if len(args) == 2 and args[0] == "accept":
+            self.rejecting.discard(args[1])
+            return "ok"
+        if len(args) == 2 and args[0] == "toggle":
+            self.toggle = args[1]
+            return "ok"
+        if len(args) == 2 and args[0] == "trailing":
+            self.trailing = args[1] == "on"
+            return "ok"
+        if len(args) == 2 and args[0] == "latency":
+            self.latency = float(args[1]) / 1000.0
+            return "ok"
+        if len(args) == 2 and args[0] == "settle":
+            self.settle = float(args[1]) / 1000.0
+            return "ok"
+        if args and args[0] == "fail":
+            self.failures.append(parse_failure(command.split(None, 1)[1]))
+            return "ok"
+        if args == ["clear-failures"]:
+            self.failures = []
+            return "ok"
+        return f"unknown fakectl command: {command}"
+
+    def failure_for(self, command: str) -> Optional[str]:
+        """The injected failure kind for this request, if any"""
+        for prefix, rate, kind in self.failures:
+            if command.startswith(prefix) and self.random.random() < rate:
+                return kind
+        return None
+
+    def reply_for(self, command: str) -> str:
+        """Answer one request-socket command the way Hyprland would"""
+        self.apply_due()
+
+        if command.startswith("fakectl "):
+            return self.control(command[len("fakectl "):])
+
+        if command.startswith("[[BATCH]]"):
+            commands = [c.strip() for c in command[len("[[BATCH]]"):].split(";") if c.strip()]
+            replies = [
+                "error: injected failure" if self.failure_for(c) == "error" else self.reply_for(c)
+                for c in commands
+            ]
+            return "\n\n\n".join(replies + [""] if self.trailing else replies)
+
+        flags, _, command = command.rpartition("/")
+        if command.startswith("monitors"):
+            shown = self.monitors if command == "monitors all" else [m for m in self.monitors if not m["disabled"]]
+            if "j" in flags:
+                return json.dumps([as_reported(m) for m in shown])
+            return "\n".join(f"Monitor {m['name']} (ID {m['id']})" for m in shown)
+        if command == "workspaces":
+            if "j" in flags:
+                return json.dumps(self.workspaces)
+            return "\n".join(f"workspace ID {w['id']} ({w['name']}) on monitor {w['monitor']}" for w in self.workspaces)
+        if command.startswith("keyword monitor "):
+            return self._keyword_monitor(command[len("keyword monitor "):])
+        if command.startswith("keyword "):
+            return "ok"
+        if command == "reload":
+            return self._reload()
+        if command.startswith("dispatch dpms "):
+            return self._dpms(command.split()[2:])
+        if command.startswith("dispatch moveworkspacetomonitor "):
+            return self._move_workspace(command.split()[2:])
+        return "unknown request"
+
+
+def _listen(path: str) -> socket.socket:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+    return server
+
+
+def serve(runtime_dir: str, signature: str = SIGNATURE, fake: FakeHyprland = None) -> None:
+    """Serve the request and event sockets until the process is killed"""
+    fake = fake or FakeHyprland()
+    instance_dir = os.path.join(runtime_dir, "hypr", signature)
+    os.makedirs(instance_dir, exist_ok=True)
+    # socket2 first: spawn() waits for .socket.sock, so both exist by then
+    events_server = _listen(os.path.join(instance_dir, ".socket2.sock"))
+    request_server = _listen(os.path.join(instance_dir, ".socket.sock"))
+
+    subscribers = []
+    hung = []  # (release_at, conn) held open by "hang" failures
+
+    while True:
+        timeouts = [at - time.monotonic() for at, _ in hung]
+        due = fake.next_due()
+        if due is not None:
+            timeouts.append(due)
+        timeout = max(0.0, min(timeouts)) if timeouts else None
+        readable, _, _ = select.select([request_server, events_server], [], [], timeout)
+
+        if events_server in readable:
+            conn, _ = events_server.accept()
+            subscribers.append(conn)
+
+        if request_server in readable:
+            conn, _ = request_server.accept()
+            command = conn.recv(65536).decode("utf-8")
+            failure = None if command.startswith("fakectl ") else fake.failure_for(command)
+            if failure == "hang":
+                hung.append((time.monotonic() + HANG_SECONDS, conn))
+            elif failure == "drop":
+                conn.close()
+            else:
+                if fake.latency and not command.startswith("fakectl "):
+                    time.sleep(fake.latency)
+                reply = "error: injected failure" if failure == "error" else fake.reply_for(command)
+                with conn:
+                    try:
+                        conn.sendall(reply.encode("utf-8"))
+                    except OSError:
+                        pass
+
+        fake.apply_due()
+        if fake.events:
+            payload = "".join(fake.events).encode("utf-8")
+            fake.events = []
+            for conn in list(subscribers):
+                try:
+                    conn.sendall(payload)
+                except OSError:
+                    subscribers.remove(conn)
+                    conn.close()
+
+        now = time.monotonic()
+        for entry in [entry for entry in hung if entry[0] <= now]:
+            hung.remove(entry)
+            entry[1].close()
+
+
+def spawn(
+    settle_ms: float = 0.0,
+    latency_ms: float = 0.0,
+    monitors: str = "dual",
+    failures: tuple = (),
+) -> tuple:
+    """
+    Start a fake instance in its own process under a fresh runtime dir
+    and point this process's IPC clients (and a daemon started from it,
+    including its DRM source) at it. Profiles saved by mode switches go
+    under the runtime dir too, not the real state dir.
+    Returns (process, runtime_dir).
+    """
+    runtime_dir = tempfile.mkdtemp(prefix="hyprmode-bench-")
+    argv = [
+        sys.executable, os.path.abspath(__file__), runtime_dir,
+        "--settle-ms", str(settle_ms),
+        "--latency-ms", str(latency_ms),
+        "--monitors", monitors,
+    ]
+    for prefix, rate, kind in failures:
+        argv += ["--fail", f"{prefix}:{rate}:{kind}"]
+    process = subprocess.Popen(argv)
+    socket_path = os.path.join(runtime_dir, "hypr", SIGNATURE, ".socket.sock")
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+
+    os.environ["XDG_RUNTIME_DIR"] = runtime_dir
+    os.environ["HYPRLAND_INSTANCE_SIGNATURE"] = SIGNATURE
+    os.environ["XDG_STATE_HOME"] = os.path.join(runtime_dir, "state")
+    os.environ["HYPRMODE_DRM_SYSFS"] = os.path.join(runtime_dir, "drm")
+    return process, runtime_dir
+
+
+def control(command: str, runtime_dir: Optional[str] = None, signature: str = SIGNATURE) -> str:
+    """Send a `fakectl` request (see FakeHyprland.control) to a spawned fake"""
+    runtime_dir = runtime_dir or os.environ["XDG_RUNTIME_DIR"]
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(os.path.join(runtime_dir, "hypr", signature, ".socket.sock"))
+        sock.sendall(f"fakectl {command}".encode("utf-8"))
+        reply = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    reply = reply.decode("utf-8")
+    if reply != "ok":
+        raise RuntimeError(f"fakectl {command}: {reply}")
+    return reply
+
+
+def write_stub_bin(directory: str, monitors: list = MONITORS) -> str:
+    """
+    Write `hyprctl` and `notify-send` stubs into directory and return it.
+    hyprctl prints canned replies; it costs one fork+exec of /bin/sh and
+    no socket round trip, so timings taken with it are a lower bound for
+    the real hyprctl. notify-send does nothing, which keeps desktop
+    notifications out of benchmarks that run hyprmode or the daemon.
+    """
+    write_fake_hyprctl(directory, monitors)
+    path = os.path.join(directory, "notify-send")
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\nexit 0\n")
+    os.chmod(path, 0o755)
+    return directory
+
+
+def write_fake_hyprctl(directory: str, monitors: list = MONITORS) -> str:
+    """Write the `hyprctl` stub described in write_stub_bin() and return its path"""
+    path = os.path.join(directory, "hyprctl")
+    all_json = json.dumps(monitors).replace("'", "'\\''")
+    active_json = json.dumps([m for m in monitors if not m["disabled"]]).replace("'", "'\\''")
+    with open(path, "w") as f:
+        f.write(
+            "#!/bin/sh\n"
+            'case "$*" in\n'
+            f"  'monitors all -j') printf '%s' '{all_json}' ;;\n"
+            f"  'monitors -j') printf '%s' '{active_json}' ;;\n"
+            "  *) echo ok ;;\n"
+            "esac\n"
+        )
+    os.chmod(path, 0o755)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Hyprland request and event sockets")
+    parser.add_argument("runtime_dir")
+    parser.add_argument("--signature", default=SIGNATURE)
+    parser.add_argument("--settle-ms", type=float, default=0.0,
+                        help="delay before monitor changes become visible")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="delay before every reply")
+    parser.add_argument("--monitors", default="dual",
+                        help=f"monitor set ({', '.join(MONITOR_SETS)}) or a JSON file")
+    parser.add_argument("--fail", action="append", default=[], metavar="PREFIX:RATE:KIND",
+                        help="inject failures into matching requests (KIND: error, drop, hang)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    serve(args.runtime_dir, args.signature, FakeHyprland(
+        monitors=load_monitor_set(args.monitors),
+        settle_ms=args.settle_ms,
+        latency_ms=args.latency_ms,
+        failures=tuple(parse_failure(spec) for spec in args.fail),
+        seed=args.seed,
+        sysfs=os.path.join(args.runtime_dir, "drm"),
+    ))
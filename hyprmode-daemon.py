@@ -6,119 +6,858 @@ hyprmode-daemon - Emergency laptop screen recovery
 Monitors for external display disconnect and re-enables laptop screen
 if user would otherwise be stuck with a black screen.
 
-Recovery uses `hyprctl reload`: `hyprctl keyword monitor <name>,<settings>`
-does NOT re-enable a connector that is currently disabled (Hyprland won't
-re-modeset a disabled output that way), but a config reload re-lights it.
+Everything runs as tasks on one asyncio loop, each under its own
+deadline (see Daemon), so a hung compositor call, a slow notify-send or
+a running recovery never stops detection.
+
+Hotplug is detected from Hyprland's socket2 event stream
+(monitoradded/monitorremoved); the monitor list is only queried when an
+event arrives, with a slow poll kept as a safety net. Every check also
+publishes a state snapshot ($XDG_RUNTIME_DIR/hyprmode/state.json) so
+hyprmode can start without querying the compositor.
+
+The kernel's view of the DRM connectors (/sys/class/drm/card*-*/status,
+with netlink uevents as the wake-up) is a second hotplug source that
+does not depend on the compositor answering. Outputs the kernel reports
+disconnected never count as lit, and when every output that was lit is
+gone according to the kernel, recovery starts without the debounce.
+
+With HYPRMODE_LID=1 the daemon also follows the lid switch (evdev
+SW_LID): closing the lid while an external display is connected switches
+to External Only, opening it puts the previous layout back. Off by
+default because Omarchy and the installer's lid-switch.conf bindings
+already handle the lid, and two handlers would race.
+
+The daemon also answers `hyprmode` on a control socket
+($XDG_RUNTIME_DIR/hyprmode/control.sock), one request line per
+connection:
+
+    status [json]                 `hyprmode status [--json]` output
+    plan MODE [right|left|above]  `hyprmode MODE --dry-run` output
+    apply MODE [right|left|above] switch to MODE
+    revert                        put back the layout the last apply replaced
+
+The reply is "ok" or "error" on the first line followed by the text
+hyprmode prints, so `hyprmode MODE` costs one round trip to a process
+that already has everything loaded.
+
+Recovery escalates from cheap to expensive and checks after each step
+whether a display is lit again: DPMS on, a targeted enable, `hyprctl
+reload`, and a reload after clearing Omarchy's internal-display toggle.
+`hyprctl keyword monitor <name>,<settings>` does NOT re-enable a
+connector that is currently disabled (Hyprland won't re-modeset a
+disabled output that way), so a disabled panel goes straight to the
+reload, which re-lights it.
 """
 
+import asyncio
 import subprocess
 import time
 import sys
-import json
 import os
+import glob
+import signal
+import socket
+import struct
+import threading
+from collections import deque
+from typing import Optional
 
+import hyprmode_core
+import hyprmode_ipc
+import hyprmode_layout
+import hyprmode_profiles
+
+
+# Hyprland socket2 events that mean the set of outputs changed
+HOTPLUG_EVENTS = {"monitoradded", "monitoraddedv2", "monitorremoved", "monitorremovedv2"}
+# Events after which the published state snapshot must be refreshed
+STATE_EVENTS = HOTPLUG_EVENTS | {"configreloaded"}
+
+POLL_INTERVAL = 1  # seconds - while debouncing, or with no event socket
+SAFETY_POLL_INTERVAL = 10  # seconds - fallback check while events are flowing
+DEBOUNCE_THRESHOLD = 3  # consecutive 0-monitor readings before a recovery
+COOLDOWN_SECONDS = 10  # between recoveries
+
+# Per-task deadlines, in seconds. Every task runs under one, so a hung
+# compositor or notification daemon costs that task, never detection.
+QUERY_DEADLINE = 1  # one monitor query; a miss only counts as dark if the kernel agrees
+RELOAD_DEADLINE = 5  # one config reload (re-parses the whole config)
+NOTIFY_DEADLINE = 2  # notify-send
+SWITCH_DEADLINE = 15  # profile or lid switch (reload plus settle waits)
+METRICS_DEADLINE = 1  # writing one metrics dump
+CONTROL_READ_DEADLINE = 1  # reading a control request line
+
+TRACE_CAPACITY = 2000  # per-tick trace lines kept in memory (~30 min of 1s ticks)
+RATE_LIMIT_SECONDS = 60  # repeats of the same logged condition are held back this long
+
+# struct input_event (64-bit): struct timeval, __u16 type, __u16 code, __s32 value
+INPUT_EVENT = struct.Struct("llHHi")
+EV_SW = 0x05
+SW_LID = 0x00
+EVIOCGSW = (2 << 30) | (8 << 16) | (ord("E") << 8) | 0x1B  # _IOR('E', 0x1b, 8 bytes)
+
+OMARCHY_TOGGLE = os.path.expanduser("~/.local/state/omarchy/toggles/hypr/internal-monitor-disable.conf")
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1  # multicast group of the kernel's own uevents
+
+# Histogram bucket upper bounds, in seconds
+IPC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+RECOVERY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name -> (type, help); render() emits metrics in this order
+METRICS = {
+    "hyprmode_daemon_start_time_seconds": ("gauge", "Unix time the daemon started"),
+    "hyprmode_monitors": ("gauge", "Enabled monitors at the last check"),
+    "hyprmode_ipc_request_seconds": ("histogram", "Hyprland request socket round trip"),
+    "hyprmode_ipc_errors_total": ("counter", "Hyprland requests that failed or timed out"),
+    "hyprmode_recoveries_total": ("counter", "Emergency recoveries triggered"),
+    "hyprmode_recoveries_suppressed_total": ("counter", "Recoveries skipped because of the cooldown"),
+    "hyprmode_detection_to_recovery_seconds": (
+        "histogram", "First zero-monitor reading until monitors were back after a recovery"
+    ),
+    "hyprmode_recovery_tiers_total": ("counter", "Recovery tiers tried, by whether they brought a display back"),
+    "hyprmode_time_to_pixels_seconds": (
+        "histogram", "First zero-monitor reading until a recovery tier had a display lit again"
+    ),
+    "hyprmode_profiles_applied_total": ("counter", "Saved profiles applied after a display set change"),
+    "hyprmode_profile_apply_seconds": ("histogram", "Time to apply a saved profile"),
+    "hyprmode_lid_switch_seconds": ("histogram", "Lid event until the mode switch was applied"),
+    "hyprmode_drm_mismatches_total": (
+        "counter", "Checks where the compositor showed outputs the kernel reports disconnected"
+    ),
+    "hyprmode_errors_total": ("counter", "Errors caught by the daemon"),
+    "hyprmode_deadline_exceeded_total": ("counter", "Daemon tasks cancelled at their deadline"),
+    "hyprmode_control_requests_total": ("counter", "Requests on the control socket"),
+    "hyprmode_control_request_seconds": ("histogram", "Control request until the reply was sent"),
+}
+
+
+class DaemonLog:
+    """Journal output for state changes, in-memory ring buffer for the trace.
+
+    event() writes to stdout (journald) and is meant for transitions,
+    recoveries and errors; passing `key` rate-limits repeats of the same
+    condition. trace() only records into a fixed-size ring buffer, which
+    dump() writes out on SIGUSR1 or after an emergency recovery.
+    """
+
+    def __init__(self, capacity: int = TRACE_CAPACITY):
+        self.ring = deque(maxlen=capacity)
+        self.last_logged = {}  # key -> time of last journal write
+        self.suppressed = {}  # key -> repeats held back since then
+
+    @staticmethod
+    def format(message: str, fields: dict) -> str:
+        if not fields:
+            return message
+        return message + " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+    def trace(self, message: str, **fields) -> None:
+        stamp = time.strftime("%H:%M:%S") + f".{int(time.time() * 1000) % 1000:03d}"
+        self.ring.append(f"{stamp} {self.format(message, fields)}")
+
+    def event(self, message: str, key: Optional[str] = None, **fields) -> None:
+        self.trace(message, **fields)
+        if key is not None:
+            now = time.monotonic()
+            if now - self.last_logged.get(key, -RATE_LIMIT_SECONDS) < RATE_LIMIT_SECONDS:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return
+            self.last_logged[key] = now
+            repeats = self.suppressed.pop(key, 0)
+            if repeats:
+                fields["repeats_suppressed"] = repeats
+        print(self.format(message, fields))
+
+    def dump(self, reason: str) -> None:
+        print(f"--- trace dump ({reason}): {len(self.ring)} lines ---")
+        for line in list(self.ring):
+            print(line)
+        print("--- end of trace dump ---")
+
+
+log = DaemonLog()
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum and count, Prometheus style"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class DaemonMetrics:
+    """Counters, gauges and histograms served on the metrics socket.
+
+    Samples are keyed by (metric name, sorted label pairs). The event
+    loop and the worker threads running mode switches both update them,
+    so every access goes through a lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.set("hyprmode_daemon_start_time_seconds", time.time())
+        for name in (
+            "hyprmode_recoveries_total",
+            "hyprmode_recoveries_suppressed_total",
+            "hyprmode_profiles_applied_total",
+        ):
+            self.inc(name, 0)
+
+    @staticmethod
+    def key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = self.key(name, labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.samples[self.key(name, labels)] = value
+
+    def observe(self, name: str, value: float, buckets: tuple, **labels) -> None:
+        key = self.key(name, labels)
+        with self.lock:
+            if key not in self.samples:
+                self.samples[key] = Histogram(buckets)
+            self.samples[key].observe(value)
+
+    @staticmethod
+    def format_labels(labels: tuple) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+    def render(self) -> str:
+        """Prometheus text exposition format (also valid as a .prom textfile)"""
+        lines = []
+        with self.lock:
+            samples = sorted(self.samples.items(), key=lambda item: item[0])
+            for name, (kind, help_text) in METRICS.items():
+                matching = [(labels, value) for (sample, labels), value in samples if sample == name]
+                if not matching:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in matching:
+                    if not isinstance(value, Histogram):
+                        lines.append(f"{name}{self.format_labels(labels)} {value}")
+                        continue
+                    for bound, count in zip(value.buckets, value.counts):
+                        le = labels + (("le", f"{bound:g}"),)
+                        lines.append(f"{name}_bucket{self.format_labels(le)} {count}")
+                    le = labels + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{self.format_labels(le)} {value.count}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {value.sum:.6f}")
+                    lines.append(f"{name}_count{self.format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = DaemonMetrics()
+
+
+def observe_request(command: str, seconds: float, error: Optional[Exception]) -> None:
+    """hyprmode_ipc.request_observer: IPC latency per command verb"""
+    verb = command.rpartition("/")[2] if not command.startswith("[[BATCH]]") else "batch"
+    verb = verb.split(" ", 1)[0]
+    metrics.observe("hyprmode_ipc_request_seconds", seconds, IPC_BUCKETS, command=verb)
+    if error is not None:
+        metrics.inc("hyprmode_ipc_errors_total", command=verb)
+
+
+def metrics_socket_path():
+    return hyprmode_core.state_dir() / "metrics.sock"
+
+
+async def serve_metrics() -> bool:
+    """Answer every connection to the metrics socket with the current
+    exposition. Returns False if the socket could not be created."""
+    path = metrics_socket_path()
+
+    async def handle(reader, writer) -> None:
+        try:
+            writer.write(metrics.render().encode("utf-8"))
+            await asyncio.wait_for(writer.drain(), METRICS_DEADLINE)
+        except (OSError, asyncio.TimeoutError) as e:
+            log.event("ERROR serving metrics", key="metrics", error=e)
+        finally:
+            writer.close()
 
-def send_notification(message: str, urgent: bool = False) -> None:
-    """Send desktop notification"""
     try:
-        urgency = "critical" if urgent else "normal"
-        subprocess.run(
-            ["notify-send", "-u", urgency, "HyprMode", message],
-            timeout=2
-        )
-    except Exception:
-        pass  # Notifications are optional
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        await asyncio.start_unix_server(handle, str(path))
+        os.chmod(path, 0o600)
+    except OSError as e:
+        log.event("Metrics socket unavailable", path=path, error=e)
+        return False
 
+    log.event("Serving metrics", path=path)
+    return True
 
-def get_monitor_count() -> tuple:
-    """Get count of enabled monitors and check if laptop exists"""
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_tasks = set()  # running background tasks (the loop only keeps weak references)
+
+
+def background(coro, name: str, deadline: float) -> asyncio.Task:
+    """
+    Run coro as a task on the daemon's loop under a deadline. Failures
+    and missed deadlines are logged and counted, never raised. A switch
+    running in a thread cannot be stopped at the deadline; switch_thread()
+    makes the task wait for it, so `switching` is held until it is over.
+    """
+    async def guarded():
+        try:
+            return await asyncio.wait_for(coro, deadline)
+        except asyncio.TimeoutError:
+            log.event(f"✗ {name} missed its {deadline}s deadline", key=f"deadline:{name}")
+            metrics.inc("hyprmode_deadline_exceeded_total", task=name)
+        except Exception as e:
+            log.event(f"ERROR in {name}", key=name, error=e)
+            metrics.inc("hyprmode_errors_total", where=name)
+
+    task = asyncio.get_running_loop().create_task(guarded())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def switch_thread(func, *args):
+    """
+    asyncio.to_thread() for mode switches, which run under the daemon's
+    `switching` lock. A deadline that cancels the caller cannot stop the
+    thread, which would go on sending batches after the lock is released.
+    So the cancellation waits until the thread has returned, then goes on.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
     try:
-        result = subprocess.run(
-            ["hyprctl", "monitors", "-j"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait({future})
+            except asyncio.CancelledError:
+                pass
+        raise
+
+
+async def notify(message: str, urgent: bool) -> None:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "notify-send", "-u", "critical" if urgent else "normal", "HyprMode", message,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
         )
-        
-        monitors = json.loads(result.stdout)
+    except OSError:
+        return  # Notifications are optional
+    try:
+        await proc.wait()
+    except asyncio.CancelledError:
+        proc.kill()
+        raise
+
+
+def send_notification(message: str, urgent: bool = False) -> None:
+    """Send desktop notification from a background task. Safe to call
+    from worker threads; the caller never waits for notify-send."""
+    if _loop is not None:
+        _loop.call_soon_threadsafe(background, notify(message, urgent), "notify", NOTIFY_DEADLINE)
 
-        # Count monitors that are configured (non-zero resolution) and not explicitly disabled.
-        # DPMS only represents power state, so we ignore it to keep sleeping panels in the tally.
-        enabled_monitors = [
-            m for m in monitors
-            if m.get('width', 0) > 0
-            and m.get('height', 0) > 0
-            and m.get('disabled', False) is not True
-        ]
 
+async def query_monitors() -> Optional[list]:
+    """Raw monitor list including disabled outputs, or None on failure"""
+    try:
+        try:
+            return await hyprmode_ipc.request_json_async("monitors all", timeout=QUERY_DEADLINE)
+        except hyprmode_ipc.HyprlandCommandError:
+            # Older Hyprland without "all"
+            return await hyprmode_ipc.request_json_async("monitors", timeout=QUERY_DEADLINE)
+    except Exception as e:
+        log.event("ERROR in query_monitors()", key="query_monitors", error=e)
+        metrics.inc("hyprmode_errors_total", where="query_monitors")
+        return None
+
+
+def lit_outputs(monitors: list, disconnected: frozenset = frozenset()) -> list:
+    """
+    Names of the outputs that are configured (non-zero resolution), not
+    explicitly disabled, and not reported disconnected by the kernel.
+    DPMS only represents power state, so sleeping panels still count.
+    """
+    return [
+        m['name'] for m in monitors
+        if m.get('width', 0) > 0
+        and m.get('height', 0) > 0
+        and m.get('disabled', False) is not True
+        and m['name'] not in disconnected
+    ]
+
+
+def get_monitor_count(monitors: Optional[list], disconnected: frozenset = frozenset()) -> tuple:
+    """Get count of enabled monitors and check if laptop exists"""
+    if monitors is None:
+        return 0, False  # Query failed (already logged) - 0 monitors to be safe
+
+    try:
+        enabled_monitors = lit_outputs(monitors, disconnected)
         monitor_count = len(enabled_monitors)
 
         # Check if laptop monitor exists in the enabled list
         has_laptop = any(
-            'eDP' in m['name'] or 'LVDS' in m['name'] or 'DSI' in m['name']
-            for m in enabled_monitors
+            'eDP' in name or 'LVDS' in name or 'DSI' in name
+            for name in enabled_monitors
         )
         
         return monitor_count, has_laptop
     except Exception as e:
-        print(f"ERROR in get_monitor_count(): {e}")
         import traceback
-        traceback.print_exc()
+        log.event("ERROR in get_monitor_count()", key="get_monitor_count", error=e)
+        metrics.inc("hyprmode_errors_total", where="get_monitor_count")
+        log.trace(traceback.format_exc())
         return 0, False  # Return 0 monitors to be safe (prevents masking issues)
 
 
-def emergency_enable_laptop() -> None:
-    """Emergency: Re-enable displays via `hyprctl reload`.
+class DrmHotplug:
+    """DRM connector state straight from the kernel.
+
+    connectors() reads the connector status files under sysfs, which the
+    kernel updates on hotplug whether or not the compositor responds.
+    The uevent socket (netlink, kernel multicast group) turns readable on
+    every change, so a check can run at once; a test passes one end of a
+    socketpair instead and writes uevent-formatted datagrams into it.
+    """
+
+    def __init__(self, sysfs: str, sock: Optional[socket.socket]):
+        self.sysfs = sysfs
+        self.sock = sock
+        if sock is not None:
+            sock.setblocking(False)
+
+    def connectors(self) -> dict:
+        """
+        {connector name: connected}, e.g. {'eDP-1': True, 'HDMI-A-1': False}.
+        Only "disconnected" counts as unplugged: some DSI panels and
+        evdi/DisplayLink connectors always report "unknown".
+        """
+        result = {}
+        for path in glob.glob(os.path.join(self.sysfs, "card*-*", "status")):
+            # card1-HDMI-A-1 -> HDMI-A-1, the name Hyprland uses
+            name = os.path.basename(os.path.dirname(path)).split("-", 1)[1]
+            try:
+                with open(path) as f:
+                    result[name] = f.read().strip() != "disconnected"
+            except OSError:
+                continue
+        return result
+
+    def read(self) -> bool:
+        """Drain pending uevents; True if any came from the drm subsystem"""
+        changed = False
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return changed
+            if not data:
+                raise OSError("uevent socket closed")
+            # "ACTION@DEVPATH\0KEY=VALUE\0..."
+            if b"SUBSYSTEM=drm" in data.split(b"\0"):
+                changed = True
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
 
-    `hyprctl keyword monitor <name>,<settings>` is a no-op on a connector
-    that is currently disabled - it cannot bring a display back. A config
-    reload re-reads the monitor configuration and re-lights disabled
-    connectors, so it is the only reliable recovery path.
+def open_drm_hotplug() -> Optional[DrmHotplug]:
     """
+    The kernel hotplug source, unless HYPRMODE_DRM=0 or sysfs shows no
+    connectors. For tests, HYPRMODE_DRM_SYSFS replaces /sys/class/drm and
+    HYPRMODE_UEVENT_FD names an inherited socket that replaces netlink.
+    """
+    if os.environ.get("HYPRMODE_DRM") == "0":
+        return None
+    drm = DrmHotplug(os.environ.get("HYPRMODE_DRM_SYSFS") or "/sys/class/drm", None)
+    if not drm.connectors():
+        log.event("DRM hotplug source unavailable: no connectors", sysfs=drm.sysfs)
+        return None
+
     try:
-        send_notification("⚠️ No active displays - restoring via config reload", urgent=True)
+        fd = os.environ.get("HYPRMODE_UEVENT_FD")
+        if fd:
+            sock = socket.socket(fileno=int(fd))
+        else:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        drm = DrmHotplug(drm.sysfs, sock)
+    except (OSError, ValueError) as e:
+        # Still worth having: every check cross-checks sysfs
+        log.event("DRM uevents unavailable; reading connector status on each check", error=e)
+    return drm
 
-        # Clear Omarchy's internal-display disable toggle if present,
-        # otherwise the reload would re-apply "monitor=<name>,disable"
-        # and the panel would stay dark.
-        omarchy_toggle = os.path.expanduser(
-            "~/.local/state/omarchy/toggles/hypr/internal-monitor-disable.conf"
-        )
+
+def publish_state(monitors: Optional[list]) -> None:
+    """Refresh the state snapshot hyprmode reads for instant startup"""
+    hyprmode_core.update_snapshot(
+        monitors=monitors,
+        lid=hyprmode_core.get_lid_state(),
+        pid=os.getpid(),
+    )
+
+
+def apply_saved_profile(monitors: list, key: str) -> None:
+    """
+    A display set was connected: put its workspaces back on the outputs
+    they were recorded on, then switch to the mode remembered for it,
+    if any.
+    """
+    moved = hyprmode_core.restore_workspaces(monitors)
+    if moved:
+        log.event("Moved workspaces back", display_set=key, workspaces=len(moved))
+    
+    profile = hyprmode_profiles.load(key)
+    if profile is None:
+        log.event("Display set changed, no saved profile", display_set=key)
+        return
+
+    start = time.monotonic()
+    try:
+        plan = hyprmode_core.apply_profile(profile, monitors)
+    except Exception as e:
+        log.event("✗ Applying saved profile failed", display_set=key, error=e)
+        metrics.inc("hyprmode_errors_total", where="profile")
+        return
+    if plan is None:
+        log.event("Saved profile needs outputs that are missing", display_set=key, mode=profile.get('mode'))
+        return
+
+    elapsed = time.monotonic() - start
+    metrics.inc("hyprmode_profiles_applied_total")
+    metrics.observe("hyprmode_profile_apply_seconds", elapsed, IPC_BUCKETS)
+    log.event(
+        "Applied saved profile",
+        display_set=key,
+        mode=plan['mode'],
+        commands=len(plan['commands']),
+        reload=plan['reload'],
+        ms=f"{elapsed * 1000:.1f}",
+    )
+    send_notification(f"Restored {hyprmode_core.MODE_NAMES[plan['mode']]} for this display setup")
+
+
+def find_lid_device() -> Optional[str]:
+    """
+    evdev node of the input device with a lid switch, or None.
+    HYPRMODE_LID_DEVICE overrides the lookup (e.g. a FIFO fed with
+    input_event records by a test).
+    """
+    override = os.environ.get("HYPRMODE_LID_DEVICE")
+    if override:
+        return override
+    for caps in sorted(glob.glob("/sys/class/input/event*/device/capabilities/sw")):
         try:
-            os.remove(omarchy_toggle)
-            print("Cleared Omarchy internal-monitor-disable toggle")
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            print(f"Could not clear Omarchy toggle: {e}")
+            with open(caps) as f:
+                words = f.read().split()
+        except OSError:
+            continue
+        # Space-separated hex words, most significant first
+        if words and int(words[-1], 16) & (1 << SW_LID):
+            return "/dev/input/" + caps.split("/")[4]
+    return None
 
-        subprocess.run(
-            ["hyprctl", "reload"],
-            timeout=5,
-            check=False,
-            capture_output=True
-        )
 
-        print("✓ Emergency recovery executed (hyprctl reload)")
+class LidSwitch:
+    """Lid open/close events from an evdev device.
+
+    The fd is non-blocking and selectable, so the main loop can sleep on
+    it next to the Hyprland event socket and react as soon as the switch
+    flips. Reading /dev/input needs the `input` group.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def state(self) -> str:
+        """Current position: 'open', 'closed' or 'unknown'"""
+        try:
+            import fcntl
+
+            bits = bytearray(8)
+            fcntl.ioctl(self.fd, EVIOCGSW, bits)
+            return "closed" if bits[0] & (1 << SW_LID) else "open"
+        except OSError:
+            return hyprmode_core.get_lid_state()  # not an evdev node (test FIFO)
+
+    def read(self) -> Optional[str]:
+        """Drain pending events; the last lid position reported, or None"""
+        position = None
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, INPUT_EVENT.size * 64)
+            except BlockingIOError:
+                break
+            if not chunk:
+                raise OSError(f"{self.path}: end of file")
+            data += chunk
+        for offset in range(0, len(data) - INPUT_EVENT.size + 1, INPUT_EVENT.size):
+            _sec, _usec, kind, code, value = INPUT_EVENT.unpack_from(data, offset)
+            if kind == EV_SW and code == SW_LID:
+                position = "closed" if value else "open"
+        return position
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def open_lid_switch() -> Optional[LidSwitch]:
+    """The lid switch to follow, if HYPRMODE_LID=1 and a device is readable"""
+    if os.environ.get("HYPRMODE_LID") != "1":
+        return None
+    if os.path.isdir(os.path.expanduser("~/.local/share/omarchy")):
+        log.event("WARNING: Omarchy also handles the lid; HYPRMODE_LID=1 may race with it")
+    try:
+        with open(os.path.expanduser("~/.config/hypr/lid-switch.conf")) as f:
+            if any(line.lstrip().startswith("bindl") and "switch:" in line for line in f):
+                log.event("WARNING: lid-switch.conf bindings also handle the lid; remove them with HYPRMODE_LID=1")
+    except OSError:
+        pass
+
+    path = find_lid_device()
+    if path is None:
+        log.event("Lid handling unavailable: no input device reports a lid switch")
+        return None
+    try:
+        return LidSwitch(path)
+    except OSError as e:
+        log.event("Lid handling unavailable (is the user in the 'input' group?)", path=path, error=e)
+        return None
+
+
+def lid_closed(monitors: list) -> Optional[list]:
+    """
+    Lid closed: switch to External Only if the laptop panel is lit and an
+    external display is connected. Returns the layout to put back when
+    the lid opens, or None if nothing was changed.
+    """
+    parsed = hyprmode_core.parse_monitors(monitors)
+    laptop, externals = parsed['laptop'], parsed['externals']
+    if not laptop or laptop['disabled'] or not laptop['width'] or not externals:
+        return None
+
+    layout = hyprmode_core.layout_snapshot(parsed)
+    start = time.monotonic()
+    try:
+        plan = hyprmode_core.plan_mode("external", laptop, None, externals)
+        # Not a choice the user made, so it must not become the profile
+        hyprmode_core.execute_plan(plan, laptop, None, externals=externals, remember=False)
+    except Exception as e:
+        log.event("✗ Lid closed, switching to External Only failed", error=e)
+        metrics.inc("hyprmode_errors_total", where="lid")
+        return None
+    elapsed = time.monotonic() - start
+    metrics.observe("hyprmode_lid_switch_seconds", elapsed, IPC_BUCKETS, lid="closed")
+    log.event("Lid closed, switched to External Only", ms=f"{elapsed * 1000:.1f}")
+    return layout
+
 
+def lid_opened(monitors: list, layout: Optional[list]) -> None:
+    """Lid opened: put back the layout lid_closed() replaced, if the laptop is still off"""
+    parsed = hyprmode_core.parse_monitors(monitors)
+    laptop = parsed['laptop']
+    if layout is None or not laptop or (not laptop['disabled'] and laptop['width']):
+        return
+
+    start = time.monotonic()
+    try:
+        commands = hyprmode_core.restore_layout(layout, parsed)
     except Exception as e:
-        print(f"✗ Emergency recovery failed: {e}")
+        log.event("✗ Lid opened, restoring the layout failed", error=e)
+        metrics.inc("hyprmode_errors_total", where="lid")
+        return
+    elapsed = time.monotonic() - start
+    metrics.observe("hyprmode_lid_switch_seconds", elapsed, IPC_BUCKETS, lid="open")
+    log.event("Lid opened, restored previous layout", commands=len(commands), ms=f"{elapsed * 1000:.1f}")
+
+
+def showing_pixels(monitors: list, disconnected: frozenset = frozenset()) -> bool:
+    """True if a connected output is lit and not powered down by DPMS"""
+    lit = set(lit_outputs(monitors, disconnected))
+    return any(m['name'] in lit and m.get('dpmsStatus', True) is not False for m in monitors)
+
+
+async def wait_for_pixels(timeout: float, disconnected: frozenset) -> bool:
+    """Poll the monitors (hyprmode_ipc.backoff) until showing_pixels() or the timeout"""
+    monitors = await hyprmode_ipc.wait_for_monitors_async(
+        lambda data: showing_pixels(data, disconnected), timeout, query_timeout=QUERY_DEADLINE
+    )
+    return monitors is not None
+
+
+async def recovery_batch(commands: list, deadline: float) -> None:
+    """
+    Send a tier's commands as one batch. Each command Hyprland rejects
+    is logged; if it rejected all of them, HyprlandCommandError fails
+    the tier so the ladder escalates without waiting for pixels.
+    """
+    replies = await hyprmode_ipc.batch_async(commands, timeout=deadline, check=False)
+    failures = hyprmode_ipc.rejected(commands, replies)
+    for failure in failures:
+        log.event("Recovery command rejected", error=failure)
+    if "ok" not in replies:
+        raise hyprmode_ipc.HyprlandCommandError("; ".join(failures) or "empty batch reply")
+
+
+async def recover_dpms(monitors: list, disconnected: frozenset, deadline: float) -> bool:
+    """Tier 1: power up outputs that are lit but DPMS-off"""
+    lit = set(lit_outputs(monitors, disconnected))
+    targets = [m['name'] for m in monitors if m['name'] in lit and m.get('dpmsStatus') is False]
+    if not targets:
+        return False
+    await recovery_batch([f"dispatch dpms on {name}" for name in targets], deadline)
+    return True
+
+
+async def recover_enable(monitors: list, disconnected: frozenset, deadline: float) -> bool:
+    """
+    Tier 2: give a mode to connected outputs that are enabled but have
+    none. Disabled outputs are left to the reload tiers: `keyword
+    monitor` does not re-light a disabled connector.
+    """
+    targets = [
+        m['name'] for m in monitors
+        if m['name'] not in disconnected and m.get('disabled') is not True and not m.get('width')
+    ]
+    if not targets:
+        return False
+    await recovery_batch([f"keyword monitor {name},preferred,auto,1" for name in targets], deadline)
+    return True
+
+
+async def recover_reload(monitors: list, disconnected: frozenset, deadline: float) -> bool:
+    """
+    Tier 3: re-read the config, which re-lights disabled connectors.
+    Skipped when the Omarchy toggle would keep the laptop off and no
+    external is connected: nothing could light up.
+    """
+    externals = [
+        m for m in monitors
+        if m['name'] not in disconnected and not any(kind in m['name'] for kind in ('eDP', 'LVDS', 'DSI'))
+    ]
+    if not externals and os.path.exists(OMARCHY_TOGGLE):
+        return False
+    await hyprmode_ipc.request_async("reload", timeout=deadline)
+    return True
+
+
+async def recover_reload_without_toggle(monitors: list, disconnected: frozenset, deadline: float) -> bool:
+    """
+    Tier 4: clear Omarchy's internal-display disable toggle, then reload.
+    Otherwise the reload re-applies "monitor=<name>,disable" and the
+    panel stays dark. Skipped when there is no toggle to clear.
+    """
+    try:
+        os.remove(OMARCHY_TOGGLE)
+        log.event("Cleared Omarchy internal-monitor-disable toggle")
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        log.event("Could not clear Omarchy toggle", error=e)
+        return False
+    await hyprmode_ipc.request_async("reload", timeout=deadline)
+    return True
+
+
+# (tier, action, deadline for the action's request, seconds to wait for
+# pixels before escalating), cheapest first. An action returns False when
+# it cannot apply to the current state.
+RECOVERY_TIERS = (
+    ("dpms", recover_dpms, QUERY_DEADLINE, 0.5),
+    ("enable", recover_enable, QUERY_DEADLINE, 1.0),
+    ("reload", recover_reload, RELOAD_DEADLINE, 3.0),
+    ("reload_clear_toggle", recover_reload_without_toggle, RELOAD_DEADLINE, 3.0),
+)
+
+# The whole ladder: every tier's monitor query, action and wait for
+# pixels, plus a second of slack, so the last tier is never cut short
+RECOVERY_DEADLINE = sum(QUERY_DEADLINE + deadline + verify for _, _, deadline, verify in RECOVERY_TIERS) + 1
+
+
+async def emergency_recover(detected_at: float, disconnected: frozenset = frozenset()) -> Optional[str]:
+    """Emergency: get pixels back on a display with the cheapest action that works.
+
+    Walks RECOVERY_TIERS: DPMS on, a targeted enable, a config reload,
+    and a reload after clearing the Omarchy toggle. Each tier is verified
+    (an output lit with DPMS on) before the next one is tried, and the
+    time from detected_at until pixels came back is recorded per tier.
+    A reload is the expensive step - it re-parses the whole config - and
+    the only one that re-lights a disabled connector, so tiers that
+    cannot apply to the current state are skipped. Returns the tier that
+    worked, or None.
+    """
+    send_notification("⚠️ No active displays - restoring", urgent=True)
+    try:
+        for tier, action, deadline, verify_seconds in RECOVERY_TIERS:
+            monitors = await query_monitors() or []
+            try:
+                if not await action(monitors, disconnected, deadline):
+                    log.trace("Recovery tier does not apply", tier=tier)
+                    continue
+            except Exception as e:
+                log.event("✗ Recovery tier failed", tier=tier, error=e)
+                metrics.inc("hyprmode_errors_total", where="recovery")
+                continue
+            
+            ok = await wait_for_pixels(verify_seconds, disconnected)
+            metrics.inc("hyprmode_recovery_tiers_total", tier=tier, ok=str(ok).lower())
+            if ok:
+                elapsed = time.monotonic() - detected_at
+                metrics.observe("hyprmode_time_to_pixels_seconds", elapsed, RECOVERY_BUCKETS, tier=tier)
+                log.event("✓ Emergency recovery", tier=tier, time_to_pixels_ms=f"{elapsed * 1000:.1f}")
+                return tier
+            log.event("Recovery tier brought no display back; escalating", tier=tier)
+        
+        log.event("✗ Emergency recovery failed: no tier brought a display back")
+        metrics.inc("hyprmode_errors_total", where="recovery")
+        return None
+    finally:
+        # After the ladder, so the dump holds the trace of every tier tried
+        log.dump("emergency recovery")
 
 
 def wait_for_hyprland(max_wait: int = 30) -> bool:
     """Wait for Hyprland to be ready"""
     for i in range(max_wait):
         try:
-            result = subprocess.run(
-                ['hyprctl', 'monitors', '-j'], 
-                capture_output=True,
-                check=True,
-                timeout=2
-            )
+            hyprmode_ipc.request_json("monitors", timeout=2)
             print("✓ Hyprland is ready")
             return True
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        except hyprmode_ipc.HyprlandIPCError:
             if i == 0:
                 print("Waiting for Hyprland to start...")
             time.sleep(1)
@@ -126,81 +865,404 @@ def wait_for_hyprland(max_wait: int = 30) -> bool:
     return False
 
 
-def monitor_hotplug() -> None:
-    """Monitor for external display disconnect and provide emergency recovery"""
+class Daemon:
+    """Emergency recovery, profiles and lid handling on one asyncio loop.
+
+    Tasks:
+    - the checker: queries monitors when woken by an event, or every
+      POLL_INTERVAL / SAFETY_POLL_INTERVAL, and decides what to do
+    - the socket2 listener, which wakes the checker on hotplug events
+    - the DRM uevent reader and the lid reader (add_reader callbacks)
+    - the metrics server
+    - short-lived tasks for recoveries, mode switches and notifications,
+      each started with background() under its own deadline
+
+    Mode switches (profiles, lid) run the synchronous hyprmode_core code
+    in a worker thread and are serialized by `switching`. Recoveries do
+    not take that lock: they must never wait behind a slow switch.
+    """
+
+    def __init__(self):
+        self.wake = asyncio.Event()
+        self.events_connected = False
+        self.switching = asyncio.Lock()
+        self.previous = (0, False)  # (monitor count, has laptop)
+        self.display_set = None
+        
+        # Debounce and cooldown state
+        self.zero_monitor_count = 0
+        self.zero_detected_at = 0.0  # monotonic time of the first 0-monitor reading
+        self.recovered = False  # a recovery ran during the current 0-monitor episode
+        self.recovery: Optional[asyncio.Task] = None
+        self.in_cooldown = False
+        self.cooldown_until = 0.0
+        
+        self.drm: Optional[DrmHotplug] = None
+        self.last_lit = set()  # outputs lit at the last check that found any
+        
+        self.lid: Optional[LidSwitch] = None
+        self.lid_state = None
+        self.lid_layout = None  # layout to restore when the lid opens
+        self.revert_layout = None  # layout before the last control "apply", for "revert"
+
+    async def run(self) -> None:
+        global _loop
+        _loop = asyncio.get_running_loop()
+        
+        # `systemctl --user kill -s USR1 hyprmode-daemon` dumps the trace
+        _loop.add_signal_handler(signal.SIGUSR1, log.dump, "SIGUSR1")
+        
+        hyprmode_ipc.request_observer = observe_request
+        # Mode switches run hyprmode_core in worker threads; let its
+        # "Switched to ..." notifications go out without holding them up
+        hyprmode_core.set_notifier(send_notification)
+        await serve_metrics()
+        
+        monitors = await query_monitors()
+        self.previous = get_monitor_count(monitors)
+        self.last_lit = set(lit_outputs(monitors)) if monitors else set()
+        publish_state(monitors)
+        self.display_set = hyprmode_profiles.display_set_key(monitors) if monitors else None
+        log.event(
+            "Initial state",
+            monitors=self.previous[0],
+            has_laptop=self.previous[1],
+            display_set=self.display_set,
+        )
+        
+        self.drm = open_drm_hotplug()
+        if self.drm:
+            if self.drm.sock is not None:
+                _loop.add_reader(self.drm.sock.fileno(), self.on_uevent)
+            log.event("Cross-checking with the kernel's DRM connectors", sysfs=self.drm.sysfs)
+        
+        self.lid = open_lid_switch()
+        if self.lid:
+            self.lid_state = self.lid.state()
+            _loop.add_reader(self.lid.fd, self.on_lid)
+            log.event("Following the lid switch", device=self.lid.path, lid=self.lid_state)
+        
+        await self.serve_control()
+        listener = _loop.create_task(self.listen())
+        log.event("hyprmode emergency recovery daemon started")
+        log.event("Monitoring for external display disconnect...")
+        try:
+            await self.check_loop()
+        finally:
+            listener.cancel()
+
+    async def serve_control(self) -> bool:
+        """Accept control requests (see the module docstring). Returns
+        False if the socket could not be created."""
+        path = hyprmode_core.control_socket_path()
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            await asyncio.start_unix_server(self.handle_control, str(path))
+            os.chmod(path, 0o600)
+        except OSError as e:
+            log.event("Control socket unavailable", path=path, error=e)
+            return False
+        log.event("Listening for hyprmode requests", path=path)
+        return True
+
+    async def handle_control(self, reader, writer) -> None:
+        start = time.monotonic()
+        request = ""
+        try:
+            line = await asyncio.wait_for(reader.readline(), CONTROL_READ_DEADLINE)
+            request = line.decode("utf-8", "replace").strip()
+            # Not cancelled at the deadline: a switch that overruns keeps
+            # `switching` until its thread is done, and only the reply goes early
+            task = asyncio.ensure_future(self.control(request.split()))
+            _tasks.add(task)
+            task.add_done_callback(_tasks.discard)
+            done, _ = await asyncio.wait({task}, timeout=SWITCH_DEADLINE)
+            if not done:
+                ok, text = False, f"'{request}' did not finish within {SWITCH_DEADLINE}s"
+                metrics.inc("hyprmode_deadline_exceeded_total", task="control")
+                task.add_done_callback(
+                    lambda task: log.event(
+                        "Late control request finished", request=request,
+                        ok=not task.cancelled() and task.exception() is None,
+                    )
+                )
+            else:
+                try:
+                    ok, text = task.result()
+                except Exception as e:
+                    ok, text = False, str(e)
+            writer.write(f"{'ok' if ok else 'error'}\n{text}\n".encode("utf-8"))
+            await asyncio.wait_for(writer.drain(), CONTROL_READ_DEADLINE)
+        except (OSError, asyncio.TimeoutError) as e:
+            log.event("ERROR answering control request", key="control", request=request, error=e)
+            return
+        finally:
+            writer.close()
+        verb = request.split(" ", 1)[0] or "empty"
+        metrics.inc("hyprmode_control_requests_total", request=verb, ok=str(ok).lower())
+        metrics.observe("hyprmode_control_request_seconds", time.monotonic() - start, IPC_BUCKETS, request=verb)
+        if verb in ("apply", "revert"):
+            log.event("Control request", request=request, ok=ok, ms=f"{(time.monotonic() - start) * 1000:.1f}")
+
+    async def control(self, args: list) -> tuple:
+        """Run one control request. Returns (ok, text to print)"""
+        verb, *rest = args or [""]
+        if verb == "status" and rest in ([], ["json"]):
+            monitors = hyprmode_core.parse_monitors(await self.query_or_fail())
+            lid_state = self.lid_state or hyprmode_core.get_lid_state()
+            return True, hyprmode_core.format_status(monitors, lid_state, as_json=bool(rest))
+        
+        if verb == "revert" and not rest:
+            async with self.switching:
+                if self.revert_layout is None:
+                    return False, "nothing to revert"
+                layout, self.revert_layout = self.revert_layout, None
+                monitors = hyprmode_core.parse_monitors(await self.query_or_fail())
+                await switch_thread(hyprmode_core.restore_layout, layout, monitors)
+            return True, ""
+        
+        if (
+            verb not in ("plan", "apply")
+            or not 1 <= len(rest) <= 2
+            or rest[0] not in hyprmode_core.MODE_OUTPUTS
+            or not all(direction in hyprmode_layout.DIRECTIONS for direction in rest[1:])
+        ):
+            return False, f"unknown request: {' '.join(args)}"
+        mode, direction = rest[0], (rest[1:] or ["right"])[0]
+        
+        if verb == "plan":
+            monitors = hyprmode_core.parse_monitors(await self.query_or_fail())
+            message = hyprmode_core.missing_outputs(mode, monitors)
+            if message:
+                return False, message
+            plan = hyprmode_core.plan_mode(mode, monitors['laptop'], monitors['external'], monitors['externals'], direction)
+            return True, hyprmode_core.format_plan(plan)
+        
+        async with self.switching:
+            # Queried under the lock: a switch that was running has finished
+            monitors = hyprmode_core.parse_monitors(await self.query_or_fail())
+            message = hyprmode_core.missing_outputs(mode, monitors)
+            if message:
+                return False, message
+            previous = hyprmode_core.layout_snapshot(monitors)
+            await switch_thread(hyprmode_core.apply_mode, mode, monitors, direction)
+            self.revert_layout = previous  # until the client confirms (hyprmode --confirm)
+            self.lid_layout = None  # the user chose a layout; opening the lid keeps it
+        return True, ""
+
+    async def query_or_fail(self) -> list:
+        monitors = await query_monitors()
+        if monitors is None:
+            raise RuntimeError("Failed to query monitors from Hyprland")
+        return monitors
+
+    async def listen(self) -> None:
+        """Wake the checker on hotplug events; reconnect when Hyprland restarts"""
+        events = hyprmode_ipc.AsyncEventStream(STATE_EVENTS)
+        while True:
+            if await events.connect():
+                self.events_connected = True
+                log.event("Listening for Hyprland hotplug events (socket2)")
+                while (event := await events.read()) is not None:
+                    log.trace("Event: " + ">>".join(event))
+                    self.wake.set()
+                self.events_connected = False
+                self.wake.set()
+            log.event(f"Hyprland event socket unavailable - polling every {POLL_INTERVAL}s", key="socket2")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def check_loop(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                log.event("ERROR in monitoring loop", key="loop", error=e)
+                metrics.inc("hyprmode_errors_total", where="loop")
+                await asyncio.sleep(5)  # Back off on errors
+                continue
+            
+            # Sleep until Hyprland reports a hotplug. Keep 1s ticks while
+            # debouncing a zero-monitor reading or when socket2 is down.
+            if self.zero_monitor_count > 0 or not self.events_connected:
+                interval = POLL_INTERVAL
+            else:
+                interval = SAFETY_POLL_INTERVAL
+            try:
+                await asyncio.wait_for(self.wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+    async def check(self) -> None:
+        """One detection pass: publish state, react to display set changes and 0 monitors"""
+        log.trace("HEARTBEAT")
+        now = time.time()
+        
+        # Automatically clear cooldown when period expires
+        if self.in_cooldown and now >= self.cooldown_until:
+            self.in_cooldown = False
+            log.event("Cooldown period ended; recovery re-enabled")
+        
+        monitors = await query_monitors()
+        kernel = self.drm.connectors() if self.drm else {}
+        disconnected = frozenset(name for name, connected in kernel.items() if not connected)
+        current = get_monitor_count(monitors, disconnected)
+        # Mid-switch the reading may already be stale; publish none, as
+        # the switch itself does, rather than overwrite its invalidation
+        publish_state(None if self.switching.locked() else monitors)
+        metrics.set("hyprmode_monitors", current[0])
+        log.trace("Detected", monitors=current[0], has_laptop=current[1])
+        
+        if monitors and disconnected:
+            stale = [name for name in lit_outputs(monitors) if name in disconnected]
+            if stale:
+                # The compositor has not caught up with the unplug (or is wedged)
+                log.event("Kernel reports enabled outputs disconnected", key="drm_mismatch", outputs=",".join(stale))
+                metrics.inc("hyprmode_drm_mismatches_total")
+        
+        # Docked/undocked: switch to the mode chosen last time this
+        # exact set of displays was connected. Disabling or re-lighting
+        # an output keeps the set (and so never re-triggers this).
+        if monitors:
+            key = hyprmode_profiles.display_set_key(monitors)
+            if key != self.display_set:
+                self.display_set = key
+                background(self.apply_profile(monitors, key), "profile", SWITCH_DEADLINE)
+        if current != self.previous:
+            log.event(
+                "Monitors changed",
+                monitors=current[0],
+                has_laptop=current[1],
+                previous=self.previous[0],
+                previous_has_laptop=self.previous[1],
+            )
+        self.previous = current
+        
+        # CRITICAL: No output showing pixels = BLACK SCREEN!
+        # This happens when:
+        # 1. Laptop was disabled (External Only mode), or powered down
+        #    with DPMS while the external was in use
+        # 2. External monitor unplugged
+        # Result: 0 monitors in hyprctl list, or only DPMS-off ones.
+        # DPMS off on the very outputs that were showing pixels is idle
+        # blanking (hypridle, `dispatch dpms off`) and is left alone.
+        lit = set(lit_outputs(monitors, disconnected)) if monitors else set()
+        if lit and (lit == self.last_lit or showing_pixels(monitors, disconnected)):
+            self.last_lit = lit
+            if self.zero_monitor_count > 0:
+                log.event("Monitors restored, resetting zero-monitor counter", monitors=current[0])
+            if self.recovered:
+                metrics.observe(
+                    "hyprmode_detection_to_recovery_seconds",
+                    time.monotonic() - self.zero_detected_at,
+                    RECOVERY_BUCKETS,
+                )
+                self.recovered = False
+            self.zero_monitor_count = 0
+            return
+        
+        if monitors is None and self.last_lit and all(kernel.get(name) for name in self.last_lit):
+            # No answer within QUERY_DEADLINE, but the kernel still has
+            # every lit output connected: a busy compositor (reloading its
+            # config, say), not a black screen
+            log.trace("Monitor query failed, lit outputs still connected", outputs=",".join(sorted(self.last_lit)))
+            return
+        
+        if self.zero_monitor_count == 0:
+            self.zero_detected_at = time.monotonic()
+        self.zero_monitor_count += 1
+        log.trace(f"No display showing pixels ({self.zero_monitor_count} consecutive)", lit=len(lit))
+        # The debounce rides out a switch's transient all-off state. An
+        # unplug the kernel confirms for every output that was lit is no
+        # transient (switches never disconnect connectors): recover now.
+        confirmed = bool(self.last_lit) and self.last_lit <= disconnected
+        if self.zero_monitor_count < DEBOUNCE_THRESHOLD and not confirmed:
+            return
+        if confirmed and self.zero_monitor_count < DEBOUNCE_THRESHOLD:
+            log.event("Kernel confirms every lit output was unplugged", outputs=",".join(sorted(self.last_lit)))
+        
+        if self.in_cooldown:
+            log.event("In cooldown period, skipping recovery", key="cooldown")
+            metrics.inc("hyprmode_recoveries_suppressed_total")
+        elif self.recovery is not None and not self.recovery.done():
+            log.trace("Recovery still running")
+        else:
+            log.event("⚠️ EMERGENCY: No active monitors detected!")
+            self.recovery = background(
+                emergency_recover(self.zero_detected_at, disconnected), "recovery", RECOVERY_DEADLINE
+            )
+            metrics.inc("hyprmode_recoveries_total")
+            self.recovered = True
+            self.cooldown_until = now + COOLDOWN_SECONDS
+            self.in_cooldown = True
+            readable_until = time.strftime("%H:%M:%S", time.localtime(self.cooldown_until))
+            log.event(f"Cooldown active until {readable_until}")
+
+    async def apply_profile(self, monitors: list, key: str) -> None:
+        async with self.switching:
+            await switch_thread(apply_saved_profile, monitors, key)
+            if self.lid_state == "closed":
+                # Docked with the lid shut: keep the panel off
+                monitors = await query_monitors()
+                if monitors:
+                    self.lid_layout = await switch_thread(lid_closed, monitors) or self.lid_layout
+
+    def on_uevent(self) -> None:
+        """A uevent arrived: check now if it was a DRM connector change"""
+        try:
+            changed = self.drm.read()
+        except OSError as e:
+            log.event("DRM uevent socket failed; reading connector status on each check", error=e)
+            _loop.remove_reader(self.drm.sock.fileno())
+            self.drm.close()
+            return
+        if changed:
+            log.trace("DRM uevent")
+            self.wake.set()
+
+    def on_lid(self) -> None:
+        """The lid device is readable: start a switch if the position changed"""
+        try:
+            position = self.lid.read()
+        except OSError as e:
+            log.event("Lid switch device went away; lid handling stopped", error=e)
+            _loop.remove_reader(self.lid.fd)
+            self.lid.close()
+            self.lid = None
+            return
+        if position and position != self.lid_state:
+            self.lid_state = position
+            background(self.handle_lid(position), "lid", SWITCH_DEADLINE)
+
+    async def handle_lid(self, position: str) -> None:
+        async with self.switching:
+            monitors = await query_monitors()
+            if not monitors:
+                return
+            log.event("Lid " + position)
+            if position == "closed":
+                self.lid_layout = await switch_thread(lid_closed, monitors) or self.lid_layout
+            else:
+                layout, self.lid_layout = self.lid_layout, None
+                await switch_thread(lid_opened, monitors, layout)
+
+
+def main() -> None:
     # Wait for Hyprland to be ready before starting monitoring
     if not wait_for_hyprland():
         sys.exit(1)
     
     print("HyprMode Daemon VERSION: 2026-07-08-v0.2.0")
-    
-    previous_count, previous_has_laptop = get_monitor_count()
-    
-    # Debounce and cooldown state
-    zero_monitor_count = 0
-    debounce_threshold = 3  # Require 3 consecutive 0-monitor readings
-    cooldown_seconds = 10
-    last_recovery_time = 0.0
-    cooldown_until = 0.0
-    in_cooldown = False
-    
-    print("hyprmode emergency recovery daemon started")
-    print("Monitoring for external display disconnect...")
-    
-    while True:
-        print("HEARTBEAT")
-        try:
-            now = time.time()
-            
-            # Automatically clear cooldown when period expires
-            if in_cooldown and now >= cooldown_until:
-                in_cooldown = False
-                print("Cooldown period ended; recovery re-enabled")
-            
-            current_count, current_has_laptop = get_monitor_count()
-            print(f"Detected: {current_count} monitors, has_laptop={current_has_laptop}")
-            print(f"Previous: {previous_count} monitors, previous_has_laptop={previous_has_laptop}")
-            
-            # CRITICAL: No monitors active = BLACK SCREEN!
-            # This happens when:
-            # 1. Laptop was disabled (External Only mode)
-            # 2. External monitor unplugged
-            # Result: 0 monitors in hyprctl list
-            if current_count == 0:
-                zero_monitor_count += 1
-                print(f"0 monitors detected ({zero_monitor_count} consecutive)")
-                
-                if zero_monitor_count >= debounce_threshold:
-                    if in_cooldown:
-                        print("[DEBUG] In cooldown period, skipping recovery")
-                    else:
-                        print("⚠️ EMERGENCY: No active monitors detected!")
-                        emergency_enable_laptop()
-                        last_recovery_time = now
-                        cooldown_until = now + cooldown_seconds
-                        in_cooldown = True
-                        readable_until = time.strftime("%H:%M:%S", time.localtime(cooldown_until))
-                        print(f"Cooldown active until {readable_until}")
-            else:
-                if zero_monitor_count > 0:
-                    print("Monitors restored, resetting zero-monitor counter")
-                zero_monitor_count = 0
-            
-            previous_count = current_count
-            previous_has_laptop = current_has_laptop
-            
-            time.sleep(1)  # Check every second
-            
-        except KeyboardInterrupt:
-            print("\nStopping emergency recovery daemon")
-            break
-        except Exception:
-            time.sleep(5)  # Back off on errors
+    asyncio.run(Daemon().run())
 
 
 if __name__ == "__main__":
     try:
-        monitor_hotplug()
+        main()
     except KeyboardInterrupt:
         print("\nDaemon stopped")
         sys.exit(0)
@@ -5,579 +5,199 @@
 hyprmode - Display Mode Switcher for Hyprland
 Phase 2: Interactive menu with display mode switching
 VERSION: v0.2.0 (reload-based display recovery, Omarchy theme support)
-"""
 
-import json
-import subprocess
-from pathlib import Path
-from typing import Optional
-
-from textual.app import App
-from textual.binding import Binding
-from textual.containers import Container
-from textual.widgets import OptionList, Static
-from textual.widgets.option_list import Option
-from textual.theme import Theme
-
-# Theme loading support
-try:
-    import tomllib  # Python 3.11+
-except ImportError:
-    try:
-        import tomli as tomllib  # Fallback for older Python
-    except ImportError:
-        tomllib = None
+Usage:
+    hyprmode                                         interactive menu
+    hyprmode laptop|external|extend|mirror [--dry-run | --confirm]
+    hyprmode extend --left|--above [--dry-run | --confirm]
+    hyprmode status [--json]
 
+The non-interactive commands are sent to hyprmode-daemon's control
+socket when it is running, and otherwise only load hyprmode_core;
+Textual is imported for the menu alone.
+"""
 
-def normalize_color_format(color):
-    """Convert 0xRRGGBB to #RRGGBB for CSS/Textual compatibility."""
-    if isinstance(color, str) and color.startswith('0x'):
-        return '#' + color[2:]
-    return color
+import os
+import sys
 
+USAGE = """usage: hyprmode [MODE [--dry-run | --confirm] | status [--json]]
 
-def load_omarchy_colors():
-    """
-    Load colors from Omarchy's active theme.
-    Returns dict with RGB color values, or None if not found.
-    """
-    if tomllib is None:
-        return None
+modes:
+  laptop     Laptop Only
+  external   External Only (all externals side by side)
+  extend     Extend (externals to the right; --left or --above)
+  mirror     Mirror (every external shows the laptop)
 
-    # Try Ghostty (Omarchy v3.2+) first, then fall back to Alacritty for older versions
-    ghostty_theme = Path.home() / ".config/omarchy/current/theme/ghostty"
-    alacritty_theme = Path.home() / ".config/omarchy/current/theme/alacritty.toml"
+  --dry-run  print the planned steps without applying them
+  --confirm  ask on the terminal to keep the new layout; revert otherwise
+  status     show monitors, lid state and the current mode
+  --json     machine-readable status"""
 
-    theme_file = None
-    if ghostty_theme.exists():
-        theme_file = ghostty_theme
-    elif alacritty_theme.exists():
-        theme_file = alacritty_theme
-    else:
-        return None
 
-    try:
-        with open(theme_file, "rb") as f:
-            data = tomllib.load(f)
-
-        colors = data.get("colors", {})
-        normal = colors.get("normal", {})
-        bright = colors.get("bright", {})
-        primary = colors.get("primary", {})
-
-        return {
-            "accent": normalize_color_format(
-                normal.get("yellow") or bright.get("yellow") or "#EBCB8B"
-            ),
-            "primary": normalize_color_format(
-                normal.get("cyan") or bright.get("cyan") or "#88C0D0"
-            ),
-            "foreground": normalize_color_format(
-                primary.get("foreground") or "#D8DEE9"
-            ),
-            "background": normalize_color_format(
-                primary.get("background") or "#2E3440"
-            ),
-        }
-    except Exception:
-        return None
+CONTROL_TIMEOUT = 20  # seconds - the daemon gives a switch up to 15s
 
 
-def get_monitors() -> dict:
+def ask_daemon(request: str):
     """
-    Execute hyprctl monitors -j and parse monitor data.
-    Also gets disabled monitors from hyprctl monitors all -j
-    Returns: {
-        'laptop': {'name': 'eDP-1', 'width': 1920, 'height': 1080, 'refreshRate': 60.0} or None,
-        'external': {'name': 'HDMI-A-1', 'width': 2560, 'height': 1440, 'refreshRate': 144.0} or None
-    }
+    Send one request to hyprmode-daemon's control socket. Returns
+    (ok, text), or None if no daemon is listening.
     """
+    import socket
+
+    # hyprmode_core.control_socket_path(), without importing hyprmode_core
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONTROL_TIMEOUT)
+    try:
+        sock.connect(os.path.join(runtime_dir, "hyprmode", "control.sock"))
+    except OSError:
+        sock.close()
+        return None
+
+    chunks = []
     try:
-        # Try to get all monitors (including disabled)
-        result = subprocess.run(
-            ["hyprctl", "monitors", "all", "-j"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
-        )
-        monitors_data = json.loads(result.stdout)
-    except (subprocess.CalledProcessError, json.JSONDecodeError, subprocess.TimeoutExpired):
-        # Fallback to regular monitors command (only active monitors)
-        try:
-            result = subprocess.run(
-                ["hyprctl", "monitors", "-j"],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=5
-            )
-            monitors_data = json.loads(result.stdout)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Failed to execute hyprctl: {e}")
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"Failed to parse hyprctl output: {e}")
-        except subprocess.TimeoutExpired:
-            raise RuntimeError("hyprctl command timed out")
-    except FileNotFoundError:
-        raise RuntimeError("hyprctl not found - is Hyprland running?")
-    
-    if not monitors_data:
-        raise RuntimeError("No monitors detected")
-    
-    laptop: Optional[dict] = None
-    external: Optional[dict] = None
-    
-    for monitor in monitors_data:
-        monitor_info = {
-            'name': monitor.get('name', 'Unknown'),
-            'width': monitor.get('width', 0),
-            'height': monitor.get('height', 0),
-            'refreshRate': monitor.get('refreshRate', 0.0),
-            'scale': monitor.get('scale', 1.0),
-            'disabled': monitor.get('disabled', False)
-        }
-        
-        # Identify laptop monitor (contains "eDP")
-        if "eDP" in monitor_info['name']:
-            laptop = monitor_info
-        else:
-            # Only set external if it's the first one we find
-            if external is None:
-                external = monitor_info
-    
-    return {
-        'laptop': laptop,
-        'external': external
-    }
-
-
-def get_lid_state() -> str:
+        sock.sendall(request.encode("utf-8") + b"\n")
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except socket.timeout:
+        return False, f"hyprmode-daemon did not answer within {CONTROL_TIMEOUT}s"
+    except OSError as e:
+        return False, f"hyprmode-daemon control request failed: {e}"
+    finally:
+        sock.close()
+
+    status, _, text = b"".join(chunks).decode("utf-8", "replace").partition("\n")
+    return status == "ok", text.rstrip("\n")
+
+
+def delegate(request: str, notify_errors: bool):
     """
-    Check laptop lid state from /proc/acpi/button/lid/
-    Returns: 'open', 'closed', or 'unknown'
+    Run a command in hyprmode-daemon, which has the monitor state and the
+    compositor connection warm. Returns the exit status, or None if no
+    daemon is listening and the command has to run here.
     """
-    lid_paths = [
-        Path("/proc/acpi/button/lid/LID/state"),
-        Path("/proc/acpi/button/lid/LID0/state")
-    ]
-    
-    for lid_path in lid_paths:
-        try:
-            content = lid_path.read_text()
-            if "closed" in content.lower():
-                return "closed"
-            elif "open" in content.lower():
-                return "open"
-        except FileNotFoundError:
-            continue
-        except Exception as e:
-            # Other errors (permissions, etc.) - try next path
-            continue
-    
-    # No lid file found - likely a desktop
-    return "unknown"
-
-
-def send_notification(message: str, urgent: bool = False) -> None:
-    """Send desktop notification using notify-send"""
-    try:
-        cmd = ["notify-send", "HyprMode", message]
-        if urgent:
-            cmd.insert(1, "-u")
-            cmd.insert(2, "critical")
-        subprocess.run(cmd, check=False, timeout=2)
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        # notify-send not available or timed out - continue silently
-        pass
+    reply = ask_daemon(request)
+    if reply is None:
+        return None
+    ok, text = reply
+    if ok:
+        if text:
+            print(text)
+        return 0
+    print(f"hyprmode: {text}", file=sys.stderr)
+    if notify_errors:
+        import hyprmode_core as core
+        core.send_notification(text, urgent=True)
+    return 1
 
 
-def clear_mirror_state(laptop: Optional[dict], external: Optional[dict]) -> dict:
-    """
-    Clear any existing mirror relationship and restore native monitor specs.
-    Returns refreshed monitor data after reload.
-    """
-    try:
-        # Disable both monitors to clear mirror state
-        if external:
-            subprocess.run(
-                ["hyprctl", "keyword", "monitor", f"{external['name']},disable"],
-                timeout=5,
-                stderr=subprocess.DEVNULL
-            )
-        
-        if laptop:
-            subprocess.run(
-                ["hyprctl", "keyword", "monitor", f"{laptop['name']},disable"],
-                timeout=5,
-                stderr=subprocess.DEVNULL
-            )
-        
-        # Small delay for state to settle
-        import time
-        time.sleep(0.3)
-
-        # Clear Omarchy's internal-display disable toggle if present.
-        # Otherwise the reload below re-applies "monitor=<name>,disable"
-        # and the laptop panel stays off ("keyword monitor" cannot
-        # re-enable a disabled connector afterwards).
-        omarchy_toggle = (
-            Path.home()
-            / ".local/state/omarchy/toggles/hypr/internal-monitor-disable.conf"
-        )
-        try:
-            omarchy_toggle.unlink()
-        except FileNotFoundError:
-            pass
-        except Exception:
-            pass
-
-        # CRITICAL: Reload Hyprland config to restore native monitor settings
-        # (a config reload is the only reliable way to re-light a disabled
-        # connector - "hyprctl keyword monitor" no-ops on disabled outputs)
-        subprocess.run(
-            ["hyprctl", "reload"],
-            timeout=5,
-            stderr=subprocess.DEVNULL
-        )
-        
-        # Small delay for reload to complete
-        time.sleep(0.3)
-        
-        # RE-DETECT monitors to get the restored native specs
-        return get_monitors()
-    
-    except Exception:
-        # If error, return original values
-        return {'laptop': laptop, 'external': external}
-
-
-def apply_laptop_only(laptop: Optional[dict], external: Optional[dict]) -> None:
-    """Disable external, enable laptop"""
-    if not laptop:
-        raise RuntimeError("Laptop monitor not detected - cannot enable")
-    
-    # Clear mirror state and get refreshed monitor specs
-    monitors = clear_mirror_state(laptop, external)
-    laptop = monitors['laptop']
-    external = monitors['external']
-    
-    try:
-        # Enable laptop with REFRESHED settings (native resolution restored!)
-        laptop_config = f"{laptop['name']},{laptop['width']}x{laptop['height']}@{laptop['refreshRate']:.0f},auto,{laptop['scale']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", laptop_config],
-            check=True,
-            timeout=5
-        )
-        # Disable external if it exists
-        if external:
-            subprocess.run(
-                ["hyprctl", "keyword", "monitor", f"{external['name']},disable"],
-                check=True,
-                timeout=5
-            )
-        send_notification("Switched to Laptop Only mode")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to apply laptop only mode: {e}")
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Command timed out while applying mode")
-
-
-def apply_external_only(laptop: Optional[dict], external: dict) -> None:
-    """Disable laptop, enable external"""
-    if not external:
-        raise RuntimeError("External monitor not detected - cannot enable")
-    
-    # Clear mirror state and get refreshed monitor specs
-    monitors = clear_mirror_state(laptop, external)
-    laptop = monitors['laptop']
-    external = monitors['external']
-    
+def keep_layout(timeout: int) -> bool:
+    """Ask on the terminal whether to keep the new layout; no answer in time means no"""
+    import select
+
+    print(f"Keep this layout? [y/N] (reverting in {timeout}s) ", end="", flush=True)
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    if not ready:
+        print()
+        return False
+    return sys.stdin.readline().strip().lower() in ("y", "yes")
+
+
+def cmd_status(as_json: bool) -> int:
+    status = delegate("status json" if as_json else "status", notify_errors=False)
+    if status is not None:
+        return status
+
+    import hyprmode_core as core
+
     try:
-        # Enable external with actual settings
-        external_config = f"{external['name']},{external['width']}x{external['height']}@{external['refreshRate']:.0f},auto,{external['scale']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", external_config],
-            check=True,
-            timeout=5
-        )
-        # Disable laptop if it exists (might be None on desktop)
-        if laptop:
-            subprocess.run(
-                ["hyprctl", "keyword", "monitor", f"{laptop['name']},disable"],
-                check=True,
-                timeout=5
-            )
-        send_notification("Switched to External Only mode")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to apply external only mode: {e}")
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Command timed out while applying mode")
-
-
-def apply_extend(laptop: Optional[dict], external: dict) -> None:
-    """Enable both, position external to the right"""
-    if not laptop:
-        raise RuntimeError("Laptop monitor not detected - cannot enable")
-    if not external:
-        raise RuntimeError("External monitor not detected - cannot extend")
-    
-    # Clear mirror state and get refreshed monitor specs
-    monitors = clear_mirror_state(laptop, external)
-    laptop = monitors['laptop']
-    external = monitors['external']
-    
+        monitors, lid_state = core.get_monitor_state()
+    except RuntimeError as e:
+        print(f"hyprmode: {e}", file=sys.stderr)
+        return 1
+    print(core.format_status(monitors, lid_state, as_json))
+    return 0
+
+
+def cmd_apply(mode: str, dry_run: bool, direction: str = "right", confirm: bool = False) -> int:
+    status = delegate(f"{'plan' if dry_run else 'apply'} {mode} {direction}", notify_errors=not dry_run)
+    if status is not None:
+        if status != 0 or not confirm:
+            return status
+        import hyprmode_core as core
+
+        if keep_layout(core.CONFIRM_TIMEOUT):
+            return 0
+        delegate("revert", notify_errors=True)
+        print("hyprmode: not confirmed - restored the previous layout", file=sys.stderr)
+        return 1
+
+    import hyprmode_core as core
+
     try:
-        # Enable laptop at 0x0 with actual settings
-        laptop_config = f"{laptop['name']},{laptop['width']}x{laptop['height']}@{laptop['refreshRate']:.0f},0x0,{laptop['scale']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", laptop_config],
-            check=True,
-            timeout=5
-        )
-        # Enable external to the right with actual settings
-        external_config = f"{external['name']},{external['width']}x{external['height']}@{external['refreshRate']:.0f},auto-right,{external['scale']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", external_config],
-            check=True,
-            timeout=5
-        )
-        send_notification("Switched to Extend mode")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to apply extend mode: {e}")
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Command timed out while applying mode")
-
-
-def apply_mirror(laptop: Optional[dict], external: dict) -> None:
-    """Enable both displays with same content (mirror mode)"""
-    if not laptop:
-        raise RuntimeError("Laptop monitor not detected - cannot enable")
-    if not external:
-        raise RuntimeError("External monitor not detected - cannot mirror")
-    
-    # Clear any existing mirror state and get refreshed monitor specs
-    monitors = clear_mirror_state(laptop, external)
-    laptop = monitors['laptop']
-    external = monitors['external']
-    
+        monitors = core.get_monitors()
+    except RuntimeError as e:
+        print(f"hyprmode: {e}", file=sys.stderr)
+        if not dry_run:
+            core.send_notification(str(e), urgent=True)
+        return 1
+
+    message = core.missing_outputs(mode, monitors)
+    if message:
+        print(f"hyprmode: {message}", file=sys.stderr)
+        if not dry_run:
+            core.send_notification(message, urgent=True)
+        return 1
+
+    if dry_run:
+        plan = core.plan_mode(mode, monitors['laptop'], monitors['external'], monitors['externals'], direction)
+        print(core.format_plan(plan))
+        return 0
+
+    previous = core.layout_snapshot(monitors)
     try:
-        import time
-        
-        # Use EXTERNAL's native resolution/refresh rate (what it can actually support)
-        # This prevents forcing incompatible specs on the external monitor
-        mirror_width = external['width']
-        mirror_height = external['height']
-        mirror_refresh = external['refreshRate']
-        
-        # Step 1: Configure laptop to output at external's resolution
-        # Laptop will downscale its content to match external
-        laptop_config = f"{laptop['name']},{mirror_width}x{mirror_height}@{mirror_refresh:.0f},0x0,{laptop['scale']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", laptop_config],
-            check=True,
-            timeout=5
-        )
-        
-        # Step 2: Wait for laptop to stabilize
-        time.sleep(0.3)
-        
-        # Step 3: Configure external to mirror laptop at its native resolution
-        external_config = f"{external['name']},{mirror_width}x{mirror_height}@{mirror_refresh:.0f},0x0,{external['scale']},mirror,{laptop['name']}"
-        subprocess.run(
-            ["hyprctl", "keyword", "monitor", external_config],
-            check=True,
-            timeout=5
-        )
-        
-        send_notification(f"Mirror mode applied - using {mirror_width}x{mirror_height}@{mirror_refresh:.0f}Hz")
-    
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to apply mirror mode: {e}")
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Command timed out while applying mode")
-
-
-class HyprModeApp(App):
-    """Hyprland display mode switcher TUI"""
-    
-    TITLE = "HyprMode"
-    
-    CSS = """
-    Screen {
-        align: center middle;
-    }
-    
-    Container {
-        min-width: 60;
-        max-width: 80;
-        height: auto;
-        padding: 2 4;
-        border: solid $accent;
-    }
-    
-    Static {
-        margin: 1 0;
-        min-width: 50;
-    }
-    
-    OptionList {
-        margin: 1 0;
-        height: auto;
-        min-height: 8;
-    }
-    
-    .title {
-        text-style: bold;
-        color: $accent;
-    }
-    
-    .error {
-        color: $error;
-    }
-    
-    .help {
-        color: $text-muted;
-    }
-    """
-    
-    BINDINGS = [
-        Binding("q", "quit", "Quit"),
-        Binding("j", "cursor_down", "Down", show=False),
-        Binding("k", "cursor_up", "Up", show=False),
-    ]
-    
-    def __init__(self):
-        super().__init__()
-        
-        # Load Omarchy theme if available
-        omarchy_colors = load_omarchy_colors()
-        
-        if omarchy_colors:
-            self.register_theme(
-                Theme(
-                    name="omarchy-auto",
-                    primary=omarchy_colors["primary"],
-                    secondary=omarchy_colors["accent"],
-                    accent=omarchy_colors["accent"],
-                    foreground=omarchy_colors["foreground"],
-                    background=omarchy_colors["background"],
-                    surface=omarchy_colors["background"],
-                    panel=omarchy_colors["background"],
-                    dark=True,
-                )
-            )
-            self.theme = "omarchy-auto"
-        else:
-            self.theme = "textual-dark"
-        
-        try:
-            self.monitors = get_monitors()
-            self.lid_state = get_lid_state()
-            self.error = None
-        except RuntimeError as e:
-            self.monitors = None
-            self.lid_state = "unknown"
-            self.error = str(e)
-    
-    def compose(self):
-        """Display monitor info and interactive menu"""
-        with Container():
-            if self.error:
-                yield Static("❌ HyprMode - Error", classes="title error")
-                yield Static("")
-                yield Static(self.error, classes="error")
-                yield Static("")
-                yield Static("Press 'q' to quit", classes="help")
-            else:
-                yield Static("🖥️  HyprMode - Display Mode Switcher", classes="title")
-                yield Static("")
-                yield Static(f"Lid State: {self.lid_state.upper()}")
-                
-                if self.monitors['laptop']:
-                    laptop = self.monitors['laptop']
-                    yield Static(
-                        f"Laptop: {laptop['name']} "
-                        f"({laptop['width']}x{laptop['height']}@{laptop['refreshRate']:.0f}Hz)"
-                    )
-                
-                if self.monitors['external']:
-                    external = self.monitors['external']
-                    yield Static(
-                        f"External: {external['name']} "
-                        f"({external['width']}x{external['height']}@{external['refreshRate']:.0f}Hz)"
-                    )
-                else:
-                    yield Static("External: None")
-                
-                yield Static("")
-                yield Static("Select Display Mode:", classes="title")
-                yield OptionList(
-                    Option("💻 Laptop Only", id="laptop"),
-                    Option("🖥️  External Only", id="external"),
-                    Option("↔️  Extend", id="extend"),
-                    Option("🔄 Mirror", id="mirror")
-                )
-                yield Static("")
-                yield Static("j/k: navigate  |  Enter: apply  |  q: quit", classes="help")
-    
-    def action_cursor_down(self) -> None:
-        """Move cursor down in option list"""
-        option_list = self.query_one(OptionList)
-        option_list.action_cursor_down()
-    
-    def action_cursor_up(self) -> None:
-        """Move cursor up in option list"""
-        option_list = self.query_one(OptionList)
-        option_list.action_cursor_up()
-    
-    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
-        """Handle mode selection"""
-        if self.error or not self.monitors:
-            return
-        
-        mode = event.option.id
-        laptop = self.monitors['laptop']
-        external = self.monitors['external']
-        
-        try:
-            if mode == "laptop":
-                if not laptop:
-                    send_notification("Laptop display not detected. Try: hyprctl reload", urgent=True)
-                    return
-                apply_laptop_only(laptop, external)
-                self.exit()
-            elif mode == "external":
-                if not external:
-                    send_notification("No external monitor detected", urgent=True)
-                    return
-                apply_external_only(laptop, external)
-                self.exit()
-            elif mode == "extend":
-                if not laptop:
-                    send_notification("Laptop display not detected. Try: hyprctl reload", urgent=True)
-                    return
-                if not external:
-                    send_notification("No external monitor detected", urgent=True)
-                    return
-                apply_extend(laptop, external)
-                self.exit()
-            elif mode == "mirror":
-                if not laptop:
-                    send_notification("Laptop display not detected. Try: hyprctl reload", urgent=True)
-                    return
-                if not external:
-                    send_notification("No external monitor detected", urgent=True)
-                    return
-                apply_mirror(laptop, external)
-                self.exit()
-        except RuntimeError as e:
-            send_notification(str(e), urgent=True)
-            # Don't exit on validation errors - let user try another mode
+        core.apply_mode(mode, monitors, direction)
+        if confirm and not keep_layout(core.CONFIRM_TIMEOUT):
+            core.restore_layout(previous, core.get_monitors())
+            print("hyprmode: not confirmed - restored the previous layout", file=sys.stderr)
+            return 1
+    except RuntimeError as e:
+        print(f"hyprmode: {e}", file=sys.stderr)
+        core.send_notification(str(e), urgent=True)
+        return 1
+    return 0
+
+
+def main(argv: list) -> int:
+    if not argv:
+        from hyprmode_tui import HyprModeApp
+
+        app = HyprModeApp()
+        app.run()
+        return 0
+
+    command, options = argv[0], set(argv[1:])
+    directions = {"--left", "--right", "--above"} & options
+    flags = options - directions
+    if (
+        command in ("laptop", "external", "extend", "mirror")
+        and (len(flags) <= 1 and flags <= {"--dry-run", "--confirm"})
+        and (not directions or command == "extend" and len(directions) == 1)
+    ):
+        direction = directions.pop()[2:] if directions else "right"
+        return cmd_apply(command, "--dry-run" in flags, direction, "--confirm" in flags)
+    if command == "status" and options <= {"--json"}:
+        return cmd_status("--json" in options)
+    if command in ("-h", "--help"):
+        print(USAGE)
+        return 0
+
+    print(USAGE, file=sys.stderr)
+    return 2
 
 
 if __name__ == "__main__":
-    app = HyprModeApp()
-    app.run()
-
+    sys.exit(main(sys.argv[1:]))
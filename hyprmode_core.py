@@ -0,0 +1,993 @@
+"""
+hyprmode_core - Monitor detection and display mode logic
+
+Everything hyprmode needs to read monitor state and switch modes,
+without the TUI: importing this never loads Textual or tomllib, so the
+headless CLI (`hyprmode extend`, `hyprmode status`, ...) starts fast.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import hyprmode_ipc
+import hyprmode_layout
+
+
+SNAPSHOT_MAX_AGE = 30  # seconds - the daemon rewrites it at least every 10s
+CONFIRM_TIMEOUT = 15  # seconds - an unconfirmed switch is reverted after this
+REFRESH_TOLERANCE = 0.05  # Hz - tells 59.94 from 60; covers availableModes' 2-decimal rounding
+
+# socket2 events that can end the wait for a switch to take effect (mode
+# and position changes are not announced; those are caught by polling)
+SWITCH_EVENTS = {
+    "monitoradded", "monitoraddedv2", "monitorremoved", "monitorremovedv2", "configreloaded",
+}
+
+# The daemon's loop and its switch threads both update the snapshot
+_snapshot_lock = threading.Lock()
+
+
+def get_monitors() -> dict:
+    """
+    Query monitors over Hyprland IPC and parse monitor data.
+    Uses "monitors all" to include disabled monitors, falling back to "monitors"
+    Returns: {
+        'laptop': {'name': 'eDP-1', 'width': 1920, 'height': 1080, 'refreshRate': 60.0} or None,
+        'external': {'name': 'HDMI-A-1', 'width': 2560, 'height': 1440, 'refreshRate': 144.0} or None,
+        'externals': [every non-laptop output, 'external' first]
+    }
+    """
+    try:
+        # Try to get all monitors (including disabled)
+        monitors_data = hyprmode_ipc.request_json("monitors all")
+    except hyprmode_ipc.HyprlandNotRunning:
+        raise RuntimeError("Hyprland IPC socket not found - is Hyprland running?")
+    except hyprmode_ipc.HyprlandIPCError:
+        # Fallback to regular monitors command (only active monitors)
+        try:
+            monitors_data = hyprmode_ipc.request_json("monitors")
+        except hyprmode_ipc.HyprlandIPCError as e:
+            raise _query_failed(e)
+    
+    return parse_monitors(monitors_data)
+
+
+def _query_failed(error: "hyprmode_ipc.HyprlandIPCError") -> RuntimeError:
+    """The RuntimeError get_monitors() raises when its fallback query failed too"""
+    if isinstance(error, hyprmode_ipc.HyprlandCommandError):
+        return RuntimeError(f"Failed to parse Hyprland monitor data: {error}")
+    if isinstance(error, hyprmode_ipc.HyprlandTimeout):
+        return RuntimeError("Hyprland IPC request timed out")
+    return RuntimeError(f"Failed to query Hyprland: {error}")
+
+
+async def get_monitors_async() -> dict:
+    """
+    get_monitors() for asyncio callers, with both queries in flight at
+    once: "monitors all" is preferred, and when it fails the plain
+    "monitors" answer is already on its way instead of costing a second
+    round trip (or a second timeout).
+    """
+    import asyncio
+
+    all_query = asyncio.ensure_future(hyprmode_ipc.request_json_async("monitors all"))
+    active_query = asyncio.ensure_future(hyprmode_ipc.request_json_async("monitors"))
+    # Retrieve whatever the losing query ends with, so it is never reported as unhandled
+    active_query.add_done_callback(lambda task: task.cancelled() or task.exception())
+    try:
+        monitors_data = await all_query
+        active_query.cancel()
+    except hyprmode_ipc.HyprlandNotRunning:
+        active_query.cancel()
+        raise RuntimeError("Hyprland IPC socket not found - is Hyprland running?")
+    except hyprmode_ipc.HyprlandIPCError:
+        try:
+            monitors_data = await active_query
+        except hyprmode_ipc.HyprlandIPCError as e:
+            raise _query_failed(e)
+    
+    return parse_monitors(monitors_data)
+
+
+def _query_all_monitors() -> list:
+    """Raw monitor list including disabled outputs (raises HyprlandIPCError)"""
+    try:
+        return hyprmode_ipc.request_json("monitors all")
+    except hyprmode_ipc.HyprlandCommandError:
+        # Older Hyprland without "all"
+        return hyprmode_ipc.request_json("monitors")
+
+
+def mirror_source(monitor: dict, monitors_data: list) -> Optional[str]:
+    """
+    Name of the output a raw Hyprland monitor mirrors, or None. Hyprland
+    reports mirrorOf as the source's monitor id ("0"), not its name; a
+    value that matches no id is passed through as it is.
+    """
+    mirror = monitor.get('mirrorOf', 'none')
+    if mirror in ('none', '', None):
+        return None
+    for source in monitors_data:
+        if str(source.get('id')) == str(mirror):
+            return source.get('name')
+    return str(mirror)
+
+
+def parse_monitors(monitors_data: list) -> dict:
+    """Split raw Hyprland monitor JSON into laptop/externals (see get_monitors)"""
+    if not monitors_data:
+        raise RuntimeError("No monitors detected")
+    
+    laptop: Optional[dict] = None
+    externals = []
+    
+    for monitor in monitors_data:
+        monitor_info = {
+            'name': monitor.get('name', 'Unknown'),
+            'width': monitor.get('width', 0),
+            'height': monitor.get('height', 0),
+            'refreshRate': monitor.get('refreshRate', 0.0),
+            'scale': monitor.get('scale', 1.0),
+            'x': monitor.get('x', 0),
+            'y': monitor.get('y', 0),
+            'transform': monitor.get('transform', 0),
+            'mirrorOf': mirror_source(monitor, monitors_data) or 'none',
+            'disabled': monitor.get('disabled', False),
+            'vrr': monitor.get('vrr', False),
+            # EDID fields - identify the display itself (hyprmode_profiles)
+            'make': monitor.get('make', ''),
+            'model': monitor.get('model', ''),
+            'serial': monitor.get('serial', ''),
+            'description': monitor.get('description', ''),
+            # Modes the output advertises, e.g. "2560x1440@144.00Hz" (mirror solver)
+            'availableModes': monitor.get('availableModes', []),
+        }
+        
+        # Identify laptop monitor (contains "eDP")
+        if "eDP" in monitor_info['name']:
+            laptop = monitor_info
+        else:
+            externals.append(monitor_info)
+    
+    return {
+        'laptop': laptop,
+        'external': externals[0] if externals else None,  # first external, for two-output callers
+        'externals': externals,
+    }
+
+
+def get_lid_state() -> str:
+    """
+    Check laptop lid state from /proc/acpi/button/lid/
+    Returns: 'open', 'closed', or 'unknown'
+    """
+    lid_paths = [
+        Path("/proc/acpi/button/lid/LID/state"),
+        Path("/proc/acpi/button/lid/LID0/state")
+    ]
+    
+    for lid_path in lid_paths:
+        try:
+            content = lid_path.read_text()
+            if "closed" in content.lower():
+                return "closed"
+            elif "open" in content.lower():
+                return "open"
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            # Other errors (permissions, etc.) - try next path
+            continue
+    
+    # No lid file found - likely a desktop
+    return "unknown"
+
+
+# Where send_notification() delivers, as notifier(message, urgent); None
+# runs notify-send right away. See set_notifier().
+_notifier: Optional[Callable[[str, bool], None]] = None
+
+
+def set_notifier(notifier: Optional[Callable[[str, bool], None]]) -> None:
+    """
+    Deliver this process's notifications through notifier(message, urgent)
+    instead of notify-send, e.g. hyprmode-daemon hands them to its event
+    loop so switches in worker threads never wait on them. None restores
+    notify-send.
+    """
+    global _notifier
+    _notifier = notifier
+
+
+def send_notification(message: str, urgent: bool = False) -> None:
+    """Send desktop notification using notify-send (or the notifier set with set_notifier())"""
+    if _notifier is not None:
+        _notifier(message, urgent)
+        return
+    
+    # Imported here: subprocess (and its locale/signal deps) is the
+    # largest import on the CLI path and only notifications need it
+    import subprocess
+    
+    try:
+        cmd = ["notify-send", "HyprMode", message]
+        if urgent:
+            cmd.insert(1, "-u")
+            cmd.insert(2, "critical")
+        subprocess.run(cmd, check=False, timeout=2)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        # notify-send not available or timed out - continue silently
+        pass
+
+
+def state_dir() -> Path:
+    """Per-user runtime directory for the daemon's state file and sockets"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    return Path(runtime_dir) / "hyprmode"
+
+
+def snapshot_path() -> Path:
+    """State file the daemon publishes under $XDG_RUNTIME_DIR"""
+    return state_dir() / "state.json"
+
+
+def control_socket_path() -> Path:
+    """hyprmode-daemon's control socket (see hyprmode-daemon.py)"""
+    return state_dir() / "control.sock"
+
+
+def atomic_write(path: Path, data: str) -> None:
+    """
+    Replace path with data, creating its directory if needed. The data
+    goes to a unique temporary file in the same directory, is synced,
+    and is renamed over path, so readers see the old or the new
+    contents, never a partial write. Raises OSError; the temporary file
+    is removed on failure.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load_snapshot() -> Optional[dict]:
+    try:
+        with open(snapshot_path(), "rb") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def update_snapshot(**fields) -> None:
+    """
+    Merge fields (monitors, lid, last_mode, pid, ...) into the state
+    snapshot and bump its generation. The file is replaced atomically,
+    so readers never see a partial write, and updates from threads of
+    one process are serialized, so none is lost.
+    """
+    path = snapshot_path()
+    with _snapshot_lock:
+        snapshot = _load_snapshot() or {'generation': 0}
+        snapshot.update(fields)
+        snapshot['generation'] = snapshot.get('generation', 0) + 1
+        snapshot['updated'] = time.time()
+        
+        try:
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+            atomic_write(path, json.dumps(snapshot))
+        except OSError:
+            pass  # The snapshot is an optimization; readers fall back to live queries
+
+
+def read_snapshot() -> Optional[dict]:
+    """
+    The daemon's state snapshot, or None if it is missing, invalidated by
+    a mode switch, older than SNAPSHOT_MAX_AGE, or its daemon is gone.
+    """
+    snapshot = _load_snapshot()
+    if not snapshot or not snapshot.get('monitors'):
+        return None
+    if time.time() - snapshot.get('updated', 0) > SNAPSHOT_MAX_AGE:
+        return None
+    try:
+        os.kill(snapshot['pid'], 0)
+    except (KeyError, TypeError, ProcessLookupError):
+        return None
+    except PermissionError:
+        pass  # Exists, owned by someone else
+    return snapshot
+
+
+def get_monitor_state() -> tuple:
+    """
+    Monitors and lid state for display: (get_monitors() result, lid state).
+    Served from the daemon's snapshot when it is fresh, otherwise queried live.
+    """
+    state = _snapshot_state()
+    if state is not None:
+        return state
+    return get_monitors(), get_lid_state()
+
+
+async def get_monitor_state_async(snapshot: bool = True) -> tuple:
+    """
+    get_monitor_state() for asyncio callers: the lid is read in a thread
+    while the monitors are queried. snapshot=False always queries live.
+    """
+    import asyncio
+
+    state = _snapshot_state() if snapshot else None
+    if state is not None:
+        return state
+    lid_state = asyncio.ensure_future(asyncio.to_thread(get_lid_state))
+    try:
+        monitors = await get_monitors_async()
+    except RuntimeError:
+        await lid_state
+        raise
+    return monitors, await lid_state
+
+
+def _snapshot_state() -> Optional[tuple]:
+    """(monitors, lid state) from a fresh daemon snapshot, or None"""
+    snapshot = read_snapshot()
+    if snapshot is None:
+        return None
+    try:
+        return parse_monitors(snapshot['monitors']), snapshot.get('lid', "unknown")
+    except (RuntimeError, TypeError, AttributeError):
+        return None
+
+
+def _monitor_disabled(monitors_data: list, name: str) -> bool:
+    """True if the named output is disabled (or gone) in a monitors list"""
+    for monitor in monitors_data:
+        if monitor.get('name') == name:
+            return monitor.get('disabled', False) is True
+    return True
+
+
+def _monitor_enabled(monitors_data: list, name: str) -> bool:
+    """True if the named output is lit with a real mode and not mirroring"""
+    for monitor in monitors_data:
+        if monitor.get('name') == name:
+            return (
+                monitor.get('disabled', False) is not True
+                and monitor.get('width', 0) > 0
+                and monitor.get('mirrorOf', 'none') == 'none'
+            )
+    return False
+
+
+def _clear_omarchy_toggle() -> None:
+    """
+    Remove Omarchy's internal-display disable toggle if present.
+    Otherwise a reload re-applies "monitor=<name>,disable" and the laptop
+    panel stays off ("keyword monitor" cannot re-enable a disabled
+    connector afterwards).
+    """
+    omarchy_toggle = (
+        Path.home()
+        / ".local/state/omarchy/toggles/hypr/internal-monitor-disable.conf"
+    )
+    try:
+        omarchy_toggle.unlink()
+    except FileNotFoundError:
+        pass
+    except Exception:
+        pass
+
+
+def clear_mirror_state(
+    laptop: Optional[dict],
+    external: Optional[dict],
+    externals: Optional[list] = None,
+) -> dict:
+    """
+    Clear any existing mirror relationship and restore native monitor specs.
+    Returns refreshed monitor data after reload.
+    """
+    outputs = ([laptop] if laptop else []) + _externals(external, externals)
+    try:
+        # Disable every output to clear mirror state (one batch, one modeset)
+        disable = [f"keyword monitor {monitor['name']},disable" for monitor in reversed(outputs)]
+        hyprmode_ipc.batch(disable, check=False)
+        
+        # Wait until the outputs are actually off before reloading
+        names = [monitor['name'] for monitor in outputs]
+        hyprmode_ipc.wait_for_monitors(
+            lambda data: all(_monitor_disabled(data, name) for name in names)
+        )
+
+        _clear_omarchy_toggle()
+
+        # CRITICAL: Reload Hyprland config to restore native monitor settings
+        # (a config reload is the only reliable way to re-light a disabled
+        # connector - "hyprctl keyword monitor" no-ops on disabled outputs)
+        hyprmode_ipc.request("reload")
+        
+        # Wait for the reload to re-light the outputs, then RE-DETECT
+        # monitors from that state to get the restored native specs
+        settled = hyprmode_ipc.wait_for_monitors(
+            lambda data: all(_monitor_enabled(data, name) for name in names)
+        )
+        if settled is None:
+            return get_monitors()
+        return parse_monitors(settled)
+    
+    except Exception:
+        # If error, return original values
+        return {'laptop': laptop, 'external': external, 'externals': _externals(external, externals)}
+
+
+# Outputs each mode needs to have connected
+MODE_OUTPUTS = {
+    "laptop": ("laptop",),
+    "external": ("external",),
+    "extend": ("laptop", "external"),
+    "mirror": ("laptop", "external"),
+}
+
+MODE_NAMES = {
+    "laptop": "Laptop Only",
+    "external": "External Only",
+    "extend": "Extend",
+    "mirror": "Mirror",
+}
+
+
+def _externals(external: Optional[dict], externals: Optional[list]) -> list:
+    """All external outputs; callers that only know the first one pass just that"""
+    if externals is not None:
+        return externals
+    return [external] if external else []
+
+
+def _is_mirroring(monitor: Optional[dict]) -> bool:
+    return bool(monitor) and monitor.get('mirrorOf', 'none') not in ('none', '', None)
+
+
+def _is_lit(monitor: Optional[dict]) -> bool:
+    return bool(monitor) and not monitor.get('disabled', False) and monitor.get('width', 0) > 0
+
+
+def _workspace_ref(workspace: dict) -> Optional[str]:
+    """
+    How dispatchers name a workspace, or None for one not worth moving:
+    special (scratchpad) workspaces, and empty ones, which Hyprland
+    recreates wherever they are opened next.
+    """
+    name = str(workspace.get('name', ''))
+    if name.startswith("special") or workspace.get('windows', 1) == 0:
+        return None
+    # Named workspaces have negative ids
+    return str(workspace['id']) if workspace.get('id', 0) > 0 else f"name:{name}"
+
+
+def _query_workspaces() -> list:
+    """`workspaces` reply, or [] - workspace handling never fails a switch"""
+    try:
+        return hyprmode_ipc.request_json("workspaces")
+    except hyprmode_ipc.HyprlandIPCError:
+        return []
+
+
+def record_workspaces(outputs: list) -> dict:
+    """
+    Record which output each workspace is on for the display set of
+    `outputs` (parsed monitors, every connected one) and return it as
+    {workspace: connector}. A workspace recorded on an output that is
+    off or mirroring now keeps that record: it only sits elsewhere
+    because an earlier switch parked it there.
+    """
+    import hyprmode_profiles
+
+    workspaces = _query_workspaces()
+    if not workspaces:
+        return {}
+    key = hyprmode_profiles.display_set_key(outputs)
+    identities = {m['name']: hyprmode_profiles.identity(m) for m in outputs}
+    names = {identity: name for name, identity in identities.items()}
+    showing = {m['name'] for m in outputs if _is_lit(m) and not _is_mirroring(m)}
+    stored = hyprmode_profiles.load_workspaces(key)
+    
+    assignment = {}
+    for workspace in workspaces:
+        ref = _workspace_ref(workspace)
+        if ref is None:
+            continue
+        parked_from = names.get(stored.get(ref))
+        if parked_from and parked_from not in showing:
+            assignment[ref] = parked_from
+        else:
+            assignment[ref] = workspace.get('monitor')
+    
+    recorded = {ref: identities[name] for ref, name in assignment.items() if name in identities}
+    if recorded != stored:
+        hyprmode_profiles.save_workspaces(key, recorded)
+    return assignment
+
+
+def stored_workspaces(outputs: list) -> dict:
+    """The assignment record_workspaces() last saved for this display set, as {workspace: connector}"""
+    import hyprmode_profiles
+
+    names = {hyprmode_profiles.identity(m): m['name'] for m in outputs}
+    stored = hyprmode_profiles.load_workspaces(hyprmode_profiles.display_set_key(outputs))
+    return {ref: names[identity] for ref, identity in stored.items() if identity in names}
+
+
+def move_workspaces(placements: list, assignment: dict) -> list:
+    """
+    Move workspaces onto the outputs that show content in placements
+    (lit, not mirroring), all in one batch: each to its output in
+    assignment when that one shows content, otherwise off an output
+    that goes dark or mirrors onto the first one that does. Returns the
+    dispatches sent.
+    """
+    showing = [p['name'] for p in placements if not p['disabled'] and not p['mirror']]
+    if not assignment or not showing:
+        return []
+    
+    commands = []
+    for workspace in _query_workspaces():
+        ref = _workspace_ref(workspace)
+        if ref is None:
+            continue
+        current = workspace.get('monitor')
+        wanted = assignment.get(ref, current)
+        if wanted not in showing:
+            wanted = current if current in showing else showing[0]
+        if wanted != current:
+            commands.append(f"dispatch moveworkspacetomonitor {ref} {wanted}")
+    try:
+        hyprmode_ipc.batch(commands, check=False)
+    except hyprmode_ipc.HyprlandIPCError:
+        return []
+    return commands
+
+
+def restore_workspaces(monitors_data: list) -> list:
+    """Move workspaces back where they were recorded for this display set, in the current layout"""
+    monitors = parse_monitors(monitors_data)
+    outputs = ([monitors['laptop']] if monitors['laptop'] else []) + monitors['externals']
+    return move_workspaces(hyprmode_layout.current(outputs), stored_workspaces(outputs))
+
+
+def plan_mode(
+    mode: str,
+    laptop: Optional[dict],
+    external: Optional[dict],
+    externals: Optional[list] = None,
+    direction: str = "right",
+) -> dict:
+    """
+    Compute the minimal steps from the current monitor state to `mode`
+    (laid out by hyprmode_layout; direction only matters for extend).
+    Returns {'mode', 'direction', 'reload', 'reason', 'commands'}. The
+    disable + reload cycle (clear_mirror_state) is only planned when a
+    mirror relationship has to be undone or a needed output is disabled -
+    "keyword monitor" cannot re-light a disabled connector. With
+    reload=True the commands are provisional: they are recompiled from
+    the specs after the reload.
+    """
+    externals = _externals(external, externals)
+    current = {monitor['name']: monitor for monitor in ([laptop] if laptop else []) + externals}
+    target = hyprmode_layout.compute(mode, laptop, externals, direction)
+    wanted_mirrors = {p['name']: p['mirror'] for p in target if not p['disabled'] and p['mirror']}
+    
+    reason = None
+    for monitor in current.values():
+        if _is_mirroring(monitor) and wanted_mirrors.get(monitor['name']) != monitor['mirrorOf']:
+            reason = f"{monitor['name']} is mirroring {monitor['mirrorOf']}"
+            break
+    if reason is None:
+        for placement in target:
+            if not placement['disabled'] and not _is_lit(current[placement['name']]):
+                reason = f"{placement['name']} is disabled"
+                break
+    
+    plan = {'mode': mode, 'direction': direction, 'reload': reason is not None, 'reason': reason}
+    if reason is not None:
+        plan['commands'] = hyprmode_layout.commands(target)
+        return plan
+    
+    changed = []
+    for placement in target:
+        monitor = current[placement['name']]
+        if placement['disabled']:
+            if _is_lit(monitor):
+                changed.append(placement)
+        elif placement['mirror']:
+            if monitor.get('mirrorOf') != placement['mirror']:
+                changed.append(placement)
+        elif (monitor['x'], monitor['y']) != (placement['x'], placement['y']):
+            changed.append(placement)
+    
+    # A new mirror needs its source (re)configured ahead of it
+    sources = {p['mirror'] for p in changed if not p['disabled'] and p['mirror']}
+    changed = [p for p in target if p['name'] in sources and p not in changed] + changed
+    
+    plan['commands'] = hyprmode_layout.commands(changed)
+    return plan
+
+
+def layout_snapshot(monitors: dict) -> list:
+    """Placements that put parsed monitors back the way they are now (see restore_layout)"""
+    return hyprmode_layout.current(([monitors['laptop']] if monitors['laptop'] else []) + monitors['externals'])
+
+
+def verify_layout(placements: list, monitors_data: list) -> list:
+    """
+    How the outputs in a `monitors all` reply differ from placements, as
+    short descriptions; empty once the layout has taken effect. Outputs
+    missing from the reply count as off (older Hyprland lists only the
+    enabled ones).
+    """
+    actual = {monitor.get('name'): monitor for monitor in monitors_data}
+    problems = []
+    for placement in placements:
+        name = placement['name']
+        monitor = actual.get(name)
+        if placement['disabled']:
+            if _is_lit(monitor):
+                problems.append(f"{name} is still on")
+            continue
+        if not _is_lit(monitor):
+            problems.append(f"{name} is off")
+            continue
+        if placement['mirror'] and mirror_source(monitor, monitors_data) != placement['mirror']:
+            problems.append(f"{name} is not mirroring {placement['mirror']}")
+        if (
+            (monitor['width'], monitor['height']) != (placement['width'], placement['height'])
+            or abs(monitor.get('refreshRate', 0.0) - placement['refreshRate']) > REFRESH_TOLERANCE
+        ):
+            problems.append(
+                f"{name} runs {monitor['width']}x{monitor['height']}@{monitor.get('refreshRate', 0.0):g}Hz, "
+                f"not {placement['width']}x{placement['height']}@{placement['refreshRate']:g}Hz"
+            )
+        if placement.get('vrr') and monitor.get('vrr') is False:
+            problems.append(f"{name} lost adaptive sync (VRR)")
+        if abs(monitor.get('scale', 1.0) - placement['scale']) > 0.01:
+            problems.append(f"{name} has scale {monitor.get('scale')}, not {placement['scale']}")
+        if not placement['mirror'] and (monitor.get('x'), monitor.get('y')) != (placement['x'], placement['y']):
+            problems.append(f"{name} is at {monitor.get('x')}x{monitor.get('y')}, not {placement['x']}x{placement['y']}")
+    return problems
+
+
+def _wait_verified(placements: list, events: "hyprmode_ipc.EventStream") -> list:
+    """
+    Wait until the outputs match placements (see verify_layout), checking
+    again on every output event and polling in between. Returns what
+    still differs after SETTLE_TIMEOUT, or [] once the layout is in place.
+    """
+    settled = hyprmode_ipc.wait_for_monitors(
+        lambda data: not verify_layout(placements, data), events=events
+    )
+    if settled is not None:
+        return []
+    return verify_layout(placements, _query_all_monitors())
+
+
+def execute_plan(
+    plan: dict,
+    laptop: Optional[dict],
+    external: Optional[dict],
+    profile: Optional[dict] = None,
+    externals: Optional[list] = None,
+    remember: bool = True,
+) -> dict:
+    """
+    Run a plan from plan_mode() as one transaction: the current layout
+    is captured first, and if the outputs do not reach the planned
+    layout (verify_layout) within SETTLE_TIMEOUT, it is restored and
+    RuntimeError raised. It is also restored when Hyprland rejects a
+    command in the batch or stops answering, and the IPC error re-raised. Returns the monitor specs the applied commands
+    were compiled from (restored specs if a reload was needed, with the
+    profile's per-display specs on top when one is given).
+    The mode is remembered as the profile of the connected display set
+    unless `remember` is False (switches the user did not choose).
+    """
+    import hyprmode_profiles
+
+    externals = _externals(external, externals)
+    previous = layout_snapshot({'laptop': laptop, 'externals': externals})
+    commands = plan['commands']
+    # Where each workspace belongs, before anything moves them
+    workspaces = record_workspaces(([laptop] if laptop else []) + externals) if commands else {}
+    if plan['reload']:
+        # Clear mirror state and get refreshed monitor specs
+        monitors = clear_mirror_state(laptop, external, externals)
+        laptop = monitors['laptop']
+        externals = monitors['externals']
+    if profile:
+        laptop = hyprmode_profiles.with_stored_spec(laptop, profile)
+        externals = [hyprmode_profiles.with_stored_spec(m, profile) for m in externals]
+    target = hyprmode_layout.compute(plan['mode'], laptop, externals, plan['direction'])
+    if plan['reload']:
+        commands = hyprmode_layout.commands(target)
+    
+    if commands:
+        # Subscribed before the batch so no event can slip past the wait
+        events = hyprmode_ipc.EventStream(SWITCH_EVENTS)
+        events.connect()
+        try:
+            try:
+                # Off outputs that go dark ourselves, in one batch, rather
+                # than one by one in whatever order Hyprland picks; back
+                # onto outputs that come back
+                move_workspaces(target, workspaces)
+                hyprmode_ipc.batch(commands)
+                problems = _wait_verified(target, events)
+            except hyprmode_ipc.HyprlandIPCError:
+                # Rules ahead of a rejected one are applied already
+                restore_layout(previous, get_monitors())
+                raise
+        finally:
+            events.close()
+        if problems:
+            restore_layout(previous, get_monitors())
+            raise RuntimeError(
+                f"{MODE_NAMES[plan['mode']]} did not take effect ({'; '.join(problems)}) - "
+                "restored the previous layout"
+            )
+    
+    # Monitors in the daemon's snapshot are outdated now; readers fall
+    # back to live queries until the daemon publishes the new state
+    update_snapshot(last_mode=plan['mode'], monitors=None)
+    
+    if not remember:
+        return {'laptop': laptop, 'external': externals[0] if externals else None, 'externals': externals}
+    try:
+        hyprmode_profiles.save(_query_all_monitors(), plan['mode'], [laptop] + externals, plan['direction'])
+    except hyprmode_ipc.HyprlandIPCError:
+        pass  # Applied fine; only the profile is not updated
+    return {'laptop': laptop, 'external': externals[0] if externals else None, 'externals': externals}
+
+
+def apply_profile(profile: dict, monitors_data: list) -> Optional[dict]:
+    """
+    Switch to a stored profile (hyprmode_profiles) for the displays in
+    monitors_data, with each display's remembered resolution, refresh
+    rate and scale. Returns the executed plan, or None if the profile's
+    mode needs an output that is not connected.
+    """
+    import hyprmode_profiles
+
+    mode = profile.get('mode')
+    direction = profile.get('direction', "right")
+    monitors = parse_monitors(monitors_data)
+    if mode not in MODE_OUTPUTS or not all(monitors[role] for role in MODE_OUTPUTS[mode]):
+        return None
+    laptop, externals = monitors['laptop'], monitors['externals']
+    
+    plan = plan_mode(mode, laptop, None, externals, direction)
+    if not plan['reload']:
+        # plan_mode() only diffs the arrangement; also resend the layout
+        # when a display came up with different specs than remembered
+        wanted_laptop = hyprmode_profiles.with_stored_spec(laptop, profile)
+        wanted_externals = [hyprmode_profiles.with_stored_spec(m, profile) for m in externals]
+        if [wanted_laptop] + wanted_externals != [laptop] + externals:
+            plan['commands'] = hyprmode_layout.commands(
+                hyprmode_layout.compute(mode, wanted_laptop, wanted_externals, direction)
+            )
+    
+    execute_plan(plan, laptop, None, profile, externals)
+    return plan
+
+
+def restore_layout(placements: list, monitors: dict) -> list:
+    """
+    Put back an arrangement captured with hyprmode_layout.current(),
+    and the workspaces recorded for it (record_workspaces). Outputs that
+    are off now but lit in the arrangement need a reload first;
+    placements for outputs that are no longer connected are skipped.
+    Returns the commands sent.
+    """
+    outputs = {m['name']: m for m in ([monitors['laptop']] if monitors['laptop'] else []) + monitors['externals']}
+    placements = [p for p in placements if p['name'] in outputs]
+    if all(p['disabled'] for p in placements):
+        return []  # never restore a layout with nothing lit
+    
+    relight = [p['name'] for p in placements if not p['disabled'] and not _is_lit(outputs[p['name']])]
+    if relight:
+        _clear_omarchy_toggle()
+        hyprmode_ipc.request("reload")
+        hyprmode_ipc.wait_for_monitors(
+            lambda data: all(_monitor_enabled(data, name) for name in relight)
+        )
+    
+    commands = hyprmode_layout.commands(placements)
+    hyprmode_ipc.batch(commands)
+    move_workspaces(placements, stored_workspaces(list(outputs.values())))
+    update_snapshot(monitors=None)
+    return commands
+
+
+def format_plan(plan: dict) -> str:
+    """Human-readable plan, as printed by --dry-run"""
+    title = MODE_NAMES[plan['mode']]
+    if plan['mode'] == "extend":
+        title += f" (externals {plan['direction']} of the laptop)"
+    lines = [f"Plan for {title}:"]
+    if plan['reload']:
+        lines.append(f"  1. disable outputs + reload config ({plan['reason']})")
+        lines.append("  2. batch (recompiled from the restored specs):")
+    elif plan['commands']:
+        lines.append("  1. batch:")
+    else:
+        lines.append("  nothing to do - already in this mode")
+    lines.extend(f"       {command}" for command in plan['commands'])
+    return "\n".join(lines)
+
+
+def format_monitor(role: str, monitor: Optional[dict]) -> str:
+    if not monitor:
+        return f"{role}: None"
+    state = "disabled" if monitor['disabled'] else f"at {monitor['x']}x{monitor['y']}"
+    if monitor['mirrorOf'] not in ('none', '', None):
+        state += f", mirroring {monitor['mirrorOf']}"
+    return (
+        f"{role}: {monitor['name']} "
+        f"({monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.0f}Hz, {state})"
+    )
+
+
+def format_status(monitors: dict, lid_state: str, as_json: bool = False) -> str:
+    """`hyprmode status` output for parsed monitors and a lid state"""
+    mode = detect_mode(monitors['laptop'], monitors['external'], monitors['externals'])
+    if as_json:
+        return json.dumps({
+            'mode': mode,
+            'lid': lid_state,
+            'laptop': monitors['laptop'],
+            'external': monitors['external'],
+            'externals': monitors['externals'],
+        })
+    lines = [f"Lid State: {lid_state.upper()}", format_monitor("Laptop", monitors['laptop'])]
+    lines.extend(format_monitor("External", external) for external in monitors['externals'] or [None])
+    lines.append(f"Mode: {MODE_NAMES.get(mode, 'Custom')}")
+    return "\n".join(lines)
+
+
+def missing_outputs(mode: str, monitors: dict) -> Optional[str]:
+    """Error message if an output the mode needs is not connected, else None"""
+    missing = [role for role in MODE_OUTPUTS[mode] if not monitors[role]]
+    if not missing:
+        return None
+    if "laptop" in missing:
+        return "Laptop display not detected. Try: hyprctl reload"
+    return "No external monitor detected"
+
+
+def apply_laptop_only(
+    laptop: Optional[dict],
+    external: Optional[dict],
+    externals: Optional[list] = None,
+) -> None:
+    """Disable all externals, enable laptop"""
+    if not laptop:
+        raise RuntimeError("Laptop monitor not detected - cannot enable")
+    
+    try:
+        plan = plan_mode("laptop", laptop, external, externals)
+        execute_plan(plan, laptop, external, externals=externals)
+        send_notification("Switched to Laptop Only mode")
+    except hyprmode_ipc.HyprlandCommandError as e:
+        raise RuntimeError(f"Failed to apply laptop only mode: {e}")
+    except hyprmode_ipc.HyprlandTimeout:
+        raise RuntimeError("Command timed out while applying mode")
+
+
+def apply_external_only(
+    laptop: Optional[dict],
+    external: dict,
+    externals: Optional[list] = None,
+) -> None:
+    """Disable laptop, enable all externals side by side"""
+    if not external:
+        raise RuntimeError("External monitor not detected - cannot enable")
+    
+    try:
+        plan = plan_mode("external", laptop, external, externals)
+        execute_plan(plan, laptop, external, externals=externals)
+        send_notification("Switched to External Only mode")
+    except hyprmode_ipc.HyprlandCommandError as e:
+        raise RuntimeError(f"Failed to apply external only mode: {e}")
+    except hyprmode_ipc.HyprlandTimeout:
+        raise RuntimeError("Command timed out while applying mode")
+
+
+def apply_extend(
+    laptop: Optional[dict],
+    external: dict,
+    externals: Optional[list] = None,
+    direction: str = "right",
+) -> None:
+    """Enable all, externals chained to the right (or left/above) of the laptop"""
+    if not laptop:
+        raise RuntimeError("Laptop monitor not detected - cannot enable")
+    if not external:
+        raise RuntimeError("External monitor not detected - cannot extend")
+    
+    try:
+        plan = plan_mode("extend", laptop, external, externals, direction)
+        execute_plan(plan, laptop, external, externals=externals)
+        send_notification("Switched to Extend mode")
+    except hyprmode_ipc.HyprlandCommandError as e:
+        raise RuntimeError(f"Failed to apply extend mode: {e}")
+    except hyprmode_ipc.HyprlandTimeout:
+        raise RuntimeError("Command timed out while applying mode")
+
+
+def apply_mirror(
+    laptop: Optional[dict],
+    external: dict,
+    externals: Optional[list] = None,
+) -> None:
+    """Enable all displays with the laptop's content (mirror mode)"""
+    if not laptop:
+        raise RuntimeError("Laptop monitor not detected - cannot enable")
+    if not external:
+        raise RuntimeError("External monitor not detected - cannot mirror")
+    
+    try:
+        plan = plan_mode("mirror", laptop, external, externals)
+        monitors = execute_plan(plan, laptop, external, externals=externals)
+        modes = hyprmode_layout.solve_mirror([monitors['laptop']] + monitors['externals'])
+        if modes:
+            width, height, refresh = modes[monitors['laptop']['name']]
+            send_notification(f"Mirror mode applied - using {width}x{height}@{refresh:g}Hz")
+        else:
+            send_notification("Mirror mode applied - scaled, the displays share no resolution")
+    except hyprmode_ipc.HyprlandCommandError as e:
+        raise RuntimeError(f"Failed to apply mirror mode: {e}")
+    except hyprmode_ipc.HyprlandTimeout:
+        raise RuntimeError("Command timed out while applying mode")
+
+
+APPLY_MODE = {
+    "laptop": apply_laptop_only,
+    "external": apply_external_only,
+    "extend": apply_extend,
+    "mirror": apply_mirror,
+}
+
+
+def apply_mode(mode: str, monitors: dict, direction: str = "right") -> None:
+    """Switch parsed monitors to a mode (raises RuntimeError on failure)"""
+    laptop, external, externals = monitors['laptop'], monitors['external'], monitors['externals']
+    if mode == "extend":
+        apply_extend(laptop, external, externals, direction)
+    else:
+        APPLY_MODE[mode](laptop, external, externals)
+
+
+def detect_mode(
+    laptop: Optional[dict],
+    external: Optional[dict],
+    externals: Optional[list] = None,
+) -> Optional[str]:
+    """Name of the mode the monitors are currently in, or None for a custom layout"""
+    current = {'laptop': laptop, 'external': external}
+    for mode in MODE_OUTPUTS:
+        if not all(current[role] for role in MODE_OUTPUTS[mode]):
+            continue
+        directions = hyprmode_layout.DIRECTIONS if mode == "extend" else ("right",)
+        for direction in directions:
+            plan = plan_mode(mode, laptop, external, externals, direction)
+            if not plan['reload'] and not plan['commands']:
+                return mode
+    return None
@@ -0,0 +1,478 @@
+"""
+hyprmode_ipc - In-process client for Hyprland's IPC sockets
+
+Shared by hyprmode and hyprmode-daemon so neither has to fork `hyprctl`
+for every query. Two sockets live in the instance directory
+($XDG_RUNTIME_DIR/hypr/$HYPRLAND_INSTANCE_SIGNATURE):
+
+- .socket.sock  - request socket: one command per connection, the reply
+                  is everything read until Hyprland closes it
+- .socket2.sock - event socket: newline-delimited "EVENT>>DATA" stream
+
+request_async(), batch_async(), wait_for_monitors_async() and
+AsyncEventStream are the asyncio counterparts used by hyprmode-daemon;
+asyncio is only imported once they are called.
+"""
+
+import glob
+import json
+import os
+import select
+import socket
+import time
+from typing import Callable, Iterator, Optional
+
+
+DEFAULT_TIMEOUT = 5.0  # seconds - same budget the hyprctl calls used
+BATCH_DELIMITER = "\n\n\n"  # separates per-command replies to a [[BATCH]] request
+SETTLE_TIMEOUT = 2.0  # seconds - upper bound for the compositor to apply a change
+
+
+class HyprlandIPCError(RuntimeError):
+    """Base class for Hyprland IPC failures"""
+
+
+class HyprlandNotRunning(HyprlandIPCError):
+    """No Hyprland instance socket could be found or connected to"""
+
+
+class HyprlandTimeout(HyprlandIPCError):
+    """Hyprland did not answer before the call's deadline"""
+
+
+class HyprlandCommandError(HyprlandIPCError):
+    """Hyprland answered, but rejected the command or sent garbage"""
+
+
+_instance_dir: Optional[str] = None
+
+# Called as request_observer(command, seconds, error) after every request();
+# error is None on success. hyprmode-daemon sets it to record IPC latency.
+request_observer: Optional[Callable[[str, float, Optional[Exception]], None]] = None
+
+
+def find_instance_dir(refresh: bool = False) -> Optional[str]:
+    """
+    Locate the socket directory of the running Hyprland instance.
+    The result is cached; pass refresh=True after a connection failure
+    (Hyprland may have restarted under a new signature).
+    """
+    global _instance_dir
+    if _instance_dir is not None and not refresh:
+        return _instance_dir
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+
+    if signature:
+        candidates = [
+            os.path.join(runtime_dir, "hypr", signature),
+            os.path.join("/tmp/hypr", signature),  # Hyprland < 0.40
+        ]
+    else:
+        # systemd user services don't always inherit the instance signature;
+        # fall back to the most recently started instance.
+        def started(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        candidates = sorted(
+            (os.path.dirname(p) for p in glob.glob(os.path.join(runtime_dir, "hypr", "*", ".socket.sock"))),
+            key=started,
+            reverse=True,
+        )
+
+    _instance_dir = next(
+        (c for c in candidates if os.path.exists(os.path.join(c, ".socket.sock"))),
+        None,
+    )
+    return _instance_dir
+
+
+def _connect(name: str, timeout: Optional[float]) -> socket.socket:
+    """Connect to one of the instance sockets, retrying discovery once"""
+    for refresh in (False, True):
+        instance = find_instance_dir(refresh=refresh)
+        if instance is None:
+            continue
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(os.path.join(instance, name))
+            return sock
+        except socket.timeout:
+            sock.close()
+            raise HyprlandTimeout(f"Timed out connecting to Hyprland {name}")
+        except OSError:
+            sock.close()
+
+    raise HyprlandNotRunning("Hyprland IPC socket not found - is Hyprland running?")
+
+
+def request(command: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """
+    Send one raw command (e.g. "j/monitors all", "keyword monitor eDP-1,disable")
+    and return Hyprland's reply. The whole exchange must finish within
+    timeout seconds or HyprlandTimeout is raised.
+    """
+    if request_observer is None:
+        return _request(command, timeout)
+
+    start = time.monotonic()
+    error = None
+    try:
+        return _request(command, timeout)
+    except HyprlandIPCError as e:
+        error = e
+        raise
+    finally:
+        request_observer(command, time.monotonic() - start, error)
+
+
+def _request(command: str, timeout: float) -> str:
+    deadline = time.monotonic() + timeout
+    sock = _connect(".socket.sock", timeout)
+    try:
+        sock.sendall(command.encode("utf-8"))
+
+        chunks = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HyprlandTimeout(f"Hyprland did not answer '{command}' within {timeout}s")
+            sock.settimeout(remaining)
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except socket.timeout:
+        raise HyprlandTimeout(f"Hyprland did not answer '{command}' within {timeout}s")
+    except OSError as e:
+        raise HyprlandIPCError(f"Hyprland IPC request '{command}' failed: {e}")
+    finally:
+        sock.close()
+
+    return b"".join(chunks).decode("utf-8", "replace")
+
+
+async def _open_async(name: str, limit: int = 2 ** 16):
+    """asyncio streams for one of the instance sockets, retrying discovery once"""
+    import asyncio
+
+    for refresh in (False, True):
+        instance = find_instance_dir(refresh=refresh)
+        if instance is None:
+            continue
+        try:
+            return await asyncio.open_unix_connection(os.path.join(instance, name), limit=limit)
+        except OSError:
+            continue
+
+    raise HyprlandNotRunning("Hyprland IPC socket not found - is Hyprland running?")
+
+
+async def request_async(command: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """request() for asyncio callers: same errors and observer, no thread"""
+    import asyncio
+
+    start = time.monotonic()
+    error = None
+    try:
+        return await asyncio.wait_for(_request_async(command), timeout)
+    except asyncio.TimeoutError:
+        error = HyprlandTimeout(f"Hyprland did not answer '{command}' within {timeout}s")
+        raise error from None
+    except HyprlandIPCError as e:
+        error = e
+        raise
+    finally:
+        if request_observer is not None:
+            request_observer(command, time.monotonic() - start, error)
+
+
+async def _request_async(command: str) -> str:
+    reader, writer = await _open_async(".socket.sock")
+    try:
+        writer.write(command.encode("utf-8"))
+        await writer.drain()
+        reply = await reader.read()
+    except OSError as e:
+        raise HyprlandIPCError(f"Hyprland IPC request '{command}' failed: {e}")
+    finally:
+        writer.close()
+    return reply.decode("utf-8", "replace")
+
+
+async def request_json_async(command: str, timeout: float = DEFAULT_TIMEOUT):
+    """request_json() for asyncio callers"""
+    reply = await request_async(f"j/{command}", timeout=timeout)
+    try:
+        return json.loads(reply)
+    except json.JSONDecodeError:
+        raise HyprlandCommandError(f"'{command}' did not return JSON: {reply.strip()[:200]}")
+
+
+def request_json(command: str, timeout: float = DEFAULT_TIMEOUT):
+    """Send a query with the JSON flag (j/) and return the decoded reply"""
+    reply = request(f"j/{command}", timeout=timeout)
+    try:
+        return json.loads(reply)
+    except json.JSONDecodeError:
+        raise HyprlandCommandError(f"'{command}' did not return JSON: {reply.strip()[:200]}")
+
+
+def batch(commands: list, timeout: float = DEFAULT_TIMEOUT, check: bool = True) -> list:
+    """
+    Send several commands in one round trip using the [[BATCH]] form.
+    Hyprland runs them in order and coalesces the resulting monitor
+    reconfiguration, so a whole mode switch costs a single modeset.
+    Returns the non-empty replies, stripped; trailing separators and
+    empty replies, which some Hyprland versions add, are dropped. With
+    check=True a reply other than "ok" raises HyprlandCommandError,
+    naming the command that failed when the replies line up with them.
+    """
+    if not commands:
+        return []
+    reply = request("[[BATCH]]" + ";".join(commands), timeout=timeout)
+    return _batch_replies(commands, reply, check)
+
+
+async def batch_async(commands: list, timeout: float = DEFAULT_TIMEOUT, check: bool = True) -> list:
+    """batch() for asyncio callers"""
+    if not commands:
+        return []
+    reply = await request_async("[[BATCH]]" + ";".join(commands), timeout=timeout)
+    return _batch_replies(commands, reply, check)
+
+
+def _batch_replies(commands: list, reply: str, check: bool) -> list:
+    replies = [result.strip() for result in reply.split(BATCH_DELIMITER)]
+    replies = [result for result in replies if result]
+    if check:
+        failures = rejected(commands, replies)
+        if failures:
+            raise HyprlandCommandError(failures[0])
+    return replies
+
+
+def rejected(commands: list, replies: list) -> list:
+    """
+    "command: reply" for each batch reply other than "ok". When the
+    replies do not line up with the commands, the reply is named by its
+    position instead.
+    """
+    if len(replies) == len(commands):
+        return [f"{command}: {result}" for command, result in zip(commands, replies) if result != "ok"]
+    return [
+        f"Batch reply {index + 1} of {len(replies)}: {result[:200]}"
+        for index, result in enumerate(replies) if result != "ok"
+    ]
+
+
+def backoff(deadline: float) -> Iterator[float]:
+    """
+    Pauses between polls until the time.monotonic() deadline: 5ms,
+    growing by half each time up to 25ms, cut short at the deadline
+    """
+    delay = 0.005
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(delay, remaining)
+        delay = min(delay * 1.5, 0.025)
+
+
+def wait_for_monitors(
+    predicate,
+    timeout: float = SETTLE_TIMEOUT,
+    events: Optional["EventStream"] = None,
+) -> Optional[list]:
+    """
+    Poll "monitors all" until predicate(monitors) is true, backing off
+    from 5ms to 25ms between polls. Returns the monitor list that
+    satisfied the predicate, or None if the deadline passed first -
+    callers then carry on with whatever state Hyprland reached.
+
+    With a connected EventStream, a matching event ends the pause
+    between polls early, so changes Hyprland announces are seen at once.
+    """
+    deadline = time.monotonic() + timeout
+    command = "monitors all"
+    pauses = backoff(deadline)
+
+    while True:
+        try:
+            monitors = request_json(command, timeout=max(deadline - time.monotonic(), 0.05))
+            if predicate(monitors):
+                return monitors
+        except HyprlandCommandError:
+            if command == "monitors all":
+                # Older Hyprland without "all": disabled outputs just vanish
+                command = "monitors"
+                continue
+        except HyprlandTimeout:
+            return None
+
+        pause = next(pauses, None)
+        if pause is None:
+            return None
+        if events is not None and events.connected:
+            events.wait(pause)
+        else:
+            time.sleep(pause)
+
+
+async def wait_for_monitors_async(
+    predicate,
+    timeout: float = SETTLE_TIMEOUT,
+    query_timeout: float = DEFAULT_TIMEOUT,
+) -> Optional[list]:
+    """
+    wait_for_monitors() for asyncio callers, polling "monitors all" with
+    the same backoff. A query that fails, or takes longer than
+    query_timeout, counts as not there yet.
+    """
+    import asyncio
+
+    deadline = time.monotonic() + timeout
+    pauses = backoff(deadline)
+
+    while True:
+        try:
+            monitors = await request_json_async(
+                "monitors all", timeout=max(min(deadline - time.monotonic(), query_timeout), 0.05)
+            )
+            if predicate(monitors):
+                return monitors
+        except HyprlandIPCError:
+            pass
+
+        pause = next(pauses, None)
+        if pause is None:
+            return None
+        await asyncio.sleep(pause)
+
+
+class EventStream:
+    """Reader for Hyprland's socket2 event stream.
+
+    Only events named in `events` are reported (all events if None);
+    everything else is read and discarded so callers never wake up for
+    unrelated traffic such as focus changes.
+    """
+
+    def __init__(self, events: Optional[set] = None):
+        self.events = events
+        self.sock: Optional[socket.socket] = None
+        self._buffer = b""
+
+    @property
+    def connected(self) -> bool:
+        return self.sock is not None
+
+    def connect(self) -> bool:
+        """Connect to socket2. Returns False if it is not available."""
+        try:
+            sock = _connect(".socket2.sock", DEFAULT_TIMEOUT)
+        except HyprlandIPCError:
+            return False
+        sock.settimeout(None)
+
+        self.sock = sock
+        self._buffer = b""
+        return True
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        self._buffer = b""
+
+    def wait(self, timeout: float) -> list:
+        """
+        Block until a matching event arrives or timeout seconds pass.
+        Returns the matching events received as (name, data) tuples,
+        empty on timeout. Closes the stream if Hyprland hangs up.
+        """
+        if self.sock is None:
+            time.sleep(timeout)
+            return []
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+
+            ready, _, _ = select.select([self.sock], [], [], remaining)
+            if not ready:
+                return []
+
+            try:
+                chunk = self.sock.recv(4096)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                # Hyprland exited or restarted - caller reconnects
+                self.close()
+                return []
+
+            self._buffer += chunk
+            *lines, self._buffer = self._buffer.split(b"\n")
+
+            events = []
+            for line in lines:
+                name, _, data = line.decode("utf-8", "replace").partition(">>")
+                if self.events is None or name in self.events:
+                    events.append((name, data))
+            if events:
+                return events
+
+
+class AsyncEventStream:
+    """EventStream for asyncio callers: read() awaits the next matching event."""
+
+    def __init__(self, events: Optional[set] = None):
+        self.events = events
+        self.reader = None
+        self.writer = None
+
+    @property
+    def connected(self) -> bool:
+        return self.reader is not None
+
+    async def connect(self) -> bool:
+        """Connect to socket2. Returns False if it is not available."""
+        try:
+            # Event lines carry window titles; allow long ones
+            self.reader, self.writer = await _open_async(".socket2.sock", limit=2 ** 20)
+        except HyprlandIPCError:
+            return False
+        return True
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def read(self) -> Optional[tuple]:
+        """
+        The next matching event as a (name, data) tuple, or None once
+        Hyprland hangs up (the stream is closed; call connect() again).
+        """
+        while self.reader is not None:
+            try:
+                line = await self.reader.readline()
+            except (OSError, ValueError):
+                line = b""
+            if not line.endswith(b"\n"):
+                self.close()
+                return None
+            name, _, data = line[:-1].decode("utf-8", "replace").partition(">>")
+            if self.events is None or name in self.events:
+                return name, data
+        return None
@@ -0,0 +1,255 @@
+"""
+hyprmode_layout - Output layouts for any number of monitors
+
+Turns a display mode into one placement per output and compiles the
+placements into `keyword monitor` rules for a single IPC batch:
+
+- laptop    laptop at 0x0, every external disabled
+- external  all externals chained left to right, laptop disabled
+- extend    laptop plus all externals chained to its right, left or above
+- mirror    every external mirrors the laptop (one mirror group), all
+            at the largest resolution and rate they share (solve_mirror)
+
+Modes are written exactly as the output advertises them, and outputs
+running with adaptive sync (VRR) keep it. Positions are computed from
+each output's logical size (resolution
+divided by scale, swapped for 90/270 degree transforms) instead of
+relying on auto-right, so the result does not depend on the order in
+which Hyprland applies the rules. No IPC and no state.
+"""
+
+from typing import Optional
+
+
+DIRECTIONS = ("right", "left", "above")
+SHARED_REFRESH_TOLERANCE = 0.5  # Hz - mirrored outputs at 59.94 and 60 share a rate
+
+
+def logical_size(monitor: dict) -> tuple:
+    """Size in layout coordinates: pixels divided by scale, rotated by transform"""
+    scale = monitor.get('scale') or 1.0
+    width = round(monitor['width'] / scale)
+    height = round(monitor['height'] / scale)
+    if monitor.get('transform', 0) % 2:
+        width, height = height, width
+    return width, height
+
+
+def running_rate(monitor: dict, width: int, height: int, refresh: float) -> float:
+    """
+    refresh, or the monitor's full-precision refreshRate when refresh is
+    the mode it runs as availableModes prints it (rounded to 2 decimals)
+    """
+    if (monitor['width'], monitor['height']) == (width, height) and f"{monitor['refreshRate']:.2f}" == f"{refresh:.2f}":
+        return monitor['refreshRate']
+    return refresh
+
+
+def mode_string(monitor: dict) -> str:
+    """
+    WIDTHxHEIGHT@REFRESH for a monitor rule, for the advertised mode
+    closest to the monitor's refresh rate (within 1Hz) so Hyprland
+    matches it exactly. availableModes prints rates to 2 decimals, so
+    the mode the monitor runs is written with its full-precision
+    refreshRate: 143.998Hz stays 143.998, not 144.00. Other advertised
+    modes are copied as printed; without a matching entry the rate is
+    written out in full.
+    """
+    width, height, refresh = monitor['width'], monitor['height'], monitor['refreshRate']
+    best = None
+    for mode in monitor.get('availableModes') or []:
+        try:
+            advertised = parse_mode(mode)
+        except ValueError:
+            continue
+        distance = abs(advertised[2] - refresh)
+        if advertised[:2] == (width, height) and distance <= 1.0 and (best is None or distance < best[0]):
+            best = (distance, mode)
+    if best is not None:
+        if running_rate(monitor, width, height, parse_mode(best[1])[2]) == refresh:
+            return f"{width}x{height}@{refresh:.3f}"
+        return best[1][:-2] if best[1].endswith("Hz") else best[1]
+    return f"{width}x{height}@{refresh:g}"
+
+
+def _placed(monitor: dict, x: int, y: int, mirror: Optional[str] = None) -> dict:
+    mode = mode_string(monitor)
+    return {
+        'name': monitor['name'],
+        'width': monitor['width'],
+        'height': monitor['height'],
+        'refreshRate': parse_mode(mode)[2],  # the rate asked for, as verify_layout expects it
+        'mode': mode,
+        'scale': monitor['scale'],
+        'vrr': monitor.get('vrr') is True,
+        'x': x,
+        'y': y,
+        'mirror': mirror,
+        'disabled': False,
+    }
+
+
+def _disabled(monitor: dict) -> dict:
+    return {'name': monitor['name'], 'disabled': True}
+
+
+def chain(monitors: list, direction: str = "right") -> list:
+    """
+    Place monitors side by side, each one `direction` of the previous,
+    top-aligned for left/right and centred for above. The result is
+    shifted so the layout starts at 0x0.
+    """
+    placements = []
+    offset = 0
+    for monitor in monitors:
+        width, height = logical_size(monitor)
+        if direction == "right":
+            placements.append(_placed(monitor, offset, 0))
+            offset += width
+        elif direction == "left":
+            offset -= width
+            placements.append(_placed(monitor, offset, 0))
+        elif direction == "above":
+            offset -= height
+            placements.append(_placed(monitor, -width // 2, offset))
+        else:
+            raise ValueError(f"unknown direction: {direction}")
+
+    if placements:
+        min_x = min(p['x'] for p in placements)
+        min_y = min(p['y'] for p in placements)
+        for placement in placements:
+            placement['x'] -= min_x
+            placement['y'] -= min_y
+    return placements
+
+
+def parse_mode(mode: str) -> tuple:
+    """An availableModes entry as (width, height, refresh): '2560x1440@144.00Hz' -> (2560, 1440, 144.0)"""
+    size, _, refresh = mode.partition("@")
+    width, height = size.split("x")
+    return int(width), int(height), float(refresh.rstrip("Hz") or 0)
+
+
+def solve_mirror(outputs: list) -> Optional[dict]:
+    """
+    The mode each output runs while mirroring: one resolution and refresh
+    rate for all of them, the largest resolution every output advertises
+    in availableModes at the highest rate they all have for it (rates
+    within SHARED_REFRESH_TOLERANCE count as one, e.g. 59.94 and 60).
+    Each output gets that rate as it advertises it (in full precision for
+    the mode it runs, see running_rate), so the mode is still written
+    exactly. Returns {name: (width, height, refresh)}, or None
+    when they share no resolution (or an output advertises no modes) -
+    then every output keeps its own mode and Hyprland scales the mirrors.
+    A shared resolution without a shared rate runs every output at the
+    rate closest to the slowest one's best.
+    """
+    rates = []  # per output: {(width, height): [refresh, ...]}
+    for monitor in outputs:
+        sizes = {}
+        for mode in monitor.get('availableModes') or []:
+            try:
+                width, height, refresh = parse_mode(mode)
+            except ValueError:
+                continue
+            sizes.setdefault((width, height), []).append(refresh)
+        rates.append(sizes)
+
+    common = set(rates[0]).intersection(*rates[1:]) if rates else set()
+    if not common:
+        return None
+
+    def closest(sizes: dict, size: tuple, target: float) -> float:
+        return min(sizes[size], key=lambda refresh: abs(refresh - target))
+
+    shared = [
+        (size, target)
+        for size in common
+        for target in rates[0][size]
+        if all(abs(closest(sizes, size, target) - target) <= SHARED_REFRESH_TOLERANCE for sizes in rates)
+    ]
+    if shared:
+        size, target = max(shared, key=lambda pair: (pair[0][0] * pair[0][1], pair[1]))
+    else:
+        size = max(common, key=lambda s: s[0] * s[1])
+        target = min(max(sizes[size]) for sizes in rates)
+    return {
+        monitor['name']: (*size, running_rate(monitor, *size, closest(sizes, size, target)))
+        for monitor, sizes in zip(outputs, rates)
+    }
+
+
+def _at_mode(monitor: dict, mode: tuple, scale: float) -> dict:
+    """monitor set to a (width, height, refresh) mode, with `scale` if that changes its resolution"""
+    width, height, refresh = mode
+    resized = (width, height) != (monitor['width'], monitor['height'])
+    return dict(monitor, width=width, height=height, refreshRate=refresh, scale=scale if resized else monitor['scale'])
+
+
+def compute(mode: str, laptop: Optional[dict], externals: list, direction: str = "right") -> list:
+    """Placements for every output in a mode (see module docstring)"""
+    if not externals and mode in ("external", "mirror"):
+        # Never compile a layout that turns every output off
+        mode = "laptop"
+    if mode == "laptop":
+        return chain([laptop]) + [_disabled(m) for m in externals]
+    if mode == "external":
+        disabled = [_disabled(laptop)] if laptop else []
+        return chain(externals) + disabled
+    if mode == "extend":
+        return chain([laptop] + externals, direction)
+    if mode == "mirror":
+        # At a resolution all of them run natively nothing is rescaled;
+        # without one each output keeps its own mode and Hyprland scales
+        source, mirrors = laptop, externals
+        modes = solve_mirror([laptop] + externals)
+        if modes:
+            # A scale chosen for the native resolution does not fit the
+            # shared one: the source drops to 1, mirrors follow the source
+            source = _at_mode(laptop, modes[laptop['name']], 1.0)
+            mirrors = [_at_mode(m, modes[m['name']], source['scale']) for m in externals]
+        return [_placed(source, 0, 0)] + [_placed(m, 0, 0, mirror=laptop['name']) for m in mirrors]
+    raise ValueError(f"unknown mode: {mode}")
+
+
+def current(monitors: list) -> list:
+    """Placements that reproduce the monitors' present arrangement"""
+    placements = []
+    for monitor in monitors:
+        if monitor.get('disabled') or not monitor.get('width'):
+            placements.append(_disabled(monitor))
+            continue
+        mirror = monitor.get('mirrorOf')
+        placements.append(
+            _placed(monitor, monitor['x'], monitor['y'], mirror=None if mirror in (None, "none") else mirror)
+        )
+    return placements
+
+
+def rule(placement: dict) -> str:
+    """A placement as a `keyword monitor` command"""
+    if placement['disabled']:
+        return f"keyword monitor {placement['name']},disable"
+    command = (
+        f"keyword monitor {placement['name']},{placement['mode']},"
+        f"{placement['x']}x{placement['y']},{placement['scale']}"
+    )
+    if placement['mirror']:
+        command += f",mirror,{placement['mirror']}"
+    if placement['vrr']:
+        # A rule without it falls back to misc:vrr, which would turn
+        # adaptive sync off on outputs that had it on
+        command += ",vrr,1"
+    return command
+
+
+def commands(placements: list) -> list:
+    """
+    Compile placements into one batch. Enabled outputs go first: Hyprland
+    runs batched rules in order, so a mirror source is configured before
+    its mirrors and an output is never left alone before the rest light up.
+    """
+    enabled = [p for p in placements if not p['disabled']]
+    disabled = [p for p in placements if p['disabled']]
+    return [rule(p) for p in enabled + disabled]
@@ -0,0 +1,133 @@
+"""
+hyprmode_profiles - Remembered modes per set of connected displays
+
+Connector names (HDMI-A-1, DP-3, ...) change between dock ports, so a
+display is identified by a hash of its EDID fields from `monitors all`
+(make, model, serial, description), and a set of displays by a hash of
+its sorted identities. The profile store keeps one JSON file per set,
+named after that key ($XDG_STATE_HOME/hyprmode/profiles/<key>.json):
+the file name is the index, so a lookup is a single open() no matter
+how many profiles exist.
+
+Which output each workspace was on is kept the same way, one file per
+display set under workspaces/, so a display set that comes back gets
+its workspaces back (hyprmode_core.record_workspaces).
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def identity(monitor: dict) -> str:
+    """
+    Stable hash of one display's EDID fields, independent of the connector.
+    Works on raw `monitors all` entries and on parse_monitors() dicts.
+    """
+    name = monitor.get('name', '')
+    description = monitor.get('description', '') or ''
+    # Outputs without EDID data can be described by their connector alone
+    if description.endswith(f"({name})"):
+        description = description[:-len(name) - 2].strip()
+    fields = [monitor.get(key, '') or '' for key in ('make', 'model', 'serial')] + [description]
+    if not any(fields):
+        fields = [f"connector:{name}"]
+    return hashlib.sha1("\x1f".join(fields).encode("utf-8")).hexdigest()[:16]
+
+
+def display_set_key(monitors_data: list) -> str:
+    """Key of the set of connected displays (enabled or not) in a `monitors all` reply"""
+    identities = sorted(identity(monitor) for monitor in monitors_data)
+    return hashlib.sha1("\n".join(identities).encode("utf-8")).hexdigest()[:16]
+
+
+def store_dir() -> Path:
+    state_home = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return Path(state_home) / "hyprmode" / "profiles"
+
+
+def load(key: str) -> Optional[dict]:
+    """The profile stored for a display set key, or None"""
+    try:
+        with open(store_dir() / f"{key}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(monitors_data: list, mode: str, specs: list, direction: str = "right") -> Optional[dict]:
+    """
+    Remember `mode` (and the extend direction) for the displays in
+    monitors_data, with the resolution, refresh rate and scale each one
+    was configured with (specs: parsed monitor dicts, matched to displays
+    by connector name). Replaced atomically; failures only cost the profile.
+    """
+    identities = {monitor.get('name'): identity(monitor) for monitor in monitors_data}
+    profile = {
+        'key': display_set_key(monitors_data),
+        'mode': mode,
+        'direction': direction,
+        'outputs': {
+            identities[spec['name']]: {
+                'name': spec['name'],
+                'description': next(
+                    (m.get('description', '') for m in monitors_data if m.get('name') == spec['name']), ''
+                ),
+                'width': spec['width'],
+                'height': spec['height'],
+                'refreshRate': spec['refreshRate'],
+                'scale': spec['scale'],
+            }
+            for spec in specs
+            if spec and spec.get('name') in identities
+        },
+        'updated': time.time(),
+    }
+
+    from hyprmode_core import atomic_write
+
+    try:
+        atomic_write(store_dir() / f"{profile['key']}.json", json.dumps(profile, indent=2))
+    except OSError:
+        return None
+    return profile
+
+
+def with_stored_spec(monitor: Optional[dict], profile: dict) -> Optional[dict]:
+    """A parsed monitor with the profile's resolution, refresh rate and scale"""
+    if not monitor:
+        return monitor
+    stored = profile.get('outputs', {}).get(identity(monitor))
+    if not stored:
+        return monitor
+    merged = dict(monitor)
+    for key in ('width', 'height', 'refreshRate', 'scale'):
+        merged[key] = stored[key]
+    return merged
+
+
+def workspaces_dir() -> Path:
+    return store_dir().parent / "workspaces"
+
+
+def load_workspaces(key: str) -> dict:
+    """The workspace assignment ({workspace: display identity}) recorded for a display set key"""
+    try:
+        with open(workspaces_dir() / f"{key}.json") as f:
+            return dict(json.load(f)['workspaces'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_workspaces(key: str, assignment: dict) -> None:
+    """Replace a display set's workspace assignment atomically; failures only cost the record"""
+    from hyprmode_core import atomic_write
+
+    record = {'key': key, 'workspaces': assignment, 'updated': time.time()}
+    try:
+        atomic_write(workspaces_dir() / f"{key}.json", json.dumps(record, indent=2))
+    except OSError:
+        pass
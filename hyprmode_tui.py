@@ -0,0 +1,633 @@
+"""
+hyprmode_tui - Interactive Textual menu for hyprmode
+
+Imported only when hyprmode runs without arguments, so the headless CLI
+never pays for Textual. The Omarchy theme is cached after its first
+parse and watched while the menu is open, so switching themes recolours
+it in place. A switch made from the menu is kept only once confirmed;
+otherwise the previous layout comes back when the countdown runs out.
+
+Switches run in a worker thread, so the menu keeps drawing (and can
+cancel) while Hyprland settles, and the monitor panel follows socket2
+output events instead of showing the state from launch.
+
+Nothing is loaded before the first frame: the menu paints at once, and
+the theme, the monitors and the lid state are gathered concurrently
+and filled in as they arrive.
+"""
+
+import asyncio
+import json
+import os
+import struct
+import time
+from pathlib import Path
+
+from textual import work
+from textual.app import App
+from textual.binding import Binding
+from textual.containers import Container
+from textual.css.query import NoMatches
+from textual.reactive import var
+from textual.screen import ModalScreen
+from textual.widgets import OptionList, Static
+from textual.widgets.option_list import Option
+from textual.theme import Theme
+from textual.worker import get_current_worker
+
+import hyprmode_ipc
+from hyprmode_core import (
+    CONFIRM_TIMEOUT,
+    MODE_NAMES,
+    SWITCH_EVENTS,
+    apply_mode,
+    atomic_write,
+    get_monitor_state_async,
+    get_monitors,
+    layout_snapshot,
+    missing_outputs,
+    restore_layout,
+    send_notification,
+)
+
+OMARCHY_THEME = "omarchy-auto"
+MONITOR_POLL_INTERVAL = 2  # seconds - refresh rate of the panel without socket2
+
+# Try Ghostty (Omarchy v3.2+) first, then fall back to Alacritty for older versions
+THEME_FILES = ("ghostty", "alacritty.toml")
+
+
+def omarchy_current_dir() -> Path:
+    """Directory holding Omarchy's `theme` symlink to the active theme"""
+    return Path.home() / ".config/omarchy/current"
+
+
+def theme_cache_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(cache_home) / "hyprmode" / "theme.json"
+
+
+def normalize_color_format(color):
+    """Convert 0xRRGGBB to #RRGGBB for CSS/Textual compatibility."""
+    if isinstance(color, str) and color.startswith('0x'):
+        return '#' + color[2:]
+    return color
+
+
+def parse_omarchy_colors(theme_file):
+    """
+    Parse a Ghostty/Alacritty theme file into the colors the TUI uses.
+    Returns None if it cannot be read or tomllib is unavailable.
+    """
+    try:
+        import tomllib  # Python 3.11+
+    except ImportError:
+        try:
+            import tomli as tomllib  # Fallback for older Python
+        except ImportError:
+            return None
+
+    try:
+        with open(theme_file, "rb") as f:
+            data = tomllib.load(f)
+
+        colors = data.get("colors", {})
+        normal = colors.get("normal", {})
+        bright = colors.get("bright", {})
+        primary = colors.get("primary", {})
+
+        return {
+            "accent": normalize_color_format(
+                normal.get("yellow") or bright.get("yellow") or "#EBCB8B"
+            ),
+            "primary": normalize_color_format(
+                normal.get("cyan") or bright.get("cyan") or "#88C0D0"
+            ),
+            "foreground": normalize_color_format(
+                primary.get("foreground") or "#D8DEE9"
+            ),
+            "background": normalize_color_format(
+                primary.get("background") or "#2E3440"
+            ),
+        }
+    except Exception:
+        return None
+
+
+def load_omarchy_colors():
+    """
+    Load colors from Omarchy's active theme.
+    Returns dict with RGB color values, or None if not found.
+
+    The parsed colors are cached in $XDG_CACHE_HOME/hyprmode/theme.json,
+    keyed by the theme file's stat (device, inode, size, mtime). Switching
+    themes points the symlink at another file, so a warm launch costs one
+    stat() and a small JSON read instead of importing tomllib.
+    """
+    for name in THEME_FILES:
+        theme_file = omarchy_current_dir() / "theme" / name
+        try:
+            st = theme_file.stat()
+            break
+        except OSError:
+            continue
+    else:
+        return None
+
+    key = [str(theme_file), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]
+    cache_path = theme_cache_path()
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["colors"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    colors = parse_omarchy_colors(theme_file)
+    if colors:
+        try:
+            atomic_write(cache_path, json.dumps({"key": key, "colors": colors}))
+        except OSError:
+            pass
+    return colors
+
+
+def omarchy_theme(colors: dict, name: str = OMARCHY_THEME) -> Theme:
+    return Theme(
+        name=name,
+        primary=colors["primary"],
+        secondary=colors["accent"],
+        accent=colors["accent"],
+        foreground=colors["foreground"],
+        background=colors["background"],
+        surface=colors["background"],
+        panel=colors["background"],
+        dark=True,
+    )
+
+
+class ThemeWatcher:
+    """
+    inotify watches on Omarchy's current-theme symlink and the theme it
+    points to. `omarchy-theme-set` replaces the symlink (a create/move in
+    its parent directory) and editing a theme rewrites a file inside it;
+    both make the fd readable. Uses libc through ctypes, so no dependency;
+    raises OSError where inotify or the Omarchy directory is unavailable.
+    """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+
+    def __init__(self):
+        import ctypes
+
+        # CDLL(None) resolves symbols from the already-loaded libc;
+        # ctypes.util.find_library would shell out to ldconfig
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.theme_wd = None
+        try:
+            self._add_watch(
+                omarchy_current_dir(),
+                self.IN_CREATE | self.IN_DELETE | self.IN_MOVED_FROM | self.IN_MOVED_TO,
+            )
+            self.watch_theme()
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        return wd
+
+    def watch_theme(self) -> None:
+        """(Re)watch the directory the symlink currently points to"""
+        if self.theme_wd is not None:
+            self._libc.inotify_rm_watch(self.fd, self.theme_wd)
+            self.theme_wd = None
+        try:
+            self.theme_wd = self._add_watch(
+                omarchy_current_dir() / "theme",
+                self.IN_CLOSE_WRITE | self.IN_MODIFY | self.IN_MOVED_TO | self.IN_CREATE,
+            )
+        except OSError:
+            pass  # dangling symlink mid-switch; the parent watch still fires
+
+    def drain(self) -> bool:
+        """Read every pending event; True if any of them touched the theme"""
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+                offset += 16 + length
+                if wd == self.theme_wd or name == b"theme":
+                    changed = True
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ConfirmLayout(ModalScreen):
+    """Keep the layout just applied? Dismisses with False when the countdown runs out"""
+    
+    BINDINGS = [
+        Binding("enter,y", "keep", "Keep"),
+        Binding("escape,n", "revert", "Revert"),
+    ]
+    
+    def __init__(self, timeout: int):
+        super().__init__()
+        self.remaining = timeout
+    
+    def compose(self):
+        with Container():
+            yield Static("Keep this display layout?", classes="title")
+            yield Static(self.countdown(), id="countdown")
+            yield Static("Enter/y: keep  |  Esc/n: revert", classes="help")
+    
+    def on_mount(self) -> None:
+        self.set_interval(1, self.tick)
+    
+    def countdown(self) -> str:
+        return f"Reverting in {self.remaining}s"
+    
+    def tick(self) -> None:
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.dismiss(False)
+            return
+        self.query_one("#countdown", Static).update(self.countdown())
+    
+    def action_keep(self) -> None:
+        self.dismiss(True)
+    
+    def action_revert(self) -> None:
+        self.dismiss(False)
+
+
+def monitor_line(role: str, monitor: dict) -> str:
+    return (
+        f"{role}: {monitor['name']} "
+        f"({monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.0f}Hz)"
+    )
+
+
+class HyprModeApp(App):
+    """Hyprland display mode switcher TUI"""
+    
+    TITLE = "HyprMode"
+    
+    CSS = """
+    Screen {
+        align: center middle;
+    }
+    
+    Container {
+        min-width: 60;
+        max-width: 80;
+        height: auto;
+        padding: 2 4;
+        border: solid $accent;
+    }
+    
+    Static {
+        margin: 1 0;
+        min-width: 50;
+    }
+    
+    OptionList {
+        margin: 1 0;
+        height: auto;
+        min-height: 8;
+    }
+    
+    .title {
+        text-style: bold;
+        color: $accent;
+    }
+    
+    .error {
+        color: $error;
+    }
+    
+    .help {
+        color: $text-muted;
+    }
+    """
+    
+    BINDINGS = [
+        Binding("q", "quit", "Quit"),
+        Binding("j", "cursor_down", "Down", show=False),
+        Binding("k", "cursor_up", "Up", show=False),
+        Binding("escape", "cancel", "Cancel", show=False),
+    ]
+    
+    # What the panel shows; each change re-renders it (show_state)
+    monitors = var(None)  # get_monitors() result, None until known or if unavailable
+    lid_state = var("unknown")
+    error = var(None)
+    switching = var(None)  # name of the mode being applied
+    
+    def __init__(self):
+        super().__init__()
+        # The Omarchy theme replaces this once load_theme() has it
+        self.theme = "textual-dark"
+        
+        self.theme_watcher = None
+        self.theme_generation = 0
+        self.theme_reload_pending = False
+        self.switch_started = 0.0
+        
+        # set_reactive: nothing to re-render before compose(); monitors
+        # stays None ("Detecting displays...") until follow_monitors() runs
+        self.set_reactive(HyprModeApp.monitors, None)
+        self.set_reactive(HyprModeApp.lid_state, "unknown")
+        self.set_reactive(HyprModeApp.error, None)
+        self.set_reactive(HyprModeApp.switching, None)
+    
+    def on_mount(self) -> None:
+        """Paint the menu now; theme, monitors and lid state arrive concurrently"""
+        self.show_state()
+        # Started once the first frame is out, so neither delays it
+        self.call_after_refresh(self.load_theme)
+        self.call_after_refresh(self.follow_monitors)
+        self.set_interval(0.1, self.show_progress)
+    
+    @work(thread=True, group="theme")
+    def load_theme(self) -> None:
+        """Load the Omarchy theme if available, then start watching it"""
+        colors = load_omarchy_colors()
+        if colors:
+            self.call_from_thread(self.use_theme, colors)
+        try:
+            watcher = ThemeWatcher()
+        except (OSError, AttributeError):
+            return  # no inotify or no Omarchy; keep the theme we started with
+        self.call_from_thread(self.watch_theme_changes, watcher)
+    
+    def use_theme(self, colors: dict) -> None:
+        self.register_theme(omarchy_theme(colors))
+        self.theme = OMARCHY_THEME
+    
+    def watch_theme_changes(self, watcher: ThemeWatcher) -> None:
+        if not self.is_running:
+            watcher.close()
+            return
+        self.theme_watcher = watcher
+        asyncio.get_running_loop().add_reader(watcher.fd, self.on_theme_event)
+    
+    def on_unmount(self) -> None:
+        if self.theme_watcher:
+            asyncio.get_running_loop().remove_reader(self.theme_watcher.fd)
+            self.theme_watcher.close()
+            self.theme_watcher = None
+    
+    def on_theme_event(self) -> None:
+        """inotify fd readable: coalesce a theme switch's burst of events"""
+        if self.theme_watcher.drain() and not self.theme_reload_pending:
+            self.theme_reload_pending = True
+            self.set_timer(0.1, self.reload_theme)
+    
+    def reload_theme(self) -> None:
+        """Re-register the Omarchy theme from the file the symlink now points to"""
+        self.theme_reload_pending = False
+        if not self.theme_watcher:
+            return
+        self.theme_watcher.watch_theme()
+        colors = load_omarchy_colors()
+        if not colors:
+            return
+        # A fresh name makes the reactive `theme` change, which re-applies CSS
+        self.theme_generation += 1
+        name = f"{OMARCHY_THEME}-{self.theme_generation}"
+        self.register_theme(omarchy_theme(colors, name))
+        self.theme = name
+    
+    def compose(self):
+        """Monitor panel and menu; show_state() fills them in"""
+        with Container():
+            yield Static("", id="title", classes="title")
+            yield Static("")
+            yield Static("", id="info")
+            yield Static("")
+            yield Static("Select Display Mode:", id="menu-title", classes="title")
+            yield OptionList(
+                Option("💻 Laptop Only", id="laptop"),
+                Option("🖥️  External Only", id="external"),
+                Option("↔️  Extend", id="extend"),
+                Option("🔄 Mirror", id="mirror")
+            )
+            yield Static("", id="progress", classes="help")
+            yield Static("")
+            yield Static("", id="help", classes="help")
+    
+    def show_state(self) -> None:
+        """Render monitors, lid state, error and a running switch into the panel"""
+        try:
+            title = self.query_one("#title", Static)
+        except NoMatches:
+            return  # not composed yet; on_mount() renders
+        info = self.query_one("#info", Static)
+        menu = self.query_one(OptionList)
+        
+        if self.error is None and self.monitors is None:
+            title.update("🖥️  HyprMode - Display Mode Switcher")
+            info.update("Detecting displays...")
+            self.query_one("#help", Static).update("j/k: navigate  |  Enter: apply  |  q: quit")
+        elif self.error:
+            title.update("❌ HyprMode - Error")
+            title.add_class("error")
+            info.update(self.error)
+            info.add_class("error")
+            self.query_one("#help", Static).update("Press 'q' to quit")
+        else:
+            title.update("🖥️  HyprMode - Display Mode Switcher")
+            title.remove_class("error")
+            lines = [f"Lid State: {self.lid_state.upper()}"]
+            if self.monitors['laptop']:
+                lines.append(monitor_line("Laptop", self.monitors['laptop']))
+            lines.extend(monitor_line("External", external) for external in self.monitors['externals'])
+            if not self.monitors['externals']:
+                lines.append("External: None")
+            info.update("\n\n".join(lines))
+            info.remove_class("error")
+            self.query_one("#help", Static).update(
+                "Esc: cancel the switch" if self.switching else "j/k: navigate  |  Enter: apply  |  q: quit"
+            )
+        
+        self.query_one("#menu-title").display = not self.error
+        menu.display = not self.error
+        menu.disabled = self.switching is not None
+        self.query_one("#progress").display = self.switching is not None
+        self.show_progress()
+    
+    def show_progress(self) -> None:
+        """Tick the progress line of a running switch"""
+        if self.switching is None:
+            return
+        try:
+            progress = self.query_one("#progress", Static)
+        except NoMatches:
+            return
+        elapsed = time.monotonic() - self.switch_started
+        progress.update(f"⏳ Switching to {self.switching}... {elapsed:.1f}s")
+    
+    def watch_monitors(self) -> None:
+        self.show_state()
+    
+    def watch_lid_state(self) -> None:
+        self.show_state()
+    
+    def watch_error(self) -> None:
+        self.show_state()
+    
+    def watch_switching(self) -> None:
+        self.show_state()
+    
+    @work(exclusive=True, group="monitors")
+    async def follow_monitors(self) -> None:
+        """
+        Keep the panel current while the menu is open: re-query on every
+        output event from socket2 (plugged, unplugged, config reloaded),
+        or every MONITOR_POLL_INTERVAL seconds without it.
+        """
+        events = hyprmode_ipc.AsyncEventStream(SWITCH_EVENTS)
+        try:
+            # Subscribed before the first query, so no change slips past
+            await events.connect()
+            await self.refresh_monitors(snapshot=True)
+            while True:
+                if not events.connected and not await events.connect():
+                    await asyncio.sleep(MONITOR_POLL_INTERVAL)
+                elif await events.read() is None:
+                    continue  # Hyprland hung up; reconnect
+                await self.refresh_monitors()
+        finally:
+            events.close()
+    
+    async def refresh_monitors(self, snapshot: bool = False) -> None:
+        """
+        Query monitors and lid state concurrently, without blocking the
+        event loop, and show them. With snapshot=True the daemon's state
+        snapshot is used when it is fresh.
+        """
+        try:
+            monitors, lid_state = await get_monitor_state_async(snapshot)
+        except RuntimeError as e:
+            self.error = str(e)
+            return
+        self.monitors = monitors
+        self.lid_state = lid_state
+        self.error = None
+    
+    def action_cursor_down(self) -> None:
+        """Move cursor down in option list"""
+        option_list = self.query_one(OptionList)
+        option_list.action_cursor_down()
+    
+    def action_cursor_up(self) -> None:
+        """Move cursor up in option list"""
+        option_list = self.query_one(OptionList)
+        option_list.action_cursor_up()
+    
+    def action_cancel(self) -> None:
+        """Cancel a running switch; the worker puts the previous layout back"""
+        if self.switching is not None:
+            self.workers.cancel_group(self, "apply")
+    
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        """Handle mode selection"""
+        if self.error or not self.monitors or self.switching is not None:
+            return
+        
+        mode = event.option.id
+        problem = missing_outputs(mode, self.monitors)
+        if problem:
+            # Don't exit on validation errors - let user try another mode
+            send_notification(problem, urgent=True)
+            return
+        
+        self.switch_started = time.monotonic()
+        self.switching = MODE_NAMES[mode]
+        self.switch_mode(mode)
+    
+    @work(thread=True, exclusive=True, group="apply")
+    def switch_mode(self, mode: str) -> None:
+        """
+        Apply a mode in a worker thread; the menu keeps drawing while
+        Hyprland settles. The mode is planned from a live query: the
+        panel may show the daemon's snapshot, and mode or position
+        changes made by other tools are not announced on socket2. A
+        switch cancelled with Esc still runs to the end (a half-sent
+        batch would be worse) and is then undone.
+        """
+        worker = get_current_worker()
+        try:
+            monitors = get_monitors()
+            problem = missing_outputs(mode, monitors)
+            if problem:
+                raise RuntimeError(problem)
+            previous = layout_snapshot(monitors)
+            apply_mode(mode, monitors)
+        except RuntimeError as e:
+            self.call_from_thread(self.switch_failed, str(e))
+            return
+        if worker.is_cancelled:
+            try:
+                restore_layout(previous, get_monitors())
+                send_notification("Display change cancelled - restored the previous layout")
+            except RuntimeError as e:
+                send_notification(str(e), urgent=True)
+            self.call_from_thread(self.switch_failed, None)
+            return
+        self.call_from_thread(self.switched, previous)
+    
+    def switch_failed(self, error) -> None:
+        """Back to the menu after a failed or cancelled switch - let user try another mode"""
+        self.switching = None
+        self.query_one(OptionList).focus()  # a disabled widget loses focus
+        if error:
+            send_notification(error, urgent=True)
+        self.run_worker(self.refresh_monitors(), group="refresh")
+    
+    def switched(self, previous: list) -> None:
+        self.switching = None
+        self.push_screen(ConfirmLayout(CONFIRM_TIMEOUT), lambda keep: self.confirmed(keep, previous))
+    
+    def confirmed(self, keep: bool, previous: list) -> None:
+        """Exit after the confirmation prompt, restoring `previous` unless the user kept the switch"""
+        if keep:
+            self.exit()
+        else:
+            self.revert(previous)
+    
+    @work(thread=True, exclusive=True, group="apply")
+    def revert(self, previous: list) -> None:
+        """Put back the layout an unconfirmed switch replaced, then exit"""
+        try:
+            restore_layout(previous, get_monitors())
+            send_notification("Display change not confirmed - restored the previous layout")
+        except RuntimeError as e:
+            send_notification(str(e), urgent=True)
+        self.call_from_thread(self.exit)
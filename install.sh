@@ -10,12 +10,42 @@ rm -rf ~/.cache/textual/ 2>/dev/null || true
 
 echo "Installing HyprMode and Emergency Recovery Daemon..."
 
+# Modules shared by hyprmode and hyprmode-daemon
+SHARED_MODULES="hyprmode_ipc.py hyprmode_core.py hyprmode_tui.py hyprmode_profiles.py hyprmode_layout.py"
+
+# Compile the daemon and the shared modules in $1 into checked-hash pycs
+# (PEP 552). Python compares the hash stored in each pyc with the source
+# on import and falls back to the source when they differ, so a cached
+# start can never run stale code.
+compile_bytecode() {
+    local files=("$1/hyprmode-daemon")
+    for module in $SHARED_MODULES; do
+        files+=("$1/$module")
+    done
+    sudo /usr/bin/python3 -c '
+import py_compile, sys
+for path in sys.argv[1:]:
+    py_compile.compile(path, doraise=True, invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+' "${files[@]}"
+}
+
 # Check if running from correct directory
-if [ ! -f "hyprmode.py" ] || [ ! -f "hyprmode-daemon.py" ]; then
+for required in hyprmode.py hyprmode-daemon.py $SHARED_MODULES; do
+    if [ ! -f "$required" ]; then
+        missing=1
+    fi
+done
+if [ -n "$missing" ]; then
     echo "Error: Required files not found. Run this script from ~/Documents/hyprmode/"
     exit 1
 fi
 
+# Install shared modules (imported by both tools from their own directory)
+echo "Installing shared modules..."
+for module in $SHARED_MODULES; do
+    sudo cp "$module" "/usr/local/bin/$module" || exit 1
+done
+
 # Install main HyprMode tool
 echo "Installing HyprMode main tool..."
 sudo cp hyprmode.py /usr/local/bin/hyprmode || exit 1
@@ -28,6 +58,9 @@ sudo cp hyprmode-daemon-wrapper /usr/local/bin/hyprmode-daemon-wrapper || exit 1
 sudo chmod +x /usr/local/bin/hyprmode-daemon
 sudo chmod +x /usr/local/bin/hyprmode-daemon-wrapper
 
+echo "Compiling bytecode..."
+compile_bytecode /usr/local/bin || exit 1
+
 # Verify daemon file is correct
 echo "Verifying daemon installation..."
 diff hyprmode-daemon.py /usr/local/bin/hyprmode-daemon
@@ -39,15 +72,26 @@ else
 fi
 
 # Refresh any legacy copies in /usr/bin so stale code can't shadow this install
+legacy_found=0
 for pair in "hyprmode:hyprmode.py" "hyprmode-daemon:hyprmode-daemon.py" "hyprmode-daemon-wrapper:hyprmode-daemon-wrapper"; do
     dest="/usr/bin/${pair%%:*}"
     src="${pair#*:}"
     if [ -f "$dest" ]; then
         sudo cp "$src" "$dest"
         sudo chmod +x "$dest"
+        legacy_found=1
         echo "✓ Refreshed legacy copy: $dest"
     fi
 done
+# Legacy copies import the shared modules from /usr/bin too
+if [ "$legacy_found" -eq 1 ]; then
+    for module in $SHARED_MODULES; do
+        sudo cp "$module" "/usr/bin/$module"
+    done
+    if [ -f /usr/bin/hyprmode-daemon ]; then
+        compile_bytecode /usr/bin
+    fi
+fi
 
 # Create systemd user directory if it doesn't exist
 mkdir -p ~/.config/systemd/user/
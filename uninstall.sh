@@ -16,6 +16,12 @@ echo "Removing installed files..."
 sudo rm -f /usr/local/bin/hyprmode
 sudo rm -f /usr/local/bin/hyprmode-daemon
 sudo rm -f /usr/local/bin/hyprmode-daemon-wrapper
+sudo rm -f /usr/local/bin/hyprmode_ipc.py
+sudo rm -f /usr/local/bin/hyprmode_core.py
+sudo rm -f /usr/local/bin/hyprmode_tui.py
+sudo rm -f /usr/local/bin/hyprmode_profiles.py
+sudo rm -f /usr/local/bin/hyprmode_layout.py
+sudo rm -f /usr/local/bin/__pycache__/hyprmode*.pyc
 
 # Reload systemd
 systemctl --user daemon-reload